@@ -1,5 +1,32 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def ensure_search_triggers(sender, using, **kwargs):
+    from .search import ensure_triggers
+    ensure_triggers(using)
+
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        post_migrate.connect(ensure_search_triggers, sender=self)
+
+        from .db import configure_connection
+        connection_created.connect(configure_connection)
+
+        from .dashboard import invalidate_dashboard_on_write
+        for model_name in ('InventoryItem', 'Shipment', 'ShipmentItem'):
+            model = self.get_model(model_name)
+            post_save.connect(invalidate_dashboard_on_write, sender=model)
+            post_delete.connect(invalidate_dashboard_on_write, sender=model)
+
+        from .models.inventory_item import item_deleted
+        post_delete.connect(item_deleted, sender=self.get_model('InventoryItem'))
+
+        from .models.tombstone import record_tombstone
+        for model_name in ('InventoryItem', 'Shipment'):
+            post_delete.connect(record_tombstone, sender=self.get_model(model_name))
@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_QUERY_WORKERS, thread_name_prefix='async-query')
+    return _executor
+
+
+def _run_query(query):
+    # Pool threads keep their own connection between queries, so each query
+    # is handled like a request: the connection is closed before and after
+    # it once past CONN_MAX_AGE or unusable, and after any error so that the
+    # next query reconnects.
+    close_old_connections()
+    try:
+        return query()
+    except Exception:
+        connection.close()
+        raise
+    finally:
+        close_old_connections()
+
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+async def run_concurrently(*queries):
+    """
+    Run independent blocking ORM calls at the same time and return their
+    results in order.
+
+    Django's async ORM runs every query on the one thread that owns the
+    request's connection, so awaiting several of them still runs them one
+    after another. Here each call runs on a pool thread with a connection
+    of its own, so the queries overlap in the database. When the request's
+    connection is inside a transaction, the calls run one by one on it
+    instead, because other connections could not see its uncommitted
+    writes.
+    """
+    if await sync_to_async(_in_transaction)():
+        return [await sync_to_async(query)() for query in queries]
+
+    loop = asyncio.get_running_loop()
+    return list(await asyncio.gather(*(
+        loop.run_in_executor(get_executor(), _run_query, query) for query in queries
+    )))
@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .concurrency import run_concurrently
+from .models import InventoryItem, Shipment
+from .models.enums import ShipmentStatus
+
+CACHE_KEY = 'dashboard_data'
+HITS_KEY = f'{CACHE_KEY}:hits'
+MISSES_KEY = f'{CACHE_KEY}:misses'
+
+
+def get_cache():
+    return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+
+def get_shipment_activity():
+    """Shipment counts per type over the last 30 days."""
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    return list(Shipment.objects.filter(
+        created_at__gte=thirty_days_ago
+    ).order_by().values('type').annotate(
+        count=Count('id')
+    ))
+
+
+def get_top_items():
+    """Top items by quantity."""
+    return list(InventoryItem.objects.order_by('-quantity')[:5].values(
+        'name', 'quantity', 'minimum_stock'
+    ))
+
+
+def count_outstanding_shipments():
+    # Spelled as an IN list rather than exclude() so the status index is used
+    return Shipment.objects.filter(status__in=[
+        shipment_status.value for shipment_status in ShipmentStatus
+        if shipment_status != ShipmentStatus.DELIVERED
+    ]).count()
+
+
+def count_inventory_items():
+    return InventoryItem.objects.count()
+
+
+# The independent queries behind each dashboard key
+DASHBOARD_QUERIES = {
+    'shipment_activity': get_shipment_activity,
+    'top_items': get_top_items,
+    'outstanding_shipments': count_outstanding_shipments,
+}
+
+
+def compute_dashboard_data():
+    """Run the dashboard aggregates against the database."""
+    return {key: query() for key, query in DASHBOARD_QUERIES.items()}
+
+
+async def acompute_dashboard_data():
+    """Async compute_dashboard_data(), running the aggregates concurrently."""
+    results = await run_concurrently(*DASHBOARD_QUERIES.values())
+    return dict(zip(DASHBOARD_QUERIES, results))
+
+
+def _count(key):
+    cache = get_cache()
+    # add() is a no-op when the counter exists, so incr() never misses it
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def get_dashboard_data():
+    """
+    Get the dashboard payload, computing and caching it on a miss.
+
+    Writes to shipments, shipment items and inventory items invalidate the
+    entry; ``DASHBOARD_CACHE_TIMEOUT`` bounds how stale it can get if an
+    invalidation is ever missed.
+    """
+    cache = get_cache()
+    data = cache.get(CACHE_KEY)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+
+    _count(MISSES_KEY)
+    data = compute_dashboard_data()
+    cache.set(CACHE_KEY, data, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+async def aget_dashboard_data():
+    """Async get_dashboard_data(), computing a miss with acompute_dashboard_data()."""
+    cache = get_cache()
+    data = await cache.aget(CACHE_KEY)
+    if data is not None:
+        await sync_to_async(_count)(HITS_KEY)
+        return data
+
+    await sync_to_async(_count)(MISSES_KEY)
+    data = await acompute_dashboard_data()
+    await cache.aset(CACHE_KEY, data, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_dashboard():
+    """
+    Drop the cached dashboard payload.
+
+    The entry is dropped right away and again once the surrounding
+    transaction commits, so a read racing the write cannot keep a payload
+    computed from the old data.
+    """
+    cache = get_cache()
+    cache.delete(CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def invalidate_dashboard_on_write(sender, **kwargs):
+    """Signal receiver for saves and deletes of dashboard models."""
+    invalidate_dashboard()
+
+
+def get_cache_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else None,
+    }
+
+
+def get_system_stats():
+    """Counts shown on the home page."""
+    return {
+        'total_inventory_items': count_inventory_items(),
+        'outstanding_shipments': count_outstanding_shipments(),
+    }
+
+
+async def aget_system_stats():
+    """Async get_system_stats(), running both counts concurrently."""
+    inventory_count, outstanding_shipments = await run_concurrently(
+        count_inventory_items, count_outstanding_shipments
+    )
+    return {
+        'total_inventory_items': inventory_count,
+        'outstanding_shipments': outstanding_shipments,
+    }
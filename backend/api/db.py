@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import connections
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Apply ``SQLITE_PRAGMAS`` to each new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def pk_in_range(model, pk):
+    """
+    Whether an integer fits the column of ``model``'s primary key; looking up
+    one that does not would overflow in the database driver.
+    """
+    low, high = connections[model.objects.db].ops.integer_field_range(model._meta.pk.get_internal_type())
+    return (low is None or pk >= low) and (high is None or pk <= high)
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard
+from .events import item_changed
+from .models import InventoryItem, InventoryValuation, ShipmentItem, StockMovement
+from .models.enums import ShipmentType, StockMovementType
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when delivering would take an item's quantity below zero.
+
+    ``short_items`` lists every item that is short, not just the first one.
+    """
+
+    def __init__(self, short_items):
+        self.short_items = short_items
+        names = ', '.join(item['name'] for item in short_items)
+        super().__init__(f'Not enough inventory for items: {names}')
+
+
+def _by_item(values):
+    """Build a CASE expression picking a per-item value by primary key."""
+    return Case(
+        *[When(pk=item_id, then=Value(value)) for item_id, value in values.items()],
+        output_field=IntegerField()
+    )
+
+
+def apply_deliveries(shipments, user=None):
+    """
+    Apply the inventory effects of delivering one or more shipments.
+
+    All quantity changes are made by a single conditional UPDATE of the form
+    ``quantity = quantity + delta WHERE quantity + delta >= 0``, so concurrent
+    deliveries never lose updates and an item can never go negative. The
+    stock movement ledger and today's valuation roll-up are written in bulk
+    from the resulting balances.
+
+    Must be called inside ``transaction.atomic()``. When any item would go
+    negative nothing is changed and InsufficientStock is raised.
+    Returns the number of inventory items updated.
+    """
+    shipment_types = {shipment.pk: shipment.type for shipment in shipments}
+    lines = ShipmentItem.objects.filter(
+        shipment_id__in=shipment_types
+    ).order_by('shipment_id', 'id').values_list('shipment_id', 'item_id', 'quantity')
+
+    deltas = defaultdict(int)
+    changes = []
+    for shipment_id, item_id, quantity in lines:
+        change = quantity if shipment_types[shipment_id] == ShipmentType.INCOMING.value else -quantity
+        deltas[item_id] += change
+        changes.append((shipment_id, item_id, change))
+
+    if not deltas:
+        return 0
+
+    try:
+        with transaction.atomic():
+            updated = InventoryItem.objects.filter(
+                pk__in=deltas,
+                quantity__gte=_by_item({item_id: -delta for item_id, delta in deltas.items()})
+            ).update(
+                quantity=F('quantity') + _by_item(deltas),
+                updated_at=timezone.now()
+            )
+            if updated != len(deltas):
+                raise InsufficientStock([])
+    except InsufficientStock:
+        # The savepoint is rolled back, so these are the quantities before delivery
+        short_items = [
+            {
+                'id': item_id,
+                'name': name,
+                'available': quantity,
+                'requested': -deltas[item_id],
+            }
+            for item_id, name, quantity in InventoryItem.objects.filter(
+                pk__in=deltas
+            ).order_by('id').values_list('id', 'name', 'quantity')
+            if quantity + deltas[item_id] < 0
+        ]
+        raise InsufficientStock(short_items)
+
+    items = {
+        item_id: (quantity, category, unit_price, minimum_stock)
+        for item_id, quantity, category, unit_price, minimum_stock in InventoryItem.objects.filter(
+            pk__in=deltas
+        ).values_list('id', 'quantity', 'category', 'unit_price', 'minimum_stock')
+    }
+
+    # Replay each item's changes from its balance before delivery
+    balances = {item_id: items[item_id][0] - delta for item_id, delta in deltas.items()}
+    movements = []
+    valuation_changes = defaultdict(lambda: [0, Decimal('0.00')])
+    occurred_at = timezone.now()
+
+    for shipment_id, item_id, change in changes:
+        balances[item_id] += change
+        movements.append(StockMovement(
+            item_id=item_id,
+            type=StockMovementType.DELIVERY.value,
+            quantity_change=change,
+            balance=balances[item_id],
+            shipment_id=shipment_id,
+            occurred_at=occurred_at,
+            created_by=user
+        ))
+
+        _, category, unit_price, _ = items[item_id]
+        valuation_changes[category][0] += change
+        valuation_changes[category][1] += change * unit_price
+
+    StockMovement.objects.bulk_create(movements)
+    invalidate_dashboard()
+
+    # Queryset updates send no signals, so publish the change events here
+    for item_id, delta in deltas.items():
+        quantity, _, _, minimum_stock = items[item_id]
+        item_changed(item_id, quantity, delta, quantity <= minimum_stock, quantity - delta <= minimum_stock)
+
+    today = timezone.localdate(occurred_at)
+    for category, (quantity_change, value_change) in valuation_changes.items():
+        InventoryValuation.apply_change(today, category, quantity_change, value_change)
+
+    return len(deltas)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+
+class EventBuffer:
+    """
+    Bounded, in-process buffer of change events for the event stream.
+
+    Events get increasing ids prefixed with a random epoch chosen for each
+    process, so an id from before a restart or from another worker is never
+    mistaken for a position in this buffer. Writers publish from any
+    thread, and streams wait for new events on their event loop without
+    polling.
+    """
+
+    def __init__(self, size):
+        self.events = deque(maxlen=size)
+        self.reset()
+
+    def reset(self):
+        """Start over empty, with a new epoch; also run in forked workers."""
+        self.epoch = uuid.uuid4().hex
+        self.events.clear()
+        self.sequence = 0
+        # A lock held by another thread at fork time would never be released
+        self.lock = threading.Lock()
+        self.waiters = set()
+
+    def format_id(self, sequence):
+        return f'{self.epoch}-{sequence}'
+
+    def parse_id(self, event_id):
+        """Return the sequence number of an id from this buffer, or None."""
+        epoch, _, sequence = (event_id or '').partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def latest(self):
+        return self.sequence
+
+    def publish(self, event_type, data):
+        with self.lock:
+            self.sequence += 1
+            self.events.append((self.sequence, event_type, data))
+            waiters = list(self.waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def since(self, sequence):
+        """
+        Return ``(events, complete)`` for the events after a sequence number.
+
+        ``complete`` is False when older events were already dropped from
+        the buffer, so the client has missed some and must reload.
+        """
+        with self.lock:
+            events = [event for event in self.events if event[0] > sequence]
+            oldest = self.events[0][0] if self.events else self.sequence + 1
+        return events, sequence >= oldest - 1
+
+    async def wait(self, sequence, timeout):
+        """Wait until there are events after ``sequence``; False on timeout."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self.lock:
+            if self.sequence > sequence:
+                return True
+            self.waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self.lock:
+                self.waiters.discard(waiter)
+
+
+buffer = EventBuffer(settings.EVENT_BUFFER_SIZE)
+if hasattr(os, 'register_at_fork'):
+    # Workers forked from a preloaded app must not share the parent's epoch
+    os.register_at_fork(after_in_child=buffer.reset)
+
+
+def publish(event_type, data):
+    """Publish an event once the current transaction commits."""
+    transaction.on_commit(lambda: buffer.publish(event_type, data))
+
+
+def item_changed(item_id, quantity, change, is_low_stock, was_low_stock):
+    """Publish the quantity and low stock events for a change to an item."""
+    if change:
+        publish('quantity', {'id': item_id, 'quantity': quantity, 'change': change})
+    if is_low_stock != was_low_stock:
+        publish('low_stock', {'id': item_id, 'is_low_stock': is_low_stock})
+
+
+def status_changed(shipment_id, status, previous):
+    publish('status', {'id': shipment_id, 'status': status, 'previous': previous})
+
+
+def format_event(sequence, event_type, data):
+    """Encode one event in the text/event-stream format."""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f'id: {buffer.format_id(sequence)}\nevent: {event_type}\ndata: {payload}\n\n'
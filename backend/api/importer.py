@@ -0,0 +1,211 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .dashboard import invalidate_dashboard
+from .events import item_changed
+from .models import Category, InventoryItem, InventoryValuation, StockMovement
+from .models.enums import StockMovementType
+from .serializers.inventory_item_serializer import InventoryItemImportSerializer
+
+FORMATS = ('csv', 'ndjson')
+
+# Columns written on conflict; created_at and created_by keep their original values
+UPSERT_FIELDS = [
+    'name', 'description', 'quantity', 'location', 'category',
+    'minimum_stock', 'unit_price', 'updated_at', 'last_updated_by',
+]
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Cap on the number of row errors kept in memory and reported back
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename, content_type=None):
+    """Guess the import format from a file name or content type."""
+    name = (filename or '').lower()
+    if name.endswith('.csv') or content_type == 'text/csv':
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def iter_rows(stream, file_format):
+    """
+    Yield (row_number, row) pairs from a binary stream, one line at a time.
+
+    Row numbers are 1-based data rows. Rows that cannot be parsed are
+    yielded as an Exception instead of a dict.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            # Treat empty cells as missing so optional fields fall back to defaults
+            yield number, {key: value for key, value in row.items() if key and value != ''}
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError('Expected a JSON object')
+        except ValueError as e:
+            row = e
+        yield number, row
+
+
+class ImportResult:
+    """Running totals for an import, with a bounded list of row errors."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': detail})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_inventory(stream, file_format, user=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert inventory items on SKU from a CSV or NDJSON stream.
+
+    The stream is read in batches of ``batch_size`` rows, so memory stays
+    flat whatever the file size. Each batch is validated row by row without
+    touching the database and then written with a single
+    ``bulk_create(update_conflicts=True)`` in its own transaction, along
+    with ledger entries for quantity changes. Invalid rows are reported and
+    skipped without aborting the import.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f'Unsupported import format: {file_format}')
+
+    result = ImportResult()
+    validator = InventoryItemImportSerializer()
+    rows = iter_rows(stream, file_format)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        # Later rows for the same SKU win, like a sequence of upserts would
+        valid = {}
+        for number, row in batch:
+            if isinstance(row, Exception):
+                result.add_error(number, {'non_field_errors': [str(row)]})
+                continue
+            try:
+                data = validator.run_validation(row)
+            except serializers.ValidationError as e:
+                result.add_error(number, e.detail)
+                continue
+            valid.pop(data['sku'], None)
+            valid[data['sku']] = data
+
+        if valid:
+            _upsert_batch(valid, user, result)
+
+    return result
+
+
+def _upsert_batch(rows, user, result):
+    """Write one batch of validated rows keyed by SKU."""
+    now = timezone.now()
+
+    with transaction.atomic():
+        previous = {
+            sku: (quantity, category, is_low_stock, unit_price)
+            for sku, quantity, category, is_low_stock, unit_price in InventoryItem.objects.filter(
+                sku__in=rows
+            ).values_list('sku', 'quantity', 'category', 'is_low_stock', 'unit_price')
+        }
+
+        InventoryItem.objects.bulk_create(
+            [
+                InventoryItem(created_by=user, last_updated_by=user, updated_at=now, **data)
+                for data in rows.values()
+            ],
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=UPSERT_FIELDS
+        )
+
+        current = InventoryItem.objects.filter(sku__in=rows).values_list(
+            'sku', 'id', 'quantity', 'category', 'is_low_stock', 'unit_price'
+        )
+        movements = []
+        category_changes = defaultdict(int)
+        # Per category: item count, quantity and value deltas for today's roll-up
+        valuation_changes = defaultdict(lambda: [0, 0, Decimal('0.00')])
+        for sku, item_id, quantity, category, is_low_stock, unit_price in current:
+            totals = valuation_changes[category]
+            totals[0] += 1
+            totals[1] += quantity
+            totals[2] += quantity * unit_price
+            if sku in previous:
+                previous_quantity, previous_category, was_low_stock, previous_price = previous[sku]
+                item_changed(item_id, quantity, quantity - previous_quantity, is_low_stock, was_low_stock)
+                result.updated += 1
+                totals = valuation_changes[previous_category]
+                totals[0] -= 1
+                totals[1] -= previous_quantity
+                totals[2] -= previous_quantity * previous_price
+                if category != previous_category:
+                    category_changes[previous_category] -= 1
+                    category_changes[category] += 1
+                if quantity == previous_quantity:
+                    continue
+                movement_type, change = StockMovementType.ADJUSTMENT, quantity - previous_quantity
+            else:
+                result.created += 1
+                movement_type, change = StockMovementType.INITIAL, quantity
+                category_changes[category] += 1
+                item_changed(item_id, quantity, change, is_low_stock, False)
+
+            movements.append(StockMovement(
+                item_id=item_id,
+                type=movement_type.value,
+                quantity_change=change,
+                balance=quantity,
+                occurred_at=now,
+                created_by=user
+            ))
+
+        StockMovement.objects.bulk_create(movements)
+        Category.apply_changes(category_changes)
+        # bulk_create sends no signals
+        invalidate_dashboard()
+
+        # Adjust today's roll-up by the batch's deltas, like deliveries do,
+        # rather than re-aggregating every item in the touched categories
+        today = timezone.localdate(now)
+        for category, (item_count, quantity, value) in valuation_changes.items():
+            if item_count or quantity or value:
+                InventoryValuation.apply_change(today, category, quantity, value, item_count_change=item_count)
@@ -0,0 +1,144 @@
+import multiprocessing
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from api.models import Category, InventoryItem, InventoryValuation, StockMovement
+from api.models.enums import StockMovementType
+from .benchmark_serializers import create_items
+
+
+def write(rng, item_ids, user):
+    # One stock adjustment: the item's quantity, its ledger row and the
+    # day's valuation change together
+    with transaction.atomic():
+        item_id = rng.choice(item_ids)
+        InventoryItem.objects.filter(pk=item_id).update(quantity=F('quantity') + 1)
+        item = InventoryItem.objects.only('quantity', 'category', 'unit_price', 'name').get(pk=item_id)
+        StockMovement.record(item, 1, StockMovementType.ADJUSTMENT, user=user)
+        InventoryValuation.apply_change(timezone.localdate(), item.category, 1, item.unit_price)
+
+
+def read(rng, item_ids, user):
+    list(InventoryItem.objects.filter(pk__in=rng.sample(item_ids, 50)).values_list('id', 'quantity'))
+
+
+def run_worker(kind, item_ids, user, duration):
+    """Run writes or reads until ``duration`` is up; returns (kind, latencies, failures)."""
+    operation = write if kind == 'write' else read
+    rng = random.Random()
+    latencies = []
+    failures = 0
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            # Each operation stands for one request, so the connection is kept
+            # or closed between them as CONN_MAX_AGE says
+            close_old_connections()
+            start = time.perf_counter()
+            try:
+                operation(rng, item_ids, user)
+            except OperationalError:
+                failures += 1
+                continue
+            finally:
+                close_old_connections()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connections.close_all()
+    return kind, latencies, failures
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures concurrent write throughput, and read latency alongside it, against the '
+        'configured database. Run it once per database profile to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=4,
+            help='Processes writing at once (default: 4)'
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=2,
+            help='Processes reading while the writers run (default: 2)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds to run for (default: 10)'
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=1000,
+            help='Items the writers spread their changes over (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.describe_profile()
+
+        user = User.objects.create_user(username=f'benchmark-db-{time.time_ns()}', email='benchmark@example.com')
+        items = create_items(options['items'], user)
+        item_ids = [item.pk for item in items]
+        category = items[0].category
+        # bulk_create skips save(), so count the items in by hand
+        Category.apply_changes({category: len(items)})
+        InventoryValuation.snapshot(timezone.localdate(), categories=[category])
+        # Separate processes, like several server workers sharing the database
+        connections.close_all()
+        jobs = [('write', item_ids, user, options['duration'])] * options['writers']
+        jobs += [('read', item_ids, user, options['duration'])] * options['readers']
+        results = {'write': [], 'read': []}
+        errors = {'write': 0, 'read': 0}
+        start = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(len(jobs)) as pool:
+            for kind, latencies, failed in pool.starmap(run_worker, jobs):
+                results[kind] += latencies
+                errors[kind] += failed
+        elapsed = time.perf_counter() - start
+
+        for kind in ('write', 'read'):
+            self.report(kind, results[kind], errors[kind], elapsed)
+
+        # Deleting the generated items takes them back out of the counts and
+        # today's valuation; movements go with their items
+        InventoryItem.objects.filter(pk__in=item_ids).delete()
+        user.delete()
+
+    def describe_profile(self):
+        database = settings.DATABASES['default']
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = ', '.join(
+                    f'{name}={cursor.execute(f"PRAGMA {name}").fetchone()[0]}'
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+                )
+            self.stdout.write(f'sqlite {database["NAME"]}: {pragmas}, CONN_MAX_AGE={database["CONN_MAX_AGE"]}')
+        else:
+            self.stdout.write(
+                f'{connection.vendor} {database["HOST"]}/{database["NAME"]}: '
+                f'CONN_MAX_AGE={database["CONN_MAX_AGE"]}, CONN_HEALTH_CHECKS={database["CONN_HEALTH_CHECKS"]}'
+            )
+
+    def report(self, kind, latencies, errors, elapsed):
+        if len(latencies) < 2:
+            self.stdout.write(f'{kind}s: {len(latencies)} completed, {errors} failed')
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind}s: {len(latencies) / elapsed:.0f}/sec, p50 {percentiles[49] * 1000:.1f}ms, '
+            f'p99 {percentiles[98] * 1000:.1f}ms, {errors} failed'
+        ))
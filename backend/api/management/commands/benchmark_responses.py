@@ -0,0 +1,80 @@
+import gzip
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.middleware import CompressionMiddleware, brotli
+from api.models import InventoryItem, Shipment
+from api.pagination import KeysetPagination
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers.fast import InventoryItemReader, ShipmentReader
+from api.views.mixins import DeltaSyncMixin
+from .benchmark_serializers import create_items, create_shipments
+
+class Command(BaseCommand):
+    help = 'Measures encode time and bytes on the wire of the main list endpoints on generated data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the fastest one is reported'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer uses the stdlib'))
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip is measured'))
+
+        # One list page at the largest page size and one full delta sync page
+        sizes = (('page', KeysetPagination.max_page_size), ('sync', DeltaSyncMixin.SYNC_MAX_LIMIT))
+        count = max(size for _, size in sizes)
+
+        # Everything is generated inside a transaction that is rolled back
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-responses', email='benchmark@example.com')
+            items = create_items(count, user)
+            create_shipments(count, user, items)
+
+            endpoints = (
+                ('inventory', InventoryItemReader(), InventoryItem.objects.filter(sku__startswith=f'BENCH-{count}-')),
+                ('shipments', ShipmentReader(), Shipment.objects.filter(tracking_number__startswith=f'BENCH-{count}-')),
+            )
+            for name, reader, queryset in endpoints:
+                for label, size in sizes:
+                    data = {'results': reader.serialize(reader.rows(queryset.order_by('id')[:size]))}
+                    self.measure(f'{name} {label} x{size}', data, options['repeat'])
+            transaction.set_rollback(True)
+
+    def measure(self, label, data, repeat):
+        def best_of(run):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return result, best
+
+        body, stdlib_time = best_of(lambda: JSONRenderer().render(data))
+        _, fast_time = best_of(lambda: FastJSONRenderer().render(data))
+        self.stdout.write(
+            f'{label}: encode {stdlib_time * 1000:.1f}ms stdlib, {fast_time * 1000:.1f}ms fast '
+            f'({stdlib_time / fast_time:.1f}x)'
+        )
+
+        codings = [('identity', lambda: body), ('gzip', lambda: gzip.compress(body, compresslevel=6))]
+        if brotli is not None:
+            codings.append(('br', lambda: brotli.compress(body, quality=CompressionMiddleware.brotli_quality)))
+        for coding, compress in codings:
+            compressed, compress_time = best_of(compress)
+            self.stdout.write(
+                f'  {coding}: {len(compressed):,} bytes ({len(compressed) / len(body):.0%}), '
+                f'{compress_time * 1000:.1f}ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Measured {label}'))
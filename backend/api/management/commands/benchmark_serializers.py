@@ -0,0 +1,131 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from datetime import timedelta
+from api.models import InventoryItem, Shipment, ShipmentItem
+from api.models.enums import ShipmentStatus, ShipmentType
+from api.serializers import InventoryItemSerializer, ShipmentSerializer
+from api.serializers.fast import InventoryItemReader, ShipmentReader
+from api.views.mixins import DeltaSyncMixin
+
+
+def create_items(count, user):
+    return InventoryItem.objects.bulk_create([
+        InventoryItem(
+            name=f'Benchmark Item {index}',
+            sku=f'BENCH-{count}-{index}',
+            description='Generated for benchmarks',
+            quantity=index % 100,
+            location=f'Aisle {index % 20}',
+            category='Electronics',
+            minimum_stock=10,
+            unit_price=Decimal(index % 1000) / 4,
+            created_by=user,
+            last_updated_by=user
+        )
+        for index in range(count)
+    ], batch_size=1000)
+
+
+def create_shipments(count, user, items):
+    now = timezone.now()
+    shipments = Shipment.objects.bulk_create([
+        Shipment(
+            type=ShipmentType.INCOMING.value if index % 2 else ShipmentType.OUTGOING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number=f'BENCH-{count}-{index}',
+            carrier='FedEx',
+            estimated_arrival=now + timedelta(days=index % 30),
+            created_by=user,
+            updated_by=user
+        )
+        for index in range(count)
+    ], batch_size=1000)
+    # Two lines per shipment
+    ShipmentItem.objects.bulk_create([
+        ShipmentItem(shipment=shipment, item=items[(index + offset) % len(items)], quantity=offset + 1,
+                     unit_price=Decimal('9.99'))
+        for index, shipment in enumerate(shipments)
+        for offset in (0, 1)
+    ], batch_size=1000)
+    return shipments
+
+
+class Command(BaseCommand):
+    help = 'Compares rows/sec of the serializer and values() read paths on generated data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Number of rows to generate for each run (default: 10000 100000)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DeltaSyncMixin.SYNC_MAX_LIMIT,
+            help='Rows serialized per query, like one page of a delta sync'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per path; the fastest one is reported'
+        )
+
+    def handle(self, *args, **options):
+        for count in options['rows']:
+            # Everything is generated inside a transaction that is rolled back
+            with transaction.atomic():
+                user = User.objects.create_user(username=f'benchmark-{count}', email='benchmark@example.com')
+                items = create_items(count, user)
+                shipments = create_shipments(count, user, items)
+
+                inventory = InventoryItem.objects.select_related('created_by', 'last_updated_by').filter(
+                    sku__startswith=f'BENCH-{count}-'
+                )
+                shipment_queryset = Shipment.objects.select_related('created_by', 'updated_by').prefetch_related(
+                    Prefetch('shipment_items', queryset=ShipmentItem.objects.order_by('id'))
+                ).filter(pk__gte=shipments[0].pk, pk__lte=shipments[-1].pk)
+
+                self.compare('inventory', count, inventory, InventoryItemSerializer, InventoryItemReader(), options)
+                self.compare('shipments', count, shipment_queryset, ShipmentSerializer, ShipmentReader(), options)
+                transaction.set_rollback(True)
+
+    def compare(self, label, count, queryset, serializer_class, reader, options):
+        chunk_size = options['chunk_size']
+
+        # Page over primary key ranges, as a sync client would
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+        chunks = [
+            queryset.filter(pk__gte=pks[start], pk__lte=pks[min(start + chunk_size, len(pks)) - 1]).order_by('pk')
+            for start in range(0, len(pks), chunk_size)
+        ]
+
+        def serializer_path():
+            return sum(len(serializer_class(chunk, many=True).data) for chunk in chunks)
+
+        def values_path():
+            return sum(len(reader.serialize(reader.rows(chunk))) for chunk in chunks)
+
+        results = {}
+        for name, run in (('serializer', serializer_path), ('values', values_path)):
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                rows = run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = rows / best
+            self.stdout.write(f'{label} x{count} {name}: {rows / best:,.0f} rows/sec ({best:.2f}s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{label} x{count}: values path is {results["values"] / results["serializer"]:.1f}x faster'
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.importer import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_inventory
+
+class Command(BaseCommand):
+    help = 'Imports inventory items from a CSV or NDJSON file, upserting on SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--type',
+            choices=FORMATS,
+            help='File format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows validated and written per batch'
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['type'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError('Could not tell the file format, pass --type')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        try:
+            stream = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(f"Could not open {options['path']}: {e}")
+
+        with stream:
+            result = import_inventory(stream, file_format, batch_size=options['batch_size'])
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more invalid rows')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} new and {result.updated} updated items, {result.failed} rows failed'
+        ))
@@ -0,0 +1,183 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.asgi import application as asgi_application
+from backend.wsgi import application as wsgi_application
+
+# (name, synchronous endpoint, async variant)
+ENDPOINTS = [
+    ('dashboard', '/api/inventory/dashboard_data/', '/api/async/dashboard/'),
+    ('low_stock_counts', '/api/inventory/low_stock_counts/', '/api/async/low-stock-counts/'),
+    ('value_history', '/api/inventory/value_history/', '/api/async/value-history/'),
+]
+
+class Command(BaseCommand):
+    help = (
+        'Compares latency and throughput of one WSGI worker serving the synchronous '
+        'endpoints with one ASGI worker serving their async variants, in process, '
+        'against the current database (run populate_db first)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests sent to each endpoint (default: 500)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=20,
+            help='Requests kept in flight at once (default: 20)'
+        )
+        parser.add_argument(
+            '--username',
+            help='User to authenticate as (default: the first superuser)'
+        )
+        parser.add_argument(
+            '--db-latency',
+            type=float,
+            default=0,
+            help='Milliseconds added to every query, to model the round trip to a remote database'
+        )
+        parser.add_argument(
+            '--cached',
+            action='store_true',
+            help='Keep the dashboard cache enabled, instead of computing every request'
+        )
+
+    def handle(self, *args, **options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by('id').first()
+        if user is None:
+            raise CommandError('No user to authenticate as; create one or pass --username')
+        self.token = str(RefreshToken.for_user(user).access_token)
+
+        if options['db_latency']:
+            delay = options['db_latency'] / 1000
+
+            def add_latency(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            def install_latency(sender, connection, **kwargs):
+                # Fires again whenever a thread's connection reconnects
+                if add_latency not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(add_latency)
+
+            # Every connection opened from here on, in any thread
+            connection_created.connect(install_latency, weak=False)
+
+        settings = {}
+        if not options['cached']:
+            settings['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        with override_settings(**settings):
+            for name, sync_path, async_path in ENDPOINTS:
+                for server, path, send in (('wsgi', sync_path, self.wsgi_sender()),
+                                           ('asgi', async_path, self.asgi_request)):
+                    latencies, errors, elapsed = asyncio.run(
+                        self.run_clients(send, path, options['requests'], options['concurrency'])
+                    )
+                    self.report(f'{name} {server}', latencies, errors, elapsed)
+
+    async def run_clients(self, send, path, total, concurrency):
+        """Keep ``concurrency`` requests in flight until ``total`` have completed."""
+        queue = iter(range(total))
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                status_code = await send(path)
+                latencies.append(time.perf_counter() - start)
+                if status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    def wsgi_sender(self):
+        """
+        Send requests to a single synchronous worker, like a WSGI server
+        process with one thread. Requests queue while the worker is busy.
+        """
+        worker = ThreadPoolExecutor(max_workers=1)
+
+        def handle(path):
+            environ = {}
+            setup_testing_defaults(environ)
+            environ['PATH_INFO'] = path
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
+            status = []
+            body = wsgi_application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+            try:
+                b''.join(body)
+            finally:
+                body.close()
+            return int(status[0].split()[0])
+
+        async def send(path):
+            return await asyncio.get_running_loop().run_in_executor(worker, handle, path)
+        return send
+
+    async def asgi_request(self, path):
+        """Send a request to the ASGI application on the running event loop."""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'root_path': '',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'authorization', f'Bearer {self.token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        received = False
+        disconnect = asyncio.Event()
+        status = []
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                disconnect.set()
+
+        await asgi_application(scope, receive, send)
+        return status[0]
+
+    def report(self, label, latencies, errors, elapsed):
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{label}: p50 {percentiles[49] * 1000:.1f}ms, p99 {percentiles[98] * 1000:.1f}ms, '
+            f'{len(latencies) / elapsed:.0f} requests/sec per worker, {errors} errors'
+        )
@@ -1,23 +1,175 @@
-from django.core.management.base import BaseCommand
+from contextlib import contextmanager
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
 from django.utils import timezone
-from api.models import InventoryItem, Shipment, ShipmentItem
-from api.models.enums import ShipmentStatus, ShipmentType
+from api.dashboard import invalidate_dashboard
+from api.models import Category, InventoryItem, InventoryValuation, Shipment, ShipmentItem, StockMovement, Tombstone
+from api.models.enums import ShipmentStatus, ShipmentType, StockMovementType
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 import random
+import time
 from datetime import timedelta
 from decimal import Decimal
 
+# Realistic inventory items; larger runs cycle through them as numbered variants
+INVENTORY_DATA = [
+    # Electronics
+    {"name": "Dell Latitude Laptop", "category": "Electronics", "min_stock": 5, "price": 999.99},
+    {"name": "HP LaserJet Printer", "category": "Electronics", "min_stock": 3, "price": 299.99},
+    {"name": "iPad Pro 12.9", "category": "Electronics", "min_stock": 10, "price": 1099.99},
+    {"name": "Logitech Wireless Mouse", "category": "Electronics", "min_stock": 20, "price": 29.99},
+    {"name": "Samsung 27\" Monitor", "category": "Electronics", "min_stock": 8, "price": 249.99},
+
+    # Office Supplies
+    {"name": "Premium Copy Paper", "category": "Office Supplies", "min_stock": 50, "price": 7.99},
+    {"name": "Stapler Set", "category": "Office Supplies", "min_stock": 15, "price": 12.99},
+    {"name": "Sticky Notes Pack", "category": "Office Supplies", "min_stock": 30, "price": 3.99},
+    {"name": "Ballpoint Pens Box", "category": "Office Supplies", "min_stock": 40, "price": 15.99},
+    {"name": "File Folders Bundle", "category": "Office Supplies", "min_stock": 25, "price": 19.99},
+
+    # Furniture
+    {"name": "Ergonomic Office Chair", "category": "Furniture", "min_stock": 10, "price": 299.99},
+    {"name": "Standing Desk", "category": "Furniture", "min_stock": 5, "price": 499.99},
+    {"name": "Filing Cabinet", "category": "Furniture", "min_stock": 8, "price": 199.99},
+    {"name": "Conference Table", "category": "Furniture", "min_stock": 3, "price": 899.99},
+    {"name": "Bookshelf", "category": "Furniture", "min_stock": 6, "price": 149.99},
+
+    # Storage
+    {"name": "Storage Bin Large", "category": "Storage", "min_stock": 15, "price": 29.99},
+    {"name": "Plastic Storage Box", "category": "Storage", "min_stock": 20, "price": 19.99},
+    {"name": "Metal Shelving Unit", "category": "Storage", "min_stock": 10, "price": 129.99},
+    {"name": "Tool Cabinet", "category": "Storage", "min_stock": 5, "price": 299.99},
+    {"name": "Utility Cart", "category": "Storage", "min_stock": 8, "price": 149.99}
+]
+
+# Warehouse locations
+LOCATIONS = [
+    "Main Warehouse A1",
+    "Main Warehouse B2",
+    "Electronics Storage C3",
+    "Furniture Showroom D4",
+    "Office Supplies Store E5"
+]
+
+# Carriers for shipments
+CARRIERS = ["UPS", "FedEx", "DHL", "USPS", "Amazon"]
+
+# Share of items generated below their minimum stock
+LOW_STOCK_RATE = 0.05
+
+# Tables emptied before generating, children first
+GENERATED_MODELS = [StockMovement, ShipmentItem, Shipment, Tombstone, InventoryValuation, Category, InventoryItem]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Store the created_at and updated_at values given to bulk_create(),
+    which auto_now and auto_now_add would replace with the current time.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
 class Command(BaseCommand):
-    help = 'Populates the database with sample inventory and shipment data'
+    help = (
+        'Replaces inventory and shipment data with generated data, from a few sample rows '
+        'up to millions. The same --seed always generates the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=20,
+            help='Inventory items to create (default: 20)'
+        )
+        parser.add_argument(
+            '--shipments',
+            type=int,
+            default=10,
+            help='Shipments to create (default: 10)'
+        )
+        parser.add_argument(
+            '--lines-per-shipment',
+            type=int,
+            default=3,
+            help='Average number of items in a shipment (default: 3)'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=5,
+            help='Staff users, besides admin, that rows are created and updated by (default: 5)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed; the same seed generates the same data (default: random)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help='Days of shipment history to spread shipments over (default: 180)'
+        )
+        parser.add_argument(
+            '--hot-items',
+            type=float,
+            default=0.05,
+            help='Fraction of items that are best sellers (default: 0.05)'
+        )
+        parser.add_argument(
+            '--hot-share',
+            type=float,
+            default=0.5,
+            help='Fraction of shipment lines that go to best sellers (default: 0.5)'
+        )
+        parser.add_argument(
+            '--cancel-rate',
+            type=float,
+            default=0.05,
+            help='Fraction of completed shipments that were cancelled (default: 0.05)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows inserted per query; each batch is committed on its own (default: 5000)'
+        )
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Starting database population...')
+    def handle(self, *args, **options):
+        for name in ('items', 'shipments', 'lines_per_shipment', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        for name in ('users', 'days'):
+            if options[name] < 0:
+                raise CommandError(f"--{name} must not be negative")
+        for name in ('hot_items', 'hot_share', 'cancel_rate'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be between 0 and 1")
+
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(seed)
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.stdout.write(f'Starting database population with seed {seed}...')
+        started = time.perf_counter()
 
-        # Clear existing data
         self.stdout.write('Clearing existing data...')
-        ShipmentItem.objects.all().delete()
-        Shipment.objects.all().delete()
-        InventoryItem.objects.all().delete()
+        self.clear()
         self.stdout.write('Existing data cleared successfully')
 
         # Ensure we have at least one admin user
@@ -26,116 +178,184 @@ class Command(BaseCommand):
             is_staff=True,
             is_superuser=True
         )
+        user_ids = [admin_user.pk] + self.create_users(options['users'])
+
+        with explicit_timestamps(InventoryItem, Shipment):
+            phase = time.perf_counter()
+            items = self.create_items(options['items'], user_ids, options['days'])
+            self.report_rate('inventory items and opening balances', len(items[0]) * 2, phase)
 
-        # Define some realistic inventory items
-        inventory_data = [
-            # Electronics
-            {"name": "Dell Latitude Laptop", "category": "Electronics", "min_stock": 5, "price": 999.99},
-            {"name": "HP LaserJet Printer", "category": "Electronics", "min_stock": 3, "price": 299.99},
-            {"name": "iPad Pro 12.9", "category": "Electronics", "min_stock": 10, "price": 1099.99},
-            {"name": "Logitech Wireless Mouse", "category": "Electronics", "min_stock": 20, "price": 29.99},
-            {"name": "Samsung 27\" Monitor", "category": "Electronics", "min_stock": 8, "price": 249.99},
-            
-            # Office Supplies
-            {"name": "Premium Copy Paper", "category": "Office Supplies", "min_stock": 50, "price": 7.99},
-            {"name": "Stapler Set", "category": "Office Supplies", "min_stock": 15, "price": 12.99},
-            {"name": "Sticky Notes Pack", "category": "Office Supplies", "min_stock": 30, "price": 3.99},
-            {"name": "Ballpoint Pens Box", "category": "Office Supplies", "min_stock": 40, "price": 15.99},
-            {"name": "File Folders Bundle", "category": "Office Supplies", "min_stock": 25, "price": 19.99},
-            
-            # Furniture
-            {"name": "Ergonomic Office Chair", "category": "Furniture", "min_stock": 10, "price": 299.99},
-            {"name": "Standing Desk", "category": "Furniture", "min_stock": 5, "price": 499.99},
-            {"name": "Filing Cabinet", "category": "Furniture", "min_stock": 8, "price": 199.99},
-            {"name": "Conference Table", "category": "Furniture", "min_stock": 3, "price": 899.99},
-            {"name": "Bookshelf", "category": "Furniture", "min_stock": 6, "price": 149.99},
-            
-            # Storage
-            {"name": "Storage Bin Large", "category": "Storage", "min_stock": 15, "price": 29.99},
-            {"name": "Plastic Storage Box", "category": "Storage", "min_stock": 20, "price": 19.99},
-            {"name": "Metal Shelving Unit", "category": "Storage", "min_stock": 10, "price": 129.99},
-            {"name": "Tool Cabinet", "category": "Storage", "min_stock": 5, "price": 299.99},
-            {"name": "Utility Cart", "category": "Storage", "min_stock": 8, "price": 149.99}
-        ]
-
-        # Warehouse locations
-        locations = [
-            "Main Warehouse A1",
-            "Main Warehouse B2",
-            "Electronics Storage C3",
-            "Furniture Showroom D4",
-            "Office Supplies Store E5"
-        ]
-
-        # Carriers for shipments
-        carriers = ["UPS", "FedEx", "DHL", "USPS", "Amazon"]
-
-        # Create inventory items
-        inventory_items = []
-        # Randomly select one item to be in low stock
-        low_stock_item_idx = random.randint(0, len(inventory_data) - 1)
-        
-        for idx, item_data in enumerate(inventory_data, 1):
-            # Generate unique SKU: Category prefix + 3-digit sequence + random 2-digit suffix
-            category_prefix = item_data['category'][:3].upper()
-            random_suffix = random.randint(10, 99)
-            sku = f"{category_prefix}{idx:03d}{random_suffix}"
-            
-            # If this is the selected low stock item, set quantity below minimum_stock
-            if idx - 1 == low_stock_item_idx:
-                quantity = random.randint(1, item_data['min_stock'] - 1)
-                self.stdout.write(f'Setting low stock for {item_data["name"]}: {quantity} (min: {item_data["min_stock"]})')
-            else:
-                quantity = random.randint(item_data['min_stock'], item_data['min_stock'] * 3)
-            
-            item = InventoryItem.objects.create(
-                name=item_data['name'],
-                sku=sku,
-                description=f"High-quality {item_data['name'].lower()} for professional use",
-                quantity=quantity,
-                location=random.choice(locations),
-                category=item_data['category'],
-                minimum_stock=item_data['min_stock'],
-                created_by=admin_user,
-                last_updated_by=admin_user
-            )
-            inventory_items.append(item)
-
-        # Create shipments
-        for i in range(1, 11):  # Create 10 shipments
-            created_at = timezone.now() - timedelta(days=random.randint(0, 30))
-            estimated_arrival = created_at + timedelta(days=random.randint(2, 7))
-            actual_arrival = None
-            if random.random() > 0.3:  # 70% chance of having actual arrival
-                actual_arrival = estimated_arrival + timedelta(days=random.randint(-1, 2))
-            
-            shipment = Shipment.objects.create(
-                type=random.choice([t[0] for t in ShipmentType.choices()]),
-                status=random.choice([s[0] for s in ShipmentStatus.choices()]),
-                tracking_number=f"TRK{i:06d}",
-                carrier=random.choice(carriers),
-                estimated_arrival=estimated_arrival,
-                actual_arrival=actual_arrival,
-                created_by=admin_user,
-                updated_by=admin_user
-            )
-
-            # Add 1-5 items to each shipment
-            num_items = random.randint(1, 5)
-            selected_items = random.sample(inventory_items, num_items)
-            
-            for item in selected_items:
-                # Find the matching item data to get the price
-                item_data = next(d for d in inventory_data if d['name'] == item.name)
-                ShipmentItem.objects.create(
-                    shipment=shipment,
-                    item=item,
-                    quantity=random.randint(1, min(5, item.quantity)),
-                    unit_price=Decimal(str(item_data['price']))
-                )
+            phase = time.perf_counter()
+            shipments, lines = self.create_shipments(options, items, user_ids)
+            self.report_rate('shipments and shipment items', shipments + lines, phase)
 
+        # Bulk inserts skip the per-row bookkeeping, so recompute it once
+        Category.refresh()
+        InventoryValuation.snapshot(timezone.localdate())
+        invalidate_dashboard()
+
+        elapsed = time.perf_counter() - started
+        total = len(items[0]) * 2 + shipments + lines
         self.stdout.write(self.style.SUCCESS('Successfully populated database with sample data'))
         self.stdout.write(f'Created:')
-        self.stdout.write(f'- {len(inventory_items)} inventory items')
-        self.stdout.write(f'- {Shipment.objects.count()} shipments')
-        self.stdout.write(f'- {ShipmentItem.objects.count()} shipment items') 
\ No newline at end of file
+        self.stdout.write(f'- {len(items[0])} inventory items')
+        self.stdout.write(f'- {shipments} shipments')
+        self.stdout.write(f'- {lines} shipment items')
+        self.stdout.write(f'- {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/sec)')
+
+    def clear(self):
+        """Empty the generated tables with one statement each, skipping per-row deletes and signals."""
+        tables = [model._meta.db_table for model in GENERATED_MODELS]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+
+    def report_rate(self, label, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Created {rows} rows of {label} in {elapsed:.1f}s ({rows / elapsed:.0f} rows/sec)')
+
+    def create_users(self, count):
+        """Create staff users ``staff0001`` onwards, reusing those that already exist."""
+        usernames = [f'staff{index:04d}' for index in range(1, count + 1)]
+        # Generated users cannot log in, which also spares hashing a password per user
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=username, is_staff=True, password=password) for username in usernames],
+            ignore_conflicts=True
+        )
+        return list(User.objects.filter(username__in=usernames).order_by('username').values_list('pk', flat=True))
+
+    def create_items(self, count, user_ids, days):
+        """
+        Create items with their opening ledger entries.
+
+        Returns ``(item_ids, prices)`` in creation order.
+        """
+        rng = self.rng
+        item_ids, prices = [], []
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for index in range(start, min(start + self.batch_size, count)):
+                item_data = INVENTORY_DATA[index % len(INVENTORY_DATA)]
+                variant = index // len(INVENTORY_DATA)
+                minimum_stock = item_data['min_stock']
+                if rng.random() < LOW_STOCK_RATE:
+                    quantity = rng.randint(0, minimum_stock - 1)
+                else:
+                    quantity = rng.randint(minimum_stock, minimum_stock * 3)
+                created_at = self.now - timedelta(days=days + rng.uniform(0, 30))
+                user_id = rng.choice(user_ids)
+                batch.append(InventoryItem(
+                    name=f"{item_data['name']} {variant + 1}" if variant else item_data['name'],
+                    # Category prefix + sequence
+                    sku=f"{item_data['category'][:3].upper()}{index + 1:07d}",
+                    description=f"High-quality {item_data['name'].lower()} for professional use",
+                    quantity=quantity,
+                    location=rng.choice(LOCATIONS),
+                    category=item_data['category'],
+                    minimum_stock=minimum_stock,
+                    unit_price=(Decimal(item_data['price']) * Decimal(rng.uniform(0.8, 1.25))).quantize(Decimal('0.01')),
+                    created_at=created_at,
+                    updated_at=self.now - timedelta(days=rng.uniform(0, days)),
+                    created_by_id=user_id,
+                    last_updated_by_id=user_id
+                ))
+
+            with transaction.atomic():
+                InventoryItem.objects.bulk_create(batch)
+                StockMovement.objects.bulk_create([
+                    StockMovement(
+                        item_id=item.pk,
+                        type=StockMovementType.INITIAL.value,
+                        quantity_change=item.quantity,
+                        balance=item.quantity,
+                        occurred_at=item.created_at,
+                        created_by_id=item.created_by_id
+                    )
+                    for item in batch
+                ])
+            item_ids.extend(item.pk for item in batch)
+            prices.extend(item.unit_price for item in batch)
+        return item_ids, prices
+
+    def create_shipments(self, options, items, user_ids):
+        """
+        Create shipments and their lines, returning how many of each were created.
+
+        Shipments are spread over the last ``--days`` days and their status
+        follows from their age: those due to have arrived are delivered or
+        cancelled, recent ones are still pending or in transit. Lines pick
+        the hot items ``--hot-share`` of the time.
+        """
+        rng = self.rng
+        item_ids, prices = items
+        if not item_ids:
+            return 0, 0
+        hot_indexes = rng.sample(range(len(item_ids)), max(1, int(len(item_ids) * options['hot_items'])))
+        hot = set(hot_indexes)
+        max_lines = min(len(item_ids), options['lines_per_shipment'] * 2 - 1)
+        count = options['shipments']
+        shipments_created, lines_created = 0, 0
+
+        for start in range(0, count, self.batch_size):
+            shipments, shipment_lines = [], []
+            for index in range(start, min(start + self.batch_size, count)):
+                created_at = self.now - timedelta(days=rng.uniform(0, options['days']))
+                estimated_arrival = created_at + timedelta(hours=rng.uniform(48, 168))
+                actual_arrival = None
+                if estimated_arrival <= self.now:
+                    if rng.random() < options['cancel_rate']:
+                        status = ShipmentStatus.CANCELLED
+                        updated_at = created_at + (estimated_arrival - created_at) * rng.random()
+                    else:
+                        status = ShipmentStatus.DELIVERED
+                        actual_arrival = min(estimated_arrival + timedelta(hours=rng.uniform(-24, 48)), self.now)
+                        updated_at = actual_arrival
+                else:
+                    # Shipments leave within a day or so of being booked
+                    in_transit = self.now - created_at > timedelta(days=1) and rng.random() < 0.8
+                    status = ShipmentStatus.IN_TRANSIT if in_transit else ShipmentStatus.PENDING
+                    updated_at = created_at + (self.now - created_at) * rng.random()
+
+                shipments.append(Shipment(
+                    type=ShipmentType.INCOMING.value if rng.random() < 0.5 else ShipmentType.OUTGOING.value,
+                    status=status.value,
+                    tracking_number=f"TRK{index + 1:09d}",
+                    carrier=rng.choice(CARRIERS),
+                    estimated_arrival=estimated_arrival,
+                    actual_arrival=actual_arrival,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    created_by_id=rng.choice(user_ids),
+                    updated_by_id=rng.choice(user_ids)
+                ))
+
+                # Distinct items per shipment
+                picked = set()
+                hot_left = len(hot_indexes)
+                num_items = rng.randint(1, max_lines)
+                while len(picked) < num_items:
+                    # Once every hot item is in the shipment, only the others are left
+                    if hot_left and rng.random() < options['hot_share']:
+                        item_index = hot_indexes[rng.randrange(len(hot_indexes))]
+                    else:
+                        item_index = rng.randrange(len(item_ids))
+                    if item_index not in picked:
+                        picked.add(item_index)
+                        hot_left -= item_index in hot
+                shipment_lines.append([(item_index, rng.randint(1, 20)) for item_index in sorted(picked)])
+
+            with transaction.atomic():
+                Shipment.objects.bulk_create(shipments)
+                line_objects = [
+                    ShipmentItem(
+                        shipment_id=shipment.pk,
+                        item_id=item_ids[item_index],
+                        quantity=quantity,
+                        unit_price=prices[item_index]
+                    )
+                    for shipment, lines in zip(shipments, shipment_lines)
+                    for item_index, quantity in lines
+                ]
+                ShipmentItem.objects.bulk_create(line_objects, batch_size=self.batch_size)
+            shipments_created += len(shipments)
+            lines_created += len(line_objects)
+        return shipments_created, lines_created
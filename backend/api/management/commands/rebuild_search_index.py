@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.models import InventoryItem
+from api import search
+
+class Command(BaseCommand):
+    help = 'Rebuilds the inventory full-text search index'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding inventory search index...')
+
+        backend = search.rebuild_index()
+        if backend is None:
+            self.stdout.write(self.style.WARNING('The active database has no full-text index, nothing to rebuild'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {backend} search index for {InventoryItem.objects.count()} inventory items'
+        ))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.models import Category
+
+class Command(BaseCommand):
+    help = 'Recounts the items in every category from the inventory table'
+
+    def handle(self, *args, **options):
+        rows = Category.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {rows} categories'))
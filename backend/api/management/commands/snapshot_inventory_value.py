@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from api.models import InventoryValuation
+from datetime import datetime, time, timedelta
+
+class Command(BaseCommand):
+    help = 'Writes the daily per-category inventory valuation roll-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Day to snapshot as YYYY-MM-DD (default: today, from current quantities)'
+        )
+        parser.add_argument(
+            '--backfill-days',
+            type=int,
+            default=0,
+            help='Also rebuild this many days before --date from the stock movement ledger'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        day = today
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError(f"Invalid date: {options['date']}")
+
+        days = [day - timedelta(days=offset) for offset in range(options['backfill_days'], -1, -1)]
+
+        for snapshot_day in days:
+            if snapshot_day == today:
+                # Today's balances are exactly the current quantities
+                rows = InventoryValuation.snapshot(snapshot_day)
+            else:
+                day_end = timezone.make_aware(datetime.combine(snapshot_day + timedelta(days=1), time.min))
+                rows = InventoryValuation.snapshot(snapshot_day, day_end=day_end)
+            self.stdout.write(f'{snapshot_day}: {rows} categories')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote inventory valuation for {len(days)} day(s)'))
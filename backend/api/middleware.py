@@ -0,0 +1,150 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Parse an ``Accept-Encoding`` header into ``{coding: qvalue}``."""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def negotiate_encoding(header, available):
+    """
+    Pick the coding of ``available`` the client prefers, or None.
+
+    ``available`` is in server preference order, which breaks ties.
+    Codings the header does not list fall back to its ``*`` entry.
+    """
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for coding in available:
+        quality = codings.get(coding, codings.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class StreamCompressor:
+    """
+    Incremental brotli or gzip compressor.
+
+    Output is not flushed per chunk, so small chunks such as export rows
+    still compress as well as a whole body would.
+    """
+
+    def __init__(self, encoding, brotli_quality):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self.compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self.compressor.process(chunk)
+        return self.compressor.compress(chunk)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress API responses with brotli or gzip, as negotiated through
+    the request's ``Accept-Encoding``.
+
+    Only ``RESPONSE_COMPRESSION_TYPES`` are compressed, so HTML pages and
+    event streams are left alone. Bodies smaller than
+    ``RESPONSE_COMPRESSION_MIN_SIZE`` are sent as they are, since
+    compressing them saves little and can even make them larger.
+    Streaming responses such as exports are compressed chunk by chunk.
+    Brotli is offered only when the brotli package is installed.
+    """
+    # Random gzip header padding against BREACH, as in GZipMiddleware
+    max_random_bytes = 100
+    # Brotli's default of 11 is far too slow for responses built per request
+    brotli_quality = 5
+
+    @staticmethod
+    def get_encodings():
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in settings.RESPONSE_COMPRESSION_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        # The body depends on Accept-Encoding from here on
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.get_encodings())
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response, encoding)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag must not be shared by different encodings
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, response, encoding):
+        compressor = StreamCompressor(encoding, self.brotli_quality)
+        content = response.streaming_content
+
+        if response.is_async:
+            async def compressed():
+                async for chunk in content:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+        else:
+            def compressed():
+                for chunk in content:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+        return compressed()
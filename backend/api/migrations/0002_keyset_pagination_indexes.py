@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(fields=["name", "id"], name="inventory_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(fields=["-created_at", "id"], name="shipment_created_id_idx"),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_inventoryitem_fts USING fts5(
+        name, sku, description,
+        content="api_inventoryitem", content_rowid="id",
+        tokenize="unicode61 remove_diacritics 2", prefix="2 3 4"
+    )
+    """,
+    """
+    CREATE TRIGGER api_inventoryitem_fts_ai AFTER INSERT ON api_inventoryitem BEGIN
+        INSERT INTO api_inventoryitem_fts(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER api_inventoryitem_fts_ad AFTER DELETE ON api_inventoryitem BEGIN
+        INSERT INTO api_inventoryitem_fts(api_inventoryitem_fts, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER api_inventoryitem_fts_au AFTER UPDATE OF name, sku, description ON api_inventoryitem BEGIN
+        INSERT INTO api_inventoryitem_fts(api_inventoryitem_fts, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+        INSERT INTO api_inventoryitem_fts(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    "INSERT INTO api_inventoryitem_fts(api_inventoryitem_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_inventoryitem_fts_au",
+    "DROP TRIGGER IF EXISTS api_inventoryitem_fts_ad",
+    "DROP TRIGGER IF EXISTS api_inventoryitem_fts_ai",
+    "DROP TABLE IF EXISTS api_inventoryitem_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE api_inventoryitem ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX inventory_search_gin_idx ON api_inventoryitem USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS inventory_search_gin_idx",
+    "ALTER TABLE api_inventoryitem DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search index for inventory items.
+
+    SQLite gets an external-content FTS5 table maintained by triggers and
+    PostgreSQL gets a generated tsvector column with a GIN index. Both are
+    kept in sync by the database itself, so bulk_create, queryset updates
+    and deletes never leave the index stale.
+    """
+
+    dependencies = [
+        ("api", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run_statements({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 12:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    """Seed the ledger with each existing item's current quantity."""
+    InventoryItem = apps.get_model("api", "InventoryItem")
+    StockMovement = apps.get_model("api", "StockMovement")
+    now = django.utils.timezone.now()
+
+    batch = []
+    for item_id, quantity in InventoryItem.objects.values_list("id", "quantity").iterator(chunk_size=2000):
+        batch.append(StockMovement(
+            item_id=item_id,
+            type="INITIAL",
+            quantity_change=quantity,
+            balance=quantity,
+            occurred_at=now,
+        ))
+        if len(batch) >= 2000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_inventory_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockMovement",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("type", models.CharField(choices=[("INITIAL", "INITIAL"), ("DELIVERY", "DELIVERY"), ("ADJUSTMENT", "ADJUSTMENT")], max_length=10)),
+                ("quantity_change", models.IntegerField()),
+                ("balance", models.IntegerField()),
+                ("occurred_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("created_by", models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="stock_movements", to=settings.AUTH_USER_MODEL)),
+                ("item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="stock_movements", to="api.inventoryitem")),
+                ("shipment", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="stock_movements", to="api.shipment")),
+            ],
+            options={
+                "ordering": ["occurred_at", "id"],
+                "indexes": [models.Index(fields=["item", "occurred_at"], name="stock_item_occurred_idx")],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
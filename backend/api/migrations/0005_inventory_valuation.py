@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 12:46
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+
+def snapshot_today(apps, schema_editor):
+    """Seed today's roll-up from current quantities, which later changes adjust."""
+    InventoryItem = apps.get_model("api", "InventoryItem")
+    InventoryValuation = apps.get_model("api", "InventoryValuation")
+    value = ExpressionWrapper(F("quantity") * F("unit_price"), output_field=DecimalField(max_digits=18, decimal_places=2))
+    totals = InventoryItem.objects.order_by().values("category").annotate(
+        item_count=Count("id"), total_quantity=Sum("quantity"), total_value=Sum(value)
+    )
+    today = timezone.localdate()
+    InventoryValuation.objects.bulk_create([InventoryValuation(date=today, **row) for row in totals])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_stock_movement_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventoryitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.CreateModel(
+            name="InventoryValuation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("category", models.CharField(max_length=100)),
+                ("item_count", models.IntegerField(default=0)),
+                ("total_quantity", models.BigIntegerField(default=0)),
+                ("total_value", models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=18)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["date", "category"],
+                "constraints": [models.UniqueConstraint(fields=("date", "category"), name="valuation_date_category_uniq")],
+            },
+        ),
+        migrations.RunPython(snapshot_today, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_inventory_valuation"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(fields=["category", "name", "id"], name="inventory_category_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(fields=["-quantity"], name="inventory_quantity_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(condition=models.Q(("quantity__lte", models.F("minimum_stock"))), fields=["name", "id"], name="inventory_low_stock_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(fields=["status", "-created_at", "id"], name="shipment_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(fields=["type", "created_at"], name="shipment_type_created_idx"),
+        ),
+    ]
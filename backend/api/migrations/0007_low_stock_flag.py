@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_query_pattern_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="inventoryitem",
+            name="inventory_low_stock_idx",
+        ),
+        migrations.AddField(
+            model_name="inventoryitem",
+            name="is_low_stock",
+            field=models.GeneratedField(db_persist=True, expression=models.Q(("quantity__lte", models.F("minimum_stock"))), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(condition=models.Q(("is_low_stock", True)), fields=["name", "id"], name="inventory_low_stock_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(condition=models.Q(("is_low_stock", True)), fields=["category"], name="inventory_low_stock_cat_idx"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 13:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_items(apps, schema_editor):
+    """Fill the registry from the categories already used by items."""
+    InventoryItem = apps.get_model("api", "InventoryItem")
+    Category = apps.get_model("api", "Category")
+    counts = InventoryItem.objects.order_by().values_list("category").annotate(count=Count("id"))
+    Category.objects.bulk_create([Category(name=name, item_count=count) for name, count in counts])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_low_stock_flag"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Category",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("item_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "categories",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.RunPython(count_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 13:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_category_registry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(fields=["updated_at"], name="inventory_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(fields=["updated_at"], name="shipment_updated_idx"),
+        ),
+    ]
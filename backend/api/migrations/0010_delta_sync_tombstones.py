@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 13:24
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_updated_at_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "ordering": ["deleted_at", "id"],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="inventoryitem",
+            name="inventory_updated_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="shipment",
+            name="shipment_updated_idx",
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(fields=["updated_at", "id"], name="shipment_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["model", "deleted_at", "id"], name="tombstone_model_deleted_idx"),
+        ),
+    ]
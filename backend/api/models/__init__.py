@@ -1,9 +1,17 @@
 from .inventory_item import InventoryItem
 from .shipment import Shipment
 from .shipment_item import ShipmentItem
+from .stock_movement import StockMovement
+from .inventory_valuation import InventoryValuation
+from .category import Category
+from .tombstone import Tombstone
 
 __all__ = [
     'InventoryItem',
     'Shipment',
     'ShipmentItem',
+    'StockMovement',
+    'InventoryValuation',
+    'Category',
+    'Tombstone',
 ] 
\ No newline at end of file
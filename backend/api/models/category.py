@@ -0,0 +1,74 @@
+from django.db import models
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+from .inventory_item import InventoryItem
+
+class Category(models.Model):
+    """
+    Registry of the categories in use, with the number of items in each.
+
+    InventoryItem.save() and item deletes keep ``item_count`` current, and
+    bulk writes call apply_changes() themselves, so listing categories never
+    scans the inventory table. The ``refresh_categories`` command recounts
+    them from scratch.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    item_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.item_count})"
+
+    @classmethod
+    def apply_changes(cls, changes):
+        """
+        Adjust item counts by a ``{category: delta}`` mapping.
+
+        All categories are adjusted in one UPDATE computed by the database,
+        and counts are clamped at zero rather than failing the write.
+        Categories without a row yet are counted from scratch instead,
+        which already reflects the change.
+        """
+        changes = {name: delta for name, delta in changes.items() if delta}
+        if not changes:
+            return
+
+        delta = Case(
+            *[When(name=name, then=Value(change)) for name, change in changes.items()],
+            output_field=models.IntegerField()
+        )
+        updated = cls.objects.filter(name__in=changes).update(
+            item_count=Greatest(F('item_count') + delta, Value(0))
+        )
+        if updated < len(changes):
+            existing = set(cls.objects.filter(name__in=changes).values_list('name', flat=True))
+            cls.refresh([name for name in changes if name not in existing])
+
+    @classmethod
+    def refresh(cls, names=None):
+        """
+        Recount items per category from the inventory table.
+
+        Only the given category names are recounted when ``names`` is set.
+        Returns the number of registry rows written.
+        """
+        items = InventoryItem.objects.order_by()
+        if names is not None:
+            items = items.filter(category__in=names)
+
+        counts = dict(items.values_list('category').annotate(count=Count('id')))
+        for name in names or []:
+            counts.setdefault(name, 0)
+
+        cls.objects.bulk_create(
+            [cls(name=name, item_count=count) for name, count in counts.items()],
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['item_count']
+        )
+        if names is None:
+            cls.objects.exclude(name__in=counts).update(item_count=0)
+        return len(counts)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
\ No newline at end of file
@@ -16,4 +16,13 @@ class ShipmentStatus(Enum):
 
     @classmethod
     def choices(cls):
-        return [(e.value, e.name) for e in cls] 
\ No newline at end of file
+        return [(e.value, e.name) for e in cls] 
+
+class StockMovementType(Enum):
+    INITIAL = 'INITIAL'
+    DELIVERY = 'DELIVERY'
+    ADJUSTMENT = 'ADJUSTMENT'
+
+    @classmethod
+    def choices(cls):
+        return [(e.value, e.name) for e in cls]
@@ -1,6 +1,25 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from ..events import item_changed
+
+# Fields save() compares against their stored values
+TRACKED_FIELDS = ('category', 'quantity', 'unit_price', 'is_low_stock')
+# Fields an item's category counts and valuation depend on
+VALUED_FIELDS = ('category', 'quantity', 'unit_price')
+
+# Removals of the items deleted inside grouped_deletes() on this thread
+_pending = threading.local()
+
+class InventoryItemQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the items, updating their categories' counts and valuations in grouped UPDATEs."""
+        with transaction.atomic(using=self.db), grouped_deletes():
+            return super().delete()
 
 class InventoryItem(models.Model):
     name = models.CharField(max_length=255)
@@ -10,16 +29,119 @@ class InventoryItem(models.Model):
     location = models.CharField(max_length=100)
     category = models.CharField(max_length=100)
     minimum_stock = models.IntegerField(validators=[MinValueValidator(0)])
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)])
+    # Computed and stored by the database on every write, so deliveries,
+    # imports and queryset updates can never leave it stale
+    is_low_stock = models.GeneratedField(
+        expression=models.Q(quantity__lte=models.F('minimum_stock')),
+        output_field=models.BooleanField(),
+        db_persist=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_items')
     last_updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='updated_items')
 
+    objects = InventoryItemQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.sku})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so save() can tell what changed
+        instance.remember_loaded(TRACKED_FIELDS)
+        return instance
+
+    def remember_loaded(self, fields):
+        for field in fields:
+            setattr(self, f'_loaded_{field}', self.__dict__.get(field))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Also runs when a deferred field is first read
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.remember_loaded(TRACKED_FIELDS if fields is None else set(TRACKED_FIELDS).intersection(fields))
+
+    def save(self, *args, **kwargs):
+        from .category import Category
+        from .inventory_valuation import InventoryValuation
+
+        adding = self._state.adding
+        previous = {field: getattr(self, f'_loaded_{field}', None) for field in TRACKED_FIELDS}
+        if not adding and any(previous[field] is None for field in VALUED_FIELDS):
+            # Loaded without some of them, so read the stored values to tell what changed
+            stored = InventoryItem.objects.filter(pk=self.pk).values(*VALUED_FIELDS).first() or {}
+            previous.update({field: stored.get(field) for field in VALUED_FIELDS if previous[field] is None})
+        super().save(*args, **kwargs)
+        # Mirror the value the database just computed, instead of reloading it
+        self.is_low_stock = self.quantity <= self.minimum_stock
+
+        if adding:
+            item_changed(self.pk, self.quantity, self.quantity, self.is_low_stock, False)
+        elif previous['quantity'] is not None and previous['is_low_stock'] is not None:
+            item_changed(
+                self.pk, self.quantity, self.quantity - previous['quantity'], self.is_low_stock, previous['is_low_stock']
+            )
+
+        # Move the item's count and value in today's roll-up from what was
+        # stored to what is stored now
+        today = timezone.localdate()
+        value = self.quantity * Decimal(self.unit_price)
+        if adding:
+            Category.apply_changes({self.category: 1})
+            InventoryValuation.apply_change(today, self.category, self.quantity, value, item_count_change=1)
+        elif None not in (previous['category'], previous['quantity'], previous['unit_price']):
+            previous_value = previous['quantity'] * previous['unit_price']
+            if previous['category'] != self.category:
+                Category.apply_changes({previous['category']: -1, self.category: 1})
+                InventoryValuation.apply_change(
+                    today, previous['category'], -previous['quantity'], -previous_value, item_count_change=-1
+                )
+                InventoryValuation.apply_change(today, self.category, self.quantity, value, item_count_change=1)
+            elif self.quantity != previous['quantity'] or value != previous_value:
+                InventoryValuation.apply_change(
+                    today, self.category, self.quantity - previous['quantity'], value - previous_value
+                )
+        self.remember_loaded(TRACKED_FIELDS)
+
+    @classmethod
+    def low_stock_counts(cls):
+        """Count low stock items per category, reading only the partial index."""
+        counts = cls.objects.filter(is_low_stock=True).order_by().values('category').annotate(
+            count=models.Count('id')
+        )
+        by_category = {row['category']: row['count'] for row in counts}
+        return {
+            'total': sum(by_category.values()),
+            'categories': dict(sorted(by_category.items())),
+        }
+
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Backs keyset pagination on (name, id)
+            models.Index(fields=['name', 'id'], name='inventory_name_id_idx'),
+            # MAX(updated_at) for conditional GET, and delta sync on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='inventory_updated_id_idx'),
+            # Category filter with the default (name, id) ordering
+            models.Index(fields=['category', 'name', 'id'], name='inventory_category_name_idx'),
+            # Top items by quantity on the dashboard
+            models.Index(fields=['-quantity'], name='inventory_quantity_idx'),
+            # Low stock items in (name, id) order, and low stock counts per
+            # category. Partial, so they only hold the few rows at or below
+            # their minimum; backends without partial index support skip them.
+            models.Index(
+                fields=['name', 'id'],
+                condition=models.Q(is_low_stock=True),
+                name='inventory_low_stock_idx'
+            ),
+            models.Index(
+                fields=['category'],
+                condition=models.Q(is_low_stock=True),
+                name='inventory_low_stock_cat_idx'
+            ),
+        ]
 
 class InventoryCategory:
     """Suggested categories for inventory items."""
@@ -36,4 +158,46 @@ class InventoryCategory:
 
     @classmethod
     def get_suggested_categories(cls):
-        return cls.SUGGESTED_CATEGORIES 
\ No newline at end of file
+        return cls.SUGGESTED_CATEGORIES 
+
+@contextmanager
+def grouped_deletes():
+    """
+    Collect the removals of items deleted inside the block and apply them
+    in grouped UPDATEs, one per category, when it exits without an error.
+    """
+    if getattr(_pending, 'removals', None) is not None:
+        # Already grouped by an outer block
+        yield
+        return
+
+    _pending.removals = {}
+    try:
+        yield
+        removals = _pending.removals
+    finally:
+        _pending.removals = None
+    apply_removals(removals)
+
+def apply_removals(removals):
+    """Take ``{category: [items, quantity, value]}`` out of category counts and today's valuation."""
+    from .category import Category
+    from .inventory_valuation import InventoryValuation
+
+    Category.apply_changes({category: -count for category, (count, _, _) in removals.items()})
+    today = timezone.localdate()
+    for category, (count, quantity, value) in removals.items():
+        InventoryValuation.apply_change(today, category, -quantity, -value, item_count_change=-count)
+
+def item_deleted(sender, instance, **kwargs):
+    """post_delete receiver for InventoryItem, also run for queryset deletes."""
+    value = instance.quantity * Decimal(instance.unit_price)
+    removals = getattr(_pending, 'removals', None)
+    if removals is None:
+        apply_removals({instance.category: [1, instance.quantity, value]})
+        return
+
+    totals = removals.setdefault(instance.category, [0, 0, Decimal('0.00')])
+    totals[0] += 1
+    totals[1] += instance.quantity
+    totals[2] += value
\ No newline at end of file
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .inventory_item import InventoryItem
+from .stock_movement import StockMovement
+
+class InventoryValuation(models.Model):
+    """
+    Daily, per-category roll-up of inventory quantity and value.
+
+    Rows are written by the ``snapshot_inventory_value`` command and today's
+    rows are adjusted in place as items are created, changed, delivered and
+    deleted, so value history reads a few hundred pre-aggregated rows instead
+    of the inventory table.
+    """
+    date = models.DateField()
+    category = models.CharField(max_length=100)
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category} on {self.date}: {self.total_value}"
+
+    @staticmethod
+    def value_expression(quantity):
+        return ExpressionWrapper(
+            quantity * F('unit_price'),
+            output_field=DecimalField(max_digits=18, decimal_places=2)
+        )
+
+    @classmethod
+    def snapshot(cls, day, day_end=None, categories=None):
+        """
+        Compute and store the valuation rows for a day in the database.
+
+        Without ``day_end`` the current item quantities are used. With it,
+        each item's balance is read from the stock movement ledger as of
+        that moment, which allows past days to be backfilled.
+        Returns the number of category rows written.
+        """
+        items = InventoryItem.objects.all()
+        if categories is not None:
+            items = items.filter(category__in=categories)
+
+        if day_end is None:
+            quantity = F('quantity')
+        else:
+            balance = StockMovement.objects.filter(
+                item=OuterRef('pk'),
+                occurred_at__lt=day_end
+            ).order_by('-occurred_at', '-id').values('balance')[:1]
+            items = items.filter(created_at__lt=day_end).annotate(
+                ledger_balance=Coalesce(Subquery(balance), Value(0))
+            )
+            quantity = F('ledger_balance')
+
+        totals = items.values('category').annotate(
+            item_count=Count('id'),
+            total_quantity=Coalesce(Sum(quantity), Value(0)),
+            total_value=Coalesce(
+                Sum(cls.value_expression(quantity)),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=18, decimal_places=2)
+            )
+        ).order_by()
+
+        rows = [cls(date=day, **row) for row in totals]
+
+        # Categories with no items left are written as zero rows
+        if categories is not None:
+            seen = {row.category for row in rows}
+            rows.extend(cls(date=day, category=category) for category in set(categories) - seen)
+
+        cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['date', 'category'],
+            update_fields=['item_count', 'total_quantity', 'total_value', 'updated_at']
+        )
+        return len(rows)
+
+    @classmethod
+    def apply_change(cls, day, category, quantity_change, value_change, item_count_change=0):
+        """
+        Adjust a day's row for a category by a quantity, value and item count delta.
+
+        If the row does not exist yet it is computed from scratch instead,
+        which already reflects the change.
+        """
+        updated = cls.objects.filter(date=day, category=category).update(
+            item_count=F('item_count') + item_count_change,
+            total_quantity=F('total_quantity') + quantity_change,
+            total_value=F('total_value') + value_change
+        )
+        if not updated:
+            cls.snapshot(day, categories=[category])
+
+    @classmethod
+    def history(cls, days, category=None):
+        """
+        Total value and quantity for each of the last ``days`` days,
+        summed over categories, oldest first.
+
+        Days without a row for a category carry its latest earlier row
+        forward, since nothing was snapshotted because nothing changed.
+        Days before the first row of any category are left out.
+        """
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        valuations = cls.objects.all()
+        if category:
+            valuations = valuations.filter(category=category)
+
+        # Each category's latest row before the window is its opening value
+        opening = valuations.filter(date__lt=start).order_by().values_list('category').annotate(date=Max('date'))
+        window = Q(date__gte=start)
+        for name, date in opening:
+            window |= Q(category=name, date=date)
+        rows = valuations.filter(window).order_by('date').values_list(
+            'date', 'category', 'total_value', 'total_quantity'
+        )
+
+        current = {}
+        points = []
+        remaining = iter(rows)
+        row = next(remaining, None)
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            while row is not None and row[0] <= day:
+                current[row[1]] = row[2:]
+                row = next(remaining, None)
+            if current:
+                points.append({
+                    'date': day,
+                    'value': sum(value for value, _ in current.values()),
+                    'quantity': sum(quantity for _, quantity in current.values()),
+                })
+        return points
+
+    class Meta:
+        ordering = ['date', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='valuation_date_category_uniq'),
+        ]
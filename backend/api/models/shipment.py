@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from .enums import ShipmentType, ShipmentStatus
+from ..events import status_changed
 
 class Shipment(models.Model):
     type = models.CharField(max_length=3, choices=ShipmentType.choices())
@@ -17,5 +18,31 @@ class Shipment(models.Model):
     def __str__(self):
         return f"{self.get_type_display()} Shipment - {self.tracking_number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can publish transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        previous_status = getattr(self, '_loaded_status', None)
+        super().save(*args, **kwargs)
+
+        if adding or (previous_status is not None and previous_status != self.status):
+            status_changed(self.pk, self.status, previous_status)
+        self._loaded_status = self.status
+
     class Meta:
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Backs keyset pagination on (-created_at, id)
+            models.Index(fields=['-created_at', 'id'], name='shipment_created_id_idx'),
+            # MAX(updated_at) for conditional GET, and delta sync on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='shipment_updated_id_idx'),
+            # Status filter with the default (-created_at, id) ordering
+            models.Index(fields=['status', '-created_at', 'id'], name='shipment_status_created_idx'),
+            # Type filter, and recent activity by type on the dashboard
+            models.Index(fields=['type', 'created_at'], name='shipment_type_created_idx'),
+        ] 
\ No newline at end of file
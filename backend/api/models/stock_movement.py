@@ -0,0 +1,55 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .enums import StockMovementType
+from .inventory_item import InventoryItem
+from .shipment import Shipment
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of inventory quantity changes.
+
+    Every change to an item's quantity writes one row holding the change and
+    the item's balance right after it, so an item's history is a range read
+    on (item, occurred_at) instead of a replay of its shipments.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_movements')
+    type = models.CharField(max_length=10, choices=StockMovementType.choices())
+    quantity_change = models.IntegerField()
+    balance = models.IntegerField()
+    shipment = models.ForeignKey(Shipment, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    occurred_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='stock_movements')
+
+    def __str__(self):
+        return f"{self.quantity_change:+d} {self.item.name} ({self.get_type_display()})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements are append-only and cannot be changed")
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def record(cls, item, quantity_change, movement_type, shipment=None, user=None):
+        """
+        Record a change that has already been applied to item.quantity.
+
+        Must be called inside the same transaction as the quantity update so
+        the stored balance always matches the item. Today's valuation
+        roll-up follows InventoryItem.save(); callers updating quantities
+        through querysets adjust it themselves.
+        """
+        return cls.objects.create(
+            item=item,
+            type=movement_type.value,
+            quantity_change=quantity_change,
+            balance=item.quantity,
+            shipment=shipment,
+            created_by=user
+        )
+
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        indexes = [
+            models.Index(fields=['item', 'occurred_at'], name='stock_item_occurred_idx'),
+        ]
@@ -0,0 +1,28 @@
+from django.db import models
+from django.utils import timezone
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted inventory item or shipment.
+
+    Delta sync reads these alongside changed rows so that clients keeping
+    a local copy also learn about deletes. Rows are written by a
+    post_delete receiver, so queryset and cascade deletes are covered too.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            # Backs delta sync keyed on (deleted_at, id) per model
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ]
+
+def record_tombstone(sender, instance, **kwargs):
+    """post_delete receiver writing a tombstone for the deleted row."""
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
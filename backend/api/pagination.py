@@ -0,0 +1,288 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from .search import SEARCH_RANK
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a tuple of indexed columns.
+
+    Every page is fetched with a ``WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n``
+    style query, so deep pages cost the same as the first one. No OFFSET is
+    used and the total row count is never computed.
+
+    Subclasses declare which orderings are allowed through ``ordering_choices``,
+    mapping the value accepted by ``?ordering=`` to the tuple of fields the
+    cursor is keyed on. Only orderings backed by an index should be listed.
+    The last field of each tuple must be unique so that positions are total.
+    Keys may also name queryset annotations, in which case the ordering is
+    only accepted when the annotation is present.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering_choices = {}
+    default_ordering = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the unevaluated query for the requested page: the rows after
+        the cursor in cursor order, plus one extra to find out whether
+        another page follows.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering_key = self.get_ordering_key(request, queryset)
+        self.ordering = self.ordering_choices[self.ordering_key]
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.build_position_filter(queryset.model, ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        results = list(self.get_page_queryset(queryset, request))
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = position is not None
+            self.has_next = has_more
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.ordering_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'One of: ' + ', '.join(self.ordering_choices),
+                'schema': {'type': 'string'},
+            },
+        ]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_default_ordering(self, queryset):
+        return self.default_ordering
+
+    def get_ordering_key(self, request, queryset):
+        """
+        Get the requested ordering, rejecting anything outside the whitelist.
+        """
+        ordering = request.query_params.get(self.ordering_query_param) or self.get_default_ordering(queryset)
+        if ordering not in self.ordering_choices:
+            raise serializers.ValidationError({
+                self.ordering_query_param: [
+                    f"Unsupported ordering '{ordering}'. Choose one of: {', '.join(self.ordering_choices)}"
+                ]
+            })
+
+        for field in self.ordering_choices[ordering]:
+            name = field.lstrip('-')
+            if self._get_model_field(queryset.model, name) is None and name not in queryset.query.annotations:
+                raise serializers.ValidationError({
+                    self.ordering_query_param: [f"Ordering '{ordering}' is not available for this request"]
+                })
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False) if self.page else None
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        position = [self._get_position_value(obj, field.lstrip('-')) for field in self.ordering]
+        payload = {'o': self.ordering_key, 'p': position}
+        if reverse:
+            payload['r'] = 1
+        encoded = b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor parameter into a (position, reverse) pair.
+
+        The cursor is bound to the ordering it was issued for, so a cursor
+        cannot be replayed against a different ``?ordering=``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+            if payload['o'] != self.ordering_key or len(position) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def build_position_filter(self, model, ordering, position):
+        """
+        Build the lexicographic "comes after" predicate for a key tuple.
+
+        For ordering ``(a, -b)`` and position ``(x, y)`` this produces
+        ``a >= x AND (a > x OR (a = x AND b < y))``. The redundant bound on
+        the first field lets the database seek into the index at the
+        position; the OR terms alone make it walk the index from the start.
+        """
+        values = []
+        for field, value in zip(self.ordering, position):
+            model_field = self._get_model_field(model, field.lstrip('-'))
+            if model_field is not None:
+                try:
+                    value = model_field.to_python(value)
+                except DjangoValidationError:
+                    raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        if len(ordering) > 1:
+            first = ordering[0]
+            lookup = 'lte' if first.startswith('-') else 'gte'
+            condition = Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & condition
+        return condition
+
+    def _get_position_value(self, obj, name):
+        # obj may also be a named tuple row from values_list(named=True)
+        model_field = self._get_model_field(self.model, name)
+        if model_field is None:
+            # Annotations such as search rank are stored as plain JSON values
+            return getattr(obj, name)
+        return model_field.value_to_string(obj)
+
+    @staticmethod
+    def _get_model_field(model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class InventoryItemPagination(KeysetPagination):
+    """
+    Keyset pagination for inventory items, keyed on ``(name, id)`` by default.
+
+    Full-text search results are ordered by relevance unless another
+    ordering is requested.
+    """
+    default_ordering = 'name'
+    ordering_choices = {
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+        'sku': ('sku',),
+        '-sku': ('-sku',),
+        'relevance': (f'-{SEARCH_RANK}', 'id'),
+    }
+
+    def get_default_ordering(self, queryset):
+        if SEARCH_RANK in queryset.query.annotations:
+            return 'relevance'
+        return self.default_ordering
+
+
+class ShipmentPagination(KeysetPagination):
+    """Keyset pagination for shipments, keyed on ``(-created_at, id)`` by default."""
+    default_ordering = '-created_at'
+    ordering_choices = {
+        '-created_at': ('-created_at', 'id'),
+        'created_at': ('created_at', '-id'),
+        'tracking_number': ('tracking_number',),
+        '-tracking_number': ('-tracking_number',),
+    }
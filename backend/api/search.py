@@ -0,0 +1,158 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import InventoryItem
+
+# SQLite FTS5 table mirroring name, sku and description. It is an external
+# content table, kept in sync by triggers created in migration 0003.
+SQLITE_FTS_TABLE = 'api_inventoryitem_fts'
+
+# PostgreSQL generated tsvector column and its GIN index, see migration 0003
+POSTGRES_VECTOR_COLUMN = 'search_vector'
+POSTGRES_GIN_INDEX = 'inventory_search_gin_idx'
+
+# Column weights for ranking: name and sku matches outrank description matches
+SQLITE_BM25_WEIGHTS = '10.0, 10.0, 1.0'
+
+SEARCH_RANK = 'search_rank'
+
+# Triggers keeping the FTS5 table in sync. SQLite drops them whenever a
+# migration rebuilds the inventory table, so they are re-created after
+# every migrate by ensure_triggers().
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON api_inventoryitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON api_inventoryitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE OF name, sku, description ON api_inventoryitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+]
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a free-text query into lowercase search terms."""
+    return [token.lower() for token in _TOKEN_PATTERN.findall(query)]
+
+
+def build_sqlite_query(tokens):
+    """Build an FTS5 MATCH expression requiring a prefix match on every term."""
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def build_postgres_query(tokens):
+    """Build a to_tsquery expression requiring a prefix match on every term."""
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def search_inventory(queryset, query):
+    """
+    Filter an InventoryItem queryset down to full-text matches for a query.
+
+    Every term in the query is matched as a prefix against name, sku and
+    description, so the endpoint can be called on every keystroke. Matching
+    items are annotated with ``search_rank`` (higher is better).
+
+    Backends without a full-text index fall back to ``icontains`` matching.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+
+    table = InventoryItem._meta.db_table
+
+    if connection.vendor == 'sqlite':
+        match = build_sqlite_query(tokens)
+        condition = RawSQL(
+            f'"{table}"."id" IN (SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s)',
+            [match],
+            output_field=BooleanField()
+        )
+        # bm25() scores lower for better matches, so negate it
+        rank = RawSQL(
+            f'SELECT -bm25({SQLITE_FTS_TABLE}, {SQLITE_BM25_WEIGHTS}) FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND {SQLITE_FTS_TABLE}.rowid = "{table}"."id"',
+            [match],
+            output_field=FloatField()
+        )
+        return queryset.filter(condition).annotate(**{SEARCH_RANK: rank})
+
+    if connection.vendor == 'postgresql':
+        tsquery = build_postgres_query(tokens)
+        column = f'"{table}"."{POSTGRES_VECTOR_COLUMN}"'
+        condition = RawSQL(
+            f"{column} @@ to_tsquery('simple', %s)",
+            [tsquery],
+            output_field=BooleanField()
+        )
+        rank = RawSQL(
+            f"ts_rank({column}, to_tsquery('simple', %s))",
+            [tsquery],
+            output_field=FloatField()
+        )
+        return queryset.filter(condition).annotate(**{SEARCH_RANK: rank})
+
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(sku__icontains=query) |
+        Q(description__icontains=query)
+    )
+
+
+def ensure_triggers(using='default'):
+    """
+    Re-create the SQLite sync triggers if a table rebuild dropped them.
+
+    Returns True when triggers were installed. Does nothing on other
+    backends or before the search migration has created the FTS5 table.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite' or SQLITE_FTS_TABLE not in db.introspection.table_names():
+        return False
+
+    with db.cursor() as cursor:
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+    return True
+
+
+def rebuild_index():
+    """
+    Rebuild the full-text index from the inventory table.
+
+    Returns the name of the backend that was rebuilt, or None when the
+    active database has no full-text index.
+    """
+    ensure_triggers()
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES('rebuild')")
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES('optimize')")
+            return 'sqlite'
+
+        if connection.vendor == 'postgresql':
+            # The tsvector column is generated, so only the index can drift
+            cursor.execute(f'REINDEX INDEX {POSTGRES_GIN_INDEX}')
+            cursor.execute(f'ANALYZE {InventoryItem._meta.db_table}')
+            return 'postgresql'
+
+    return None
@@ -1,11 +1,12 @@
 from .user_serializer import UserSerializer
-from .inventory_item_serializer import InventoryItemSerializer
+from .inventory_item_serializer import InventoryItemSerializer, InventoryItemImportSerializer
 from .shipment_serializer import ShipmentSerializer
 from .shipment_item_serializer import ShipmentItemSerializer
 
 __all__ = [
     'UserSerializer',
     'InventoryItemSerializer',
+    'InventoryItemImportSerializer',
     'ShipmentSerializer',
     'ShipmentItemSerializer',
 ]
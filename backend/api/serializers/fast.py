@@ -0,0 +1,156 @@
+from decimal import Context, Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import ShipmentItem
+from .inventory_item_serializer import InventoryItemSerializer
+from .shipment_item_serializer import ShipmentItemSerializer
+from .shipment_serializer import ShipmentSerializer
+
+# Fields of a nested UserSerializer, without the write-only password
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'is_staff')
+
+
+def datetime_column(values):
+    """Format a column of datetimes exactly like DRF's ``DateTimeField``."""
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    column = []
+    for value in values:
+        if not value:
+            column.append(None)
+            continue
+        if tz is not None:
+            value = value.astimezone(tz)
+        text = value.isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        column.append(text)
+    return column
+
+
+def decimal_column(values, model_field):
+    """Format a column of decimals exactly like DRF's ``DecimalField``."""
+    exponent = Decimal('.1') ** model_field.decimal_places
+    context = Context(prec=model_field.max_digits)
+    return [None if value is None else '{:f}'.format(value.quantize(exponent, context=context)) for value in values]
+
+
+def user_column(columns):
+    """Build nested users from one column per ``USER_FIELDS`` entry."""
+    return [
+        None if values[0] is None else dict(zip(USER_FIELDS, values))
+        for values in zip(*columns)
+    ]
+
+
+class ValuesReader:
+    """
+    Read-only serialization from ``values_list()`` rows.
+
+    Produces the same data as ``serializer_class(queryset, many=True).data``
+    for the default representation, without building model instances or
+    running DRF fields per value. Rows are turned into columns, each column
+    is converted in a single pass, and the columns are zipped back into
+    dicts in serializer field order.
+
+    rows() returns a queryset of named tuples, so paginators and sync
+    cursors can read positions from them like from model instances.
+    """
+    serializer_class = None
+    datetime_fields = ()
+    decimal_fields = ()
+    user_fields = ()
+    # Fields filled by read_related() rather than by a column
+    related_fields = ()
+
+    @property
+    def fields(self):
+        return self.serializer_class.Meta.fields
+
+    def get_columns(self):
+        columns = []
+        for name in self.fields:
+            if name in self.user_fields:
+                columns.extend(f'{name}__{field}' for field in USER_FIELDS)
+            elif name in self.related_fields:
+                continue
+            else:
+                columns.append(name)
+        return columns
+
+    def rows(self, queryset):
+        # Keep annotations such as the search rank for keyset cursors
+        columns = self.get_columns() + list(queryset.query.annotations)
+        return queryset.prefetch_related(None).values_list(*columns, named=True)
+
+    def read_related(self, columns):
+        """Return ``{field: column}`` for ``related_fields``."""
+        return {}
+
+    def serialize(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+
+        model = self.serializer_class.Meta.model
+        columns = dict(zip(rows[0]._fields, zip(*rows)))
+        related = self.read_related(columns)
+
+        output = []
+        for name in self.fields:
+            if name in related:
+                output.append(related[name])
+            elif name in self.user_fields:
+                output.append(user_column([columns[f'{name}__{field}'] for field in USER_FIELDS]))
+            elif name in self.datetime_fields:
+                output.append(datetime_column(columns[name]))
+            elif name in self.decimal_fields:
+                output.append(decimal_column(columns[name], model._meta.get_field(name)))
+            else:
+                output.append(columns[name])
+
+        fields = self.fields
+        return [dict(zip(fields, values)) for values in zip(*output)]
+
+
+class InventoryItemReader(ValuesReader):
+    """Fast path for ``InventoryItemSerializer``."""
+    serializer_class = InventoryItemSerializer
+    datetime_fields = ('created_at', 'updated_at')
+    decimal_fields = ('unit_price',)
+    user_fields = ('created_by', 'last_updated_by')
+
+
+class ShipmentReader(ValuesReader):
+    """
+    Fast path for ``ShipmentSerializer``.
+
+    The lines of every shipment on the page are read with one extra query,
+    in id order like the prefetch used by the regular path.
+    """
+    serializer_class = ShipmentSerializer
+    datetime_fields = ('estimated_arrival', 'actual_arrival', 'created_at', 'updated_at')
+    user_fields = ('created_by', 'updated_by')
+    related_fields = ('shipment_items',)
+
+    def read_related(self, columns):
+        line_fields = ShipmentItemSerializer.Meta.fields
+        lines = ShipmentItem.objects.filter(
+            shipment_id__in=columns['id']
+        ).order_by('id').values_list('shipment_id', *['item_id' if name == 'item' else name for name in line_fields])
+
+        shipment_ids = []
+        line_rows = []
+        for shipment_id, *values in lines:
+            shipment_ids.append(shipment_id)
+            line_rows.append(values)
+
+        by_shipment = {pk: [] for pk in columns['id']}
+        if line_rows:
+            line_columns = list(zip(*line_rows))
+            unit_price = line_fields.index('unit_price')
+            line_columns[unit_price] = decimal_column(line_columns[unit_price], ShipmentItem._meta.get_field('unit_price'))
+            for shipment_id, values in zip(shipment_ids, zip(*line_columns)):
+                by_shipment[shipment_id].append(dict(zip(line_fields, values)))
+        return {'shipment_items': [by_shipment[pk] for pk in columns['id']]}
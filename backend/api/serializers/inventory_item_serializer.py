@@ -1,14 +1,30 @@
 from rest_framework import serializers
 from ..models import InventoryItem
 from .user_serializer import UserSerializer
+from .mixins import DynamicFieldsMixin
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     last_updated_by = UserSerializer(read_only=True)
     
     class Meta:
         model = InventoryItem
         fields = ['id', 'name', 'sku', 'description', 'quantity', 'location', 
-                 'category', 'minimum_stock', 'created_at', 'updated_at',
-                 'created_by', 'last_updated_by']
-        read_only_fields = ['created_at', 'updated_at', 'created_by', 'last_updated_by']
\ No newline at end of file
+                 'category', 'minimum_stock', 'unit_price', 'is_low_stock', 'created_at',
+                 'updated_at', 'created_by', 'last_updated_by']
+        read_only_fields = ['is_low_stock', 'created_at', 'updated_at', 'created_by', 'last_updated_by']
+
+class InventoryItemImportSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk inventory import.
+
+    The unique SKU validator is dropped because imports upsert on SKU,
+    which also keeps validation free of per-row queries.
+    """
+    class Meta:
+        model = InventoryItem
+        fields = ['name', 'sku', 'description', 'quantity', 'location',
+                  'category', 'minimum_stock', 'unit_price']
+        extra_kwargs = {
+            'sku': {'validators': []},
+        }
@@ -0,0 +1,68 @@
+from rest_framework import serializers
+
+
+def parse_field_tree(value):
+    """
+    Parse a ``?fields=`` or ``?expand=`` value into a nested dict.
+
+    ``"id,item.name,item.sku"`` becomes ``{'id': None, 'item': {'name': None, 'sku': None}}``,
+    where None means the whole field. Returns None for a missing value.
+    """
+    if value is None:
+        return None
+
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        node = tree
+        for index, part in enumerate(parts):
+            if index == len(parts) - 1:
+                node[part] = None
+            elif node.get(part, {}) is not None:
+                node = node.setdefault(part, {})
+            else:
+                # The whole field was already requested
+                break
+    return tree
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin adding sparse fieldsets and expandable relations.
+
+    ``fields`` keeps only the named fields and ``expand`` swaps fields listed
+    in ``Meta.expandable_fields`` for a nested serializer. Both take a tree
+    from parse_field_tree(), and dotted paths are handed down to nested
+    serializers that use this mixin too.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.field_tree = kwargs.pop('fields', None)
+        self.expand_tree = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        field_tree = self.field_tree
+        expand_tree = self.expand_tree or {}
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, subtree in expand_tree.items():
+            if name in expandable:
+                fields[name] = expandable[name](
+                    read_only=True,
+                    fields=field_tree.get(name) if field_tree else None,
+                    expand=subtree
+                )
+
+        if field_tree is not None:
+            fields = {name: field for name, field in fields.items() if name in field_tree}
+
+        for name, field in fields.items():
+            if name in expandable and name in expand_tree:
+                continue
+            target = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(target, DynamicFieldsMixin):
+                target.field_tree = field_tree.get(name) if field_tree else None
+                target.expand_tree = expand_tree.get(name)
+        return fields
@@ -1,7 +1,84 @@
 from rest_framework import serializers
+from ..db import pk_in_range
 from ..models import ShipmentItem, InventoryItem
+from .inventory_item_serializer import InventoryItemSerializer
+from .mixins import DynamicFieldsMixin
 
-class ShipmentItemSerializer(serializers.ModelSerializer):
+class InventoryItemPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field for a line's inventory item.
+
+    When ShipmentItemListSerializer has already loaded every referenced
+    item, the lookup is served from ``resolved`` instead of the database.
+    """
+    resolved = None
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+
+        pk = ShipmentItemListSerializer.parse_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.resolved:
+            self.fail('does_not_exist', pk_value=data)
+        return self.resolved[pk]
+
+class ShipmentItemListSerializer(serializers.ListSerializer):
+    """
+    Validates all lines of a shipment together.
+
+    Every referenced inventory item is fetched with a single ``IN`` query,
+    and all missing items and repeated items are reported at once.
+    """
+
+    @staticmethod
+    def parse_pk(value):
+        if isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def to_internal_value(self, data):
+        item_ids = {}
+        if isinstance(data, list):
+            for index, line in enumerate(data):
+                pk = self.parse_pk(line.get('item')) if isinstance(line, dict) else None
+                if pk is not None:
+                    item_ids[index] = pk
+
+        # A shipment can only have one line per item
+        duplicates = {}
+        seen = set()
+        for index, pk in item_ids.items():
+            if pk in seen:
+                duplicates[index] = [f'Item {pk} appears more than once in this shipment.']
+            seen.add(pk)
+
+        field = self.child.fields['item']
+        # Ids too large for the column cannot exist, and are reported as missing
+        field.resolved = InventoryItem.objects.in_bulk([pk for pk in seen if pk_in_range(InventoryItem, pk)])
+        try:
+            validated = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            errors = exc.detail
+            if isinstance(errors, list):
+                for index, messages in duplicates.items():
+                    errors[index].setdefault('item', []).extend(messages)
+            raise serializers.ValidationError(errors)
+        finally:
+            field.resolved = None
+
+        if duplicates:
+            raise serializers.ValidationError([
+                {'item': duplicates[index]} if index in duplicates else {}
+                for index in range(len(data))
+            ])
+        return validated
+
+class ShipmentItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for ShipmentItem model.
     
@@ -10,9 +87,12 @@ class ShipmentItemSerializer(serializers.ModelSerializer):
     - Nested inventory item relationship
     - Quantity and unit price validation
     """
-    item = serializers.PrimaryKeyRelatedField(queryset=InventoryItem.objects.all())
+    item = InventoryItemPrimaryKeyField(queryset=InventoryItem.objects.all())
     
     class Meta:
         model = ShipmentItem
         fields = ['id', 'item', 'quantity', 'unit_price']
-        read_only_fields = ['id'] 
\ No newline at end of file
+        read_only_fields = ['id']
+        list_serializer_class = ShipmentItemListSerializer
+        # ?expand=item nests the inventory item instead of its id
+        expandable_fields = {'item': InventoryItemSerializer}
\ No newline at end of file
@@ -2,10 +2,12 @@ from rest_framework import serializers
 from ..models import Shipment, ShipmentItem
 from .shipment_item_serializer import ShipmentItemSerializer
 from .user_serializer import UserSerializer
+from .mixins import DynamicFieldsMixin
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 
-class ShipmentSerializer(serializers.ModelSerializer):
+class ShipmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Shipment model.
     
@@ -59,28 +61,57 @@ class ShipmentSerializer(serializers.ModelSerializer):
         Create a new shipment with its items.
         """
         items_data = validated_data.pop('shipment_items', [])
-        shipment = Shipment.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            ShipmentItem.objects.create(shipment=shipment, **item_data)
-            
+
+        with transaction.atomic():
+            shipment = Shipment.objects.create(**validated_data)
+            ShipmentItem.objects.bulk_create([
+                ShipmentItem(shipment=shipment, **item_data) for item_data in items_data
+            ])
+
         return shipment
 
     def update(self, instance, validated_data):
         """
         Update a shipment and its items.
+
+        Incoming items are matched to existing lines by inventory item, and
+        only the lines that were added, changed or removed are written.
         """
         items_data = validated_data.pop('shipment_items', None)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        if items_data is not None:
-            # Delete existing items
-            instance.items.all().delete()
-            # Create new items
-            for item_data in items_data:
-                ShipmentItem.objects.create(shipment=instance, **item_data)
-                
-        return instance 
\ No newline at end of file
+
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if items_data is not None:
+                self.sync_items(instance, items_data)
+
+        return instance
+
+    @staticmethod
+    def sync_items(shipment, items_data):
+        """
+        Bring a shipment's lines in line with ``items_data`` using at most one
+        bulk insert, one bulk update and one delete.
+        """
+        existing = {line.item_id: line for line in ShipmentItem.objects.filter(shipment=shipment)}
+
+        to_create = []
+        to_update = []
+        for item_data in items_data:
+            line = existing.pop(item_data['item'].pk, None)
+            if line is None:
+                to_create.append(ShipmentItem(shipment=shipment, **item_data))
+            elif line.quantity != item_data['quantity'] or line.unit_price != item_data['unit_price']:
+                line.quantity = item_data['quantity']
+                line.unit_price = item_data['unit_price']
+                to_update.append(line)
+
+        # Whatever was not matched by an incoming item has been removed
+        if existing:
+            ShipmentItem.objects.filter(pk__in=[line.pk for line in existing.values()]).delete()
+        if to_update:
+            ShipmentItem.objects.bulk_update(to_update, ['quantity', 'unit_price'])
+        if to_create:
+            ShipmentItem.objects.bulk_create(to_create)
\ No newline at end of file
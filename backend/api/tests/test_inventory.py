@@ -1,10 +1,39 @@
-from django.test import TestCase
+from django.test import AsyncClient, TestCase, override_settings
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
-from rest_framework import status
-from ..models import InventoryItem
+from rest_framework import serializers, status
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, models
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from io import BytesIO, StringIO
+import csv
+import gzip
+import uuid
+import os
+import tempfile
+import time
+from unittest import mock
+from django.utils import timezone
+from django.utils.http import http_date
+from datetime import timedelta
+from decimal import Decimal
+from rest_framework.renderers import JSONRenderer
+from asgiref.sync import async_to_sync
+from ..dashboard import get_cache
+from ..concurrency import _run_query
+from ..events import EventBuffer, buffer
+from ..views.mixins import DeltaSyncMixin
+from ..serializers import InventoryItemSerializer
+from ..serializers.fast import InventoryItemReader, decimal_column
+from ..middleware import negotiate_encoding
+from ..renderers import FastJSONRenderer
+from ..models import Category, InventoryItem, InventoryValuation, Shipment, ShipmentItem, StockMovement
+from ..models.enums import ShipmentType, ShipmentStatus, StockMovementType
+from .helpers import QueryAssertionsMixin
 
-class InventoryTests(TestCase):
+class InventoryTests(QueryAssertionsMixin, TestCase):
     def setUp(self):
         self.client = APIClient()
         self.user = User.objects.create_user(
@@ -65,7 +94,7 @@ class InventoryTests(TestCase):
         """Test listing all inventory items"""
         response = self.client.get('/api/inventory/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_get_inventory_item(self):
         """Test retrieving a single inventory item"""
@@ -95,14 +124,14 @@ class InventoryTests(TestCase):
         """Test searching inventory items"""
         response = self.client.get('/api/inventory/?search=Test')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_filter_by_category(self):
         """Test filtering inventory items by category"""
         response = self.client.get('/api/inventory/?category=Electronics')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['category'], 'Electronics')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['category'], 'Electronics')
 
     def test_low_stock_items(self):
         """Test getting low stock items"""
@@ -110,6 +139,51 @@ class InventoryTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)  # Only item2 has quantity < minimum_stock 
 
+    def test_low_stock_flag_follows_every_quantity_change(self):
+        """Test that is_low_stock stays correct across edits, deliveries and imports"""
+        self.assertFalse(InventoryItem.objects.get(pk=self.item1.pk).is_low_stock)
+        self.assertTrue(InventoryItem.objects.get(pk=self.item2.pk).is_low_stock)
+
+        # Manual edit
+        response = self.client.patch(f'/api/inventory/{self.item1.id}/', {'minimum_stock': 20})
+        self.assertTrue(response.data['is_low_stock'])
+
+        # Delivery
+        shipment = Shipment.objects.create(
+            type=ShipmentType.INCOMING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number='LOWSTOCK001',
+            carrier='FedEx',
+            estimated_arrival=timezone.now() + timedelta(days=5)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item=self.item2, quantity=10, unit_price=1)
+        self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+        self.assertFalse(InventoryItem.objects.get(pk=self.item2.pk).is_low_stock)
+
+        # Import
+        upload = BytesIO(b'{"name": "Test Item 1", "sku": "SKU001", "quantity": 50, "location": "A1", '
+                         b'"category": "Electronics", "minimum_stock": 20}\n')
+        upload.name = 'items.ndjson'
+        self.client.post('/api/inventory/import/', {'file': upload}, format='multipart')
+        self.assertFalse(InventoryItem.objects.get(pk=self.item1.pk).is_low_stock)
+
+        # Queryset update
+        InventoryItem.objects.filter(pk=self.item1.pk).update(quantity=1)
+        self.assertTrue(InventoryItem.objects.get(pk=self.item1.pk).is_low_stock)
+
+    def test_low_stock_counts(self):
+        """Test per-category low stock counts"""
+        InventoryItem.objects.create(
+            name='Test Item 3', sku='SKU003', quantity=0, location='B3',
+            category='Furniture', minimum_stock=1, created_by=self.user
+        )
+        response = self.client.get('/api/inventory/low_stock_counts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'total': 2, 'categories': {'Furniture': 2}})
+
+        response = self.client.get('/api/inventory/low_stock/?category=Electronics')
+        self.assertEqual(response.data, [])
+
     def test_get_categories(self):
         """Test that the categories endpoint returns all unique categories."""
         response = self.client.get('/api/inventory/categories/')
@@ -128,4 +202,960 @@ class InventoryTests(TestCase):
         self.assertEqual(len(categories), len(set(categories)))
         
         # Categories should be sorted
-        self.assertEqual(categories, sorted(categories)) 
\ No newline at end of file
+        self.assertEqual(categories, sorted(categories))
+
+    def test_category_registry_tracks_item_writes(self):
+        """Test that category counts follow creates, edits, deletes and imports"""
+        response = self.client.get('/api/inventory/categories/?counts=true')
+        counts = {row['name']: row['item_count'] for row in response.data}
+        self.assertEqual(counts['Electronics'], 1)
+        self.assertEqual(counts['Furniture'], 1)
+        self.assertEqual(counts['Food'], 0)
+
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'category': 'Gadgets'})
+        self.client.delete(f'/api/inventory/{self.item2.id}/')
+        upload = BytesIO(
+            b'{"name": "Lamp", "sku": "SKU300", "quantity": 1, "location": "A1", '
+            b'"category": "Gadgets", "minimum_stock": 0}\n'
+        )
+        upload.name = 'items.ndjson'
+        self.client.post('/api/inventory/import/', {'file': upload}, format='multipart')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/inventory/categories/?counts=true')
+        self.assertFalse([q for q in context.captured_queries if 'api_inventoryitem' in q['sql']])
+        counts = {row['name']: row['item_count'] for row in response.data}
+        self.assertEqual(counts['Gadgets'], 2)
+        self.assertEqual(counts['Electronics'], 0)
+        self.assertEqual(counts['Furniture'], 0)
+
+        Category.objects.all().delete()
+        Category.refresh()
+        self.assertEqual(Category.objects.get(name='Gadgets').item_count, 2)
+
+    def test_category_counts_stay_consistent(self):
+        """Test category counts for partially loaded items, reloads, bulk deletes and recounts"""
+        def count(name):
+            return Category.objects.get(name=name).item_count
+
+        # Loaded without its category, the stored one is read before moving it
+        item = InventoryItem.objects.only('quantity').get(pk=self.item1.pk)
+        item.category = 'Gadgets'
+        item.save()
+        self.assertEqual((count('Electronics'), count('Gadgets')), (0, 1))
+
+        # A reload resets what save() compares against
+        item = InventoryItem.objects.get(pk=self.item1.pk)
+        InventoryItem.objects.filter(pk=item.pk).update(category='Tools')
+        Category.apply_changes({'Gadgets': -1, 'Tools': 1})
+        item.refresh_from_db()
+        item.save()
+        self.assertEqual((count('Gadgets'), count('Tools')), (0, 1))
+
+        # Counts never go below zero
+        Category.apply_changes({'Gadgets': -5, 'Tools': 1})
+        self.assertEqual((count('Gadgets'), count('Tools')), (0, 2))
+
+        # A queryset delete updates all its categories in one statement
+        Category.apply_changes({'Tools': -1})
+        with CaptureQueriesContext(connection) as context:
+            InventoryItem.objects.all().delete()
+        self.assertEqual(
+            len([q for q in context.captured_queries if q['sql'].startswith('UPDATE "api_category"')]),
+            1
+        )
+        self.assertEqual((count('Tools'), count('Furniture')), (0, 0))
+
+        Category.objects.filter(name='Tools').update(item_count=7)
+        out = StringIO()
+        call_command('refresh_categories', stdout=out)
+        self.assertEqual(count('Tools'), 0)
+        self.assertIn('Recounted', out.getvalue())
+
+    def test_list_inventory_items_paginates_with_cursor(self):
+        """Test walking the inventory list with keyset cursors"""
+        for i in range(3, 8):
+            InventoryItem.objects.create(
+                name=f'Test Item {i}',
+                sku=f'SKU00{i}',
+                quantity=10,
+                location='A1',
+                category='Tools',
+                minimum_stock=5
+            )
+
+        response = self.client.get('/api/inventory/?page_size=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        first_page = [item['name'] for item in response.data['results']]
+        self.assertEqual(first_page, ['Test Item 1', 'Test Item 2', 'Test Item 3'])
+
+        response = self.client.get(response.data['next'])
+        second_page = [item['name'] for item in response.data['results']]
+        self.assertEqual(second_page, ['Test Item 4', 'Test Item 5', 'Test Item 6'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['name'] for item in response.data['results']], ['Test Item 7'])
+        self.assertIsNone(response.data['next'])
+
+        # Walking backwards returns the previous page in the same order
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['name'] for item in response.data['results']], second_page)
+
+    def test_list_inventory_items_ties_on_name(self):
+        """Test that items sharing a name are not skipped across pages"""
+        InventoryItem.objects.create(
+            name='Test Item 1',
+            sku='SKU003',
+            quantity=10,
+            location='A1',
+            category='Tools',
+            minimum_stock=5
+        )
+
+        response = self.client.get('/api/inventory/?page_size=1')
+        skus = [response.data['results'][0]['sku']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            skus.extend(item['sku'] for item in response.data['results'])
+
+        self.assertEqual(skus, ['SKU001', 'SKU003', 'SKU002'])
+
+    def test_list_inventory_items_ordering(self):
+        """Test whitelisted and rejected orderings"""
+        response = self.client.get('/api/inventory/?ordering=-sku')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['sku'] for item in response.data['results']], ['SKU002', 'SKU001'])
+
+        # Orderings without a supporting index are rejected
+        response = self.client.get('/api/inventory/?ordering=description')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pages_seek_the_index(self):
+        """Test that later pages start reading the index at the cursor instead of scanning it"""
+        self.create_low_stock_items(5, start=0)
+        for ordering in ('name', '-name'):
+            second_page = self.client.get(f'/api/inventory/?page_size=2&ordering={ordering}').data['next']
+            previous_page = self.client.get(second_page).data['previous']
+            for url in (second_page, previous_page):
+                page_queries = [sql for sql in self.get_view_queries(url, 'api_inventoryitem') if 'LIMIT' in sql]
+                with self.subTest(ordering=ordering, url=url):
+                    # The ETag reads the page's keys with the same seek as the page itself
+                    self.assertEqual(len(page_queries), 2)
+                    for sql in page_queries:
+                        # The bound is explicit, rather than left for the planner to derive
+                        self.assertRegex(sql, r'"api_inventoryitem"\."name" [<>]= ')
+                        self.assert_seeks_index(sql, 'api_inventoryitem')
+
+    def test_list_inventory_items_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get('/api/inventory/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_ranks_name_matches_first(self):
+        """Test that search results are ordered by relevance"""
+        InventoryItem.objects.create(
+            name='Cable Ties',
+            sku='SKU010',
+            description='Bundle for every laptop charger',
+            quantity=10,
+            location='A1',
+            category='Tools',
+            minimum_stock=5
+        )
+        InventoryItem.objects.create(
+            name='Laptop Stand',
+            sku='SKU011',
+            description='Aluminium stand',
+            quantity=10,
+            location='A1',
+            category='Electronics',
+            minimum_stock=5
+        )
+
+        # Prefix matches work for search-as-you-type
+        response = self.client.get('/api/inventory/?search=lapt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in response.data['results']],
+            ['Laptop Stand', 'Cable Ties']
+        )
+
+        # Relevance order is stable across keyset pages
+        response = self.client.get('/api/inventory/?search=lapt&page_size=1')
+        self.assertEqual(response.data['results'][0]['name'], 'Laptop Stand')
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['name'], 'Cable Ties')
+        self.assertIsNone(response.data['next'])
+
+    def test_search_index_stays_in_sync(self):
+        """Test that updates, bulk writes and deletes are reflected in search"""
+        def search(query):
+            response = self.client.get('/api/inventory/', {'search': query})
+            return sorted(item['sku'] for item in response.data['results'])
+
+        self.item1.name = 'Renamed Widget'
+        self.item1.save()
+        self.assertEqual(search('widget'), ['SKU001'])
+
+        InventoryItem.objects.bulk_create([
+            InventoryItem(name='Bulk Widget', sku='SKU020', quantity=1, location='A1',
+                          category='Tools', minimum_stock=0),
+        ])
+        self.assertEqual(search('widget'), ['SKU001', 'SKU020'])
+
+        InventoryItem.objects.filter(sku='SKU020').update(description='Gadget')
+        self.assertEqual(search('gadget'), ['SKU020'])
+
+        InventoryItem.objects.filter(name__contains='Widget').delete()
+        self.assertEqual(search('widget'), [])
+
+    def test_rebuild_search_index_command(self):
+        """Test rebuilding the search index from the inventory table"""
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('2 inventory items', out.getvalue())
+
+        response = self.client.get('/api/inventory/?search=SKU002')
+        self.assertEqual([item['sku'] for item in response.data['results']], ['SKU002'])
+
+    def create_low_stock_items(self, count, start):
+        """Create items that are below their minimum stock, owned by the test user"""
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Bulk Item {i}',
+                sku=f'BULK{i:04d}',
+                quantity=1,
+                location='A1',
+                category='Tools',
+                minimum_stock=5,
+                created_by=self.user,
+                last_updated_by=self.user
+            )
+            for i in range(start, start + count)
+        ])
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        """Test that inventory read paths do not issue queries per row"""
+        urls = [
+            '/api/inventory/',
+            '/api/inventory/?search=Bulk',
+            '/api/inventory/?low_stock=true',
+            '/api/inventory/low_stock/',
+        ]
+
+        self.create_low_stock_items(5, start=0)
+        baseline = {url: self.count_queries(url) for url in urls}
+
+        self.create_low_stock_items(20, start=5)
+        for url in urls:
+            self.assertEqual(self.count_queries(url), baseline[url], url)
+
+    def test_history_reconciles_with_quantity(self):
+        """Test that item history is read from the stock movement ledger"""
+        response = self.client.post('/api/inventory/', {
+            'name': 'Ledger Item',
+            'sku': 'SKU100',
+            'quantity': 10,
+            'location': 'C3',
+            'category': 'Tools',
+            'minimum_stock': 2
+        })
+        item_id = response.data['id']
+
+        shipment = Shipment.objects.create(
+            type=ShipmentType.INCOMING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number='LEDGER001',
+            carrier='FedEx',
+            estimated_arrival=timezone.now() + timedelta(days=5)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item_id=item_id, quantity=5, unit_price=1)
+        self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+
+        self.client.patch(f'/api/inventory/{item_id}/', {'quantity': 12})
+
+        response = self.client.get(f'/api/inventory/{item_id}/history/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(point['reason'], point['change'], point['quantity']) for point in response.data],
+            [('INITIAL', 10, 10), ('DELIVERY', 5, 15), ('ADJUSTMENT', -3, 12), (None, 0, 12)]
+        )
+        self.assertEqual(response.data[1]['shipment_id'], shipment.id)
+        self.assertEqual(response.data[1]['type'], ShipmentType.INCOMING.value)
+
+    def test_history_window_and_limit(self):
+        """Test filtering item history by date window and limit"""
+        now = timezone.now()
+        for days_ago, balance in [(10, 4), (5, 6), (1, 8)]:
+            movement = StockMovement.objects.create(
+                item=self.item1, type='ADJUSTMENT', quantity_change=2, balance=balance
+            )
+            StockMovement.objects.filter(pk=movement.pk).update(occurred_at=now - timedelta(days=days_ago))
+
+        url = f'/api/inventory/{self.item1.id}/history/'
+        start = (now - timedelta(days=7)).date().isoformat()
+        end = (now - timedelta(days=3)).date().isoformat()
+        response = self.client.get(url, {'start': start, 'end': end})
+        self.assertEqual([point['quantity'] for point in response.data], [6])
+
+        # The most recent movements are kept when limiting
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual([point['quantity'] for point in response.data], [6, 8, 10])
+
+        response = self.client.get(url, {'start': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stock_movements_are_append_only(self):
+        """Test that recorded stock movements cannot be edited"""
+        movement = StockMovement.record(self.item1, 10, StockMovementType.INITIAL)
+        movement.balance = 0
+        with self.assertRaises(ValueError):
+            movement.save()
+
+    def test_value_history_reads_daily_rollup(self):
+        """Test that value history sums the per-category daily snapshots"""
+        today = timezone.localdate()
+        InventoryValuation.objects.all().delete()
+        InventoryValuation.objects.bulk_create([
+            InventoryValuation(date=today - timedelta(days=40), category='Tools', total_value=1, total_quantity=1),
+            InventoryValuation(date=today - timedelta(days=3), category='Food', total_value=5, total_quantity=3),
+            InventoryValuation(date=today - timedelta(days=1), category='Tools', total_value=10, total_quantity=2),
+        ])
+
+        # Days without a row carry each category's latest value forward,
+        # including Tools' row from before the window
+        response = self.client.get('/api/inventory/value_history/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(response.data[0]['date'], today - timedelta(days=29))
+        self.assertEqual(
+            [(point['value'], point['quantity']) for point in response.data[-5:]],
+            [(1, 1), (6, 4), (6, 4), (15, 5), (15, 5)]
+        )
+
+        response = self.client.get('/api/inventory/value_history/?days=90&category=Tools')
+        values = [point['value'] for point in response.data]
+        self.assertEqual(len(values), 41)
+        self.assertEqual(values[0], 1)
+        self.assertEqual(values[-3:], [1, 10, 10])
+
+        response = self.client.get('/api/inventory/value_history/?days=7')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delivery_updates_today_valuation(self):
+        """Test that stock movements adjust today's roll-up in place"""
+        self.item1.unit_price = 2
+        self.item1.save()
+        call_command('snapshot_inventory_value', stdout=StringIO())
+
+        today = timezone.localdate()
+        valuation = InventoryValuation.objects.get(date=today, category='Electronics')
+        self.assertEqual(valuation.total_value, 20)
+
+        shipment = Shipment.objects.create(
+            type=ShipmentType.INCOMING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number='VALUE001',
+            carrier='FedEx',
+            estimated_arrival=timezone.now() + timedelta(days=5)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item=self.item1, quantity=5, unit_price=2)
+        self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+
+        valuation.refresh_from_db()
+        self.assertEqual(valuation.total_quantity, 15)
+        self.assertEqual(valuation.total_value, 30)
+
+    def test_item_writes_update_today_valuation(self):
+        """Test that price, category and quantity edits and deletes move today's roll-up"""
+        def valuation(category):
+            row = InventoryValuation.objects.get(date=timezone.localdate(), category=category)
+            return row.item_count, row.total_quantity, row.total_value
+
+        # Creating the items in setUp seeded today's rows
+        self.assertEqual(valuation('Electronics'), (1, 10, 0))
+
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'unit_price': '2.50'})
+        self.assertEqual(valuation('Electronics'), (1, 10, 25))
+
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'category': 'Furniture', 'quantity': 12})
+        self.assertEqual(valuation('Electronics'), (0, 0, 0))
+        self.assertEqual(valuation('Furniture'), (2, 15, 30))
+
+        self.client.delete(f'/api/inventory/{self.item1.id}/')
+        self.assertEqual(valuation('Furniture'), (1, 3, 0))
+
+        InventoryItem.objects.all().delete()
+        self.assertEqual(valuation('Furniture'), (0, 0, 0))
+
+    def test_snapshot_command_backfills_from_ledger(self):
+        """Test rebuilding past days from stock movement balances"""
+        yesterday = timezone.now() - timedelta(days=1)
+        self.item1.unit_price = 3
+        self.item1.save()
+        InventoryItem.objects.filter(pk=self.item1.pk).update(created_at=yesterday - timedelta(days=1))
+        movement = StockMovement.objects.create(
+            item=self.item1, type='INITIAL', quantity_change=4, balance=4
+        )
+        StockMovement.objects.filter(pk=movement.pk).update(occurred_at=yesterday)
+
+        call_command('snapshot_inventory_value', '--backfill-days', '1', stdout=StringIO())
+
+        past = InventoryValuation.objects.get(date=timezone.localdate(yesterday), category='Electronics')
+        self.assertEqual(past.total_quantity, 4)
+        self.assertEqual(past.total_value, 12)
+        # item2 was created today, so it is not part of yesterday's snapshot
+        self.assertFalse(InventoryValuation.objects.filter(
+            date=timezone.localdate(yesterday), category='Furniture'
+        ).exists())
+
+        current = InventoryValuation.objects.get(date=timezone.localdate(), category='Electronics')
+        self.assertEqual(current.total_value, 30)
+
+    def test_import_csv_upserts_by_sku(self):
+        """Test importing a CSV file creates new items and updates existing ones"""
+        content = (
+            'name,sku,description,quantity,location,category,minimum_stock,unit_price\n'
+            'Renamed Item 1,SKU001,,25,A1,Electronics,5,2.50\n'
+            'New Item,SKU100,Fresh stock,7,C3,Office,2,1.00\n'
+            'Broken Item,SKU101,,-4,C3,Office,2,1.00\n'
+        ).encode()
+        upload = BytesIO(content)
+        upload.name = 'items.csv'
+
+        response = self.client.post('/api/inventory/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('quantity', response.data['errors'][0]['errors'])
+
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.name, 'Renamed Item 1')
+        self.assertEqual(self.item1.quantity, 25)
+        self.assertEqual(self.item1.created_by, self.user)
+        new_item = InventoryItem.objects.get(sku='SKU100')
+        self.assertEqual(new_item.created_by, self.user)
+        self.assertFalse(InventoryItem.objects.filter(sku='SKU101').exists())
+
+        # Quantity changes land in the ledger so history still reconciles
+        self.assertEqual(
+            StockMovement.objects.filter(item=self.item1, type=StockMovementType.ADJUSTMENT.value).get().quantity_change,
+            15
+        )
+        self.assertEqual(StockMovement.objects.get(item=new_item).type, StockMovementType.INITIAL.value)
+        today = InventoryValuation.objects.filter(date=timezone.localdate())
+        self.assertEqual(
+            list(today.filter(category__in=['Electronics', 'Office']).values_list(
+                'category', 'item_count', 'total_quantity', 'total_value'
+            )),
+            [('Electronics', 1, 25, Decimal('62.50')), ('Office', 1, 7, Decimal('1.00') * 7)]
+        )
+
+    def test_import_ndjson_reports_bad_lines(self):
+        """Test importing NDJSON keeps going past unparseable lines"""
+        content = (
+            '{"name": "Line Item", "sku": "SKU200", "quantity": 1, "location": "D4", "category": "Tools", "minimum_stock": 1}\n'
+            'not json\n'
+            '{"name": "Line Item", "sku": "SKU200", "quantity": 9, "location": "D4", "category": "Tools", "minimum_stock": 1}\n'
+        ).encode()
+        upload = BytesIO(content)
+        upload.name = 'items.ndjson'
+
+        response = self.client.post('/api/inventory/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        # The last row for a SKU wins
+        self.assertEqual(InventoryItem.objects.get(sku='SKU200').quantity, 9)
+
+    def test_import_requires_known_format(self):
+        """Test the import endpoint rejects files it cannot parse"""
+        upload = BytesIO(b'whatever')
+        upload.name = 'items.xlsx'
+        response = self.client.post('/api/inventory/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/inventory/import/', {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_inventory_command_batches(self):
+        """Test the import command writes in batches with one upsert per batch"""
+        lines = [
+            f'{{"name": "Bulk {i}", "sku": "BULK{i:03d}", "quantity": {i}, "location": "E5", "category": "Bulk", "minimum_stock": 0}}'
+            for i in range(10)
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            f.write('\n'.join(lines))
+        self.addCleanup(os.remove, f.name)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_inventory', f.name, '--batch-size', '4', stdout=out)
+
+        self.assertIn('Imported 10 new and 0 updated items', out.getvalue())
+        self.assertEqual(InventoryItem.objects.filter(category='Bulk').count(), 10)
+        upserts = [q for q in queries.captured_queries if 'ON CONFLICT' in q['sql'] and 'INTO "api_inventoryitem"' in q['sql']]
+        self.assertEqual(len(upserts), 3)
+        # Only the first batch counts the new category, to create its registry and
+        # today's valuation rows; later batches apply deltas
+        aggregates = [
+            q for q in queries.captured_queries if 'GROUP BY' in q['sql'] and 'FROM "api_inventoryitem"' in q['sql']
+        ]
+        self.assertEqual(len(aggregates), 2)
+        valuation = InventoryValuation.objects.get(date=timezone.localdate(), category='Bulk')
+        self.assertEqual((valuation.item_count, valuation.total_quantity), (10, 45))
+
+    def test_export_streams_filtered_items(self):
+        """Test exporting inventory as CSV and NDJSON with list filters applied"""
+        response = self.client.get('/api/inventory/export/?low_stock=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('inventory.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['sku'] for row in rows], ['SKU002'])
+        self.assertEqual(rows[0]['created_by__username'], 'testuser')
+
+        response = self.client.get('/api/inventory/export/?file_type=ndjson&category=Electronics')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(b'"sku":"SKU001"', lines[0])
+
+    def test_export_query_count_does_not_grow_with_rows(self):
+        """Test that export reads rows with a single query"""
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Export Item {i}', sku=f'EXP{i:04d}', quantity=1, location='Z9',
+                category='Export', minimum_stock=0, created_by=self.user
+            )
+            for i in range(50)
+        ])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/inventory/export/?file_type=ndjson')
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 52)
+        self.assertEqual(
+            len([q for q in context.captured_queries if 'api_inventoryitem' in q['sql']]),
+            1
+        )
+
+    def test_queries_use_indexes(self):
+        """Test that the SQL sent by list, paging, sync and dashboard views is served by indexes"""
+        self.create_low_stock_items(5, start=0)
+        next_page = self.client.get('/api/inventory/?page_size=2').data['next']
+        sync_cursor = self.client.get('/api/inventory/?updated_since=0&limit=2').data['cursor']
+        get_cache().clear()
+
+        views = [
+            ('/api/inventory/', 'api_inventoryitem'),
+            ('/api/inventory/?category=Electronics', 'api_inventoryitem'),
+            ('/api/inventory/?low_stock=true', 'api_inventoryitem'),
+            (next_page, 'api_inventoryitem'),
+            (f'/api/inventory/?updated_since={sync_cursor}&limit=2', 'api_inventoryitem'),
+            ('/api/inventory/low_stock_counts/', 'api_inventoryitem'),
+            (f'/api/inventory/{self.item1.id}/history/', 'api_stockmovement'),
+            ('/api/inventory/dashboard_data/', 'api_shipment'),
+        ]
+        for url, table in views:
+            for sql in self.get_view_queries(url, table):
+                with self.subTest(url=url, sql=sql):
+                    self.assert_uses_index(sql)
+
+    def test_dashboard_data_is_cached_until_a_write(self):
+        """Test that dashboard data is served from cache and dropped on writes"""
+        get_cache().clear()
+
+        first = self.client.get('/api/inventory/dashboard_data/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get('/api/inventory/dashboard_data/')
+        self.assertEqual(second.data, first.data)
+        self.assertFalse([q for q in context.captured_queries if 'api_shipment' in q['sql']])
+
+        stats = self.client.get('/api/inventory/dashboard_cache_stats/').data
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+
+        # Saving an item goes through signals
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'quantity': 500})
+        response = self.client.get('/api/inventory/dashboard_data/')
+        self.assertEqual(response.data['top_items'][0]['quantity'], 500)
+
+        # Deliveries change quantities with queryset updates, which send no signals
+        shipment = Shipment.objects.create(
+            type=ShipmentType.INCOMING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number='DASH001',
+            carrier='FedEx',
+            estimated_arrival=timezone.now() + timedelta(days=5)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item=self.item2, quantity=1000, unit_price=1)
+        self.client.get('/api/inventory/dashboard_data/')
+        self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+        response = self.client.get('/api/inventory/dashboard_data/')
+        self.assertEqual(response.data['top_items'][0]['quantity'], 1003)
+        self.assertEqual(response.data['outstanding_shipments'], 0)
+
+    def test_conditional_get_returns_not_modified(self):
+        """Test ETag revalidation on list, detail and custom actions"""
+        for url in ['/api/inventory/', f'/api/inventory/{self.item1.id}/', '/api/inventory/low_stock/']:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                etag = response['ETag']
+
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+                # Only the validator query, no page or nested user queries
+                self.assertEqual(
+                    len([q for q in context.captured_queries if 'api_inventoryitem' in q['sql']]),
+                    1
+                )
+
+        # Only a single object is revalidated by date: a delete leaves a
+        # collection's newest updated_at alone
+        later = http_date(time.time() + 60)
+        response = self.client.get(f'/api/inventory/{self.item1.id}/', HTTP_IF_MODIFIED_SINCE=later)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('Last-Modified', self.client.get(f'/api/inventory/{self.item1.id}/'))
+        response = self.client.get('/api/inventory/', HTTP_IF_MODIFIED_SINCE=later)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', response)
+
+        etag = self.client.get('/api/inventory/').headers['ETag']
+        # Another filter is another representation
+        self.assertNotEqual(self.client.get('/api/inventory/?category=Furniture').headers['ETag'], etag)
+
+        # Edits, inserts and deletes all invalidate the collection ETag
+        self.client.patch(f'/api/inventory/{self.item2.id}/', {'quantity': 4})
+        response = self.client.get('/api/inventory/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        self.client.delete(f'/api/inventory/{self.item2.id}/')
+        response = self.client.get('/api/inventory/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        # A page is validated by its own rows, without counting the collection
+        InventoryItem.objects.create(
+            name='Test Item 3', sku='SKU003', quantity=1, location='C3',
+            category='Tools', minimum_stock=0, created_by=self.user
+        )
+        with CaptureQueriesContext(connection) as context:
+            etag = self.client.get('/api/inventory/?page_size=1').headers['ETag']
+        self.assertFalse([q for q in context.captured_queries if 'COUNT(' in q['sql']])
+        InventoryItem.objects.create(
+            name='Test Item 9', sku='SKU009', quantity=1, location='C3',
+            category='Tools', minimum_stock=0, created_by=self.user
+        )
+        response = self.client.get('/api/inventory/?page_size=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'quantity': 4})
+        response = self.client.get('/api/inventory/?page_size=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(SYNC_SAFETY_WINDOW=0)
+    def test_delta_sync_returns_changes_and_deletes(self):
+        """Test syncing only rows changed or deleted since a cursor"""
+        response = self.client.get('/api/inventory/?updated_since=0')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({row['sku'] for row in response.data['results']}, {'SKU001', 'SKU002'})
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        cursor = response.data['cursor']
+
+        # Nothing changed since the cursor
+        response = self.client.get('/api/inventory/', {'updated_since': cursor})
+        self.assertEqual(response.data['results'], [])
+
+        self.client.patch(f'/api/inventory/{self.item1.id}/', {'quantity': 11})
+        self.client.delete(f'/api/inventory/{self.item2.id}/')
+        InventoryItem.objects.create(
+            name='Test Item 3', sku='SKU003', quantity=1, location='C3',
+            category='Tools', minimum_stock=0, created_by=self.user
+        )
+
+        response = self.client.get('/api/inventory/', {'updated_since': cursor, 'limit': 1})
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual([row['sku'] for row in response.data['results']], ['SKU001'])
+        self.assertEqual(response.data['deleted'], [self.item2.id])
+
+        response = self.client.get('/api/inventory/', {'updated_since': response.data['cursor'], 'limit': 1})
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual([row['sku'] for row in response.data['results']], ['SKU003'])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_delta_sync_seeks_the_index(self):
+        """Test that sync reads rows and tombstones from the cursor position in their indexes"""
+        self.create_low_stock_items(5, start=0)
+        InventoryItem.objects.filter(sku='BULK0000').delete()
+        InventoryItem.objects.filter(sku='BULK0001').delete()
+        cursor = self.client.get('/api/inventory/?updated_since=0&limit=1').data['cursor']
+
+        url = f'/api/inventory/?updated_since={cursor}&limit=1'
+        for table in ('api_inventoryitem', 'api_tombstone'):
+            sync_queries = [sql for sql in self.get_view_queries(url, table) if 'LIMIT' in sql]
+            with self.subTest(table=table):
+                self.assertEqual(len(sync_queries), 1)
+                self.assertRegex(sync_queries[0], r'"(updated|deleted)_at" >= ')
+                self.assert_seeks_index(sync_queries[0], table)
+
+    def test_delta_sync_rejects_bad_cursors(self):
+        """Test invalid and expired delta sync cursors"""
+        response = self.client.get('/api/inventory/?updated_since=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        old = (timezone.now() - timedelta(days=365), 0)
+        response = self.client.get('/api/inventory/', {'updated_since': DeltaSyncMixin.encode_sync_cursor(old, old)})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_sparse_fields_trim_payload_and_joins(self):
+        """Test that ?fields= limits both the response and the SQL"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/inventory/?fields=id,name,sku,quantity')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'sku', 'quantity'})
+        page_query = [q['sql'] for q in context.captured_queries if 'FROM "api_inventoryitem"' in q['sql'] and 'LIMIT' in q['sql']][0]
+        self.assertNotIn('auth_user', page_query)
+
+        response = self.client.get(f'/api/inventory/{self.item1.id}/?fields=name,created_by.username')
+        self.assertEqual(response.data, {'name': 'Test Item 1', 'created_by': {'username': 'testuser'}})
+
+        # Writes always answer with the full representation
+        response = self.client.patch(f'/api/inventory/{self.item1.id}/?fields=name', {'quantity': 12})
+        self.assertIn('quantity', response.data)
+
+    def test_fast_read_path_matches_serializer(self):
+        """Test that the values() read path renders the same bytes as the serializer"""
+        self.item2.unit_price = Decimal('12.5')
+        self.item2.save()
+        InventoryItem.objects.create(
+            name='Test Item 3',
+            sku='SKU003',
+            quantity=0,
+            location='C3',
+            category='Electronics',
+            minimum_stock=1,
+            unit_price=Decimal('0.10')
+        )
+
+        queryset = InventoryItem.objects.select_related('created_by', 'last_updated_by').order_by('id')
+        reader = InventoryItemReader()
+        self.assertEqual(
+            JSONRenderer().render(reader.serialize(reader.rows(queryset))),
+            JSONRenderer().render(InventoryItemSerializer(queryset, many=True).data)
+        )
+
+        # NULL decimals render as null, like the serializer skips them
+        class PriceSerializer(serializers.Serializer):
+            price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+
+        prices = [Decimal('1.5'), None, Decimal('0.10')]
+        self.assertEqual(
+            decimal_column(prices, models.DecimalField(max_digits=10, decimal_places=2, null=True)),
+            [row['price'] for row in PriceSerializer([{'price': price} for price in prices], many=True).data]
+        )
+
+        # ?expand= with no value forces the serializer path; cursors must match too
+        for query in ('page_size=2', 'search=Test&page_size=1'):
+            with CaptureQueriesContext(connection) as context:
+                fast = self.client.get(f'/api/inventory/?{query}')
+            regular = self.client.get(f'/api/inventory/?{query}&expand=')
+            self.assertEqual(fast.content, regular.content.replace(b'expand=&', b''))
+            # Only the nested user columns are read, not whole user rows
+            self.assertFalse([q for q in context.captured_queries if '"auth_user"."password"' in q['sql']])
+
+        fast = self.client.get('/api/inventory/?updated_since=0')
+        regular = self.client.get('/api/inventory/?updated_since=0&expand=')
+        self.assertEqual(fast.data['results'], regular.data['results'])
+
+    def test_fast_json_renderer_matches_json_renderer(self):
+        """Test that FastJSONRenderer produces the same bytes as JSONRenderer"""
+        data = {
+            'price': Decimal('12.50'),
+            'created_at': timezone.now(),
+            'day': timezone.localdate(),
+            'id': uuid.uuid4(),
+            'name': 'Caf\u00e9 \u2028 line',
+            1: [None, True, 3],
+            'results': InventoryItemSerializer(InventoryItem.objects.all(), many=True).data,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # Indented output goes through the stdlib encoder
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1000)
+    def test_responses_are_compressed_when_accepted(self):
+        """Test negotiated gzip compression of API responses"""
+        for index in range(10):
+            InventoryItem.objects.create(
+                name=f'Bulk Item {index}', sku=f'BULK{index:03}', quantity=1,
+                location='Z9', category='Electronics', minimum_stock=0
+            )
+
+        plain = self.client.get('/api/inventory/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/api/inventory/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+
+        # Refused codings and small bodies are sent as they are
+        response = self.client.get('/api/inventory/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.get('/api/inventory/categories/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+        # Streaming exports are compressed too
+        response = self.client.get('/api/inventory/export/?file_type=csv', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'BULK009', gzip.decompress(b''.join(response.streaming_content)))
+
+        self.assertEqual(negotiate_encoding('gzip;q=0.5, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('*;q=0.1, br;q=0', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(negotiate_encoding('', ('br', 'gzip')))
+
+    def test_async_views_match_sync_endpoints(self):
+        """Test that the async variants answer like the synchronous endpoints"""
+        pairs = [
+            ('/api/inventory/dashboard_data/', '/api/async/dashboard/'),
+            ('/api/inventory/low_stock_counts/', '/api/async/low-stock-counts/'),
+            ('/api/inventory/value_history/?days=90', '/api/async/value-history/?days=90'),
+        ]
+        for sync_url, async_url in pairs:
+            expected = self.client.get(sync_url)
+            # Computed from scratch rather than served from the dashboard cache
+            get_cache().clear()
+            response = self.client.get(async_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, expected.content)
+
+        response = self.client.get('/api/async/stats/')
+        self.assertEqual(response.json(), {'total_inventory_items': 2, 'outstanding_shipments': 0})
+
+        with mock.patch('api.views.async_views.aget_system_stats', side_effect=DatabaseError):
+            response = self.client.get('/api/async/stats/')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('error', response.json())
+
+        # Pool threads drop stale connections around every query, like requests do
+        with mock.patch('api.concurrency.close_old_connections') as close_old_connections:
+            self.assertEqual(_run_query(lambda: 1), 1)
+        self.assertEqual(close_old_connections.call_count, 2)
+
+        response = self.client.get('/api/async/value-history/?days=7')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/async/stats/')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.client.credentials()
+        response = self.client.get('/api/async/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(EVENT_STREAM_HEARTBEAT=0.01)
+    def test_event_stream_resumes_from_last_event_id(self):
+        """Test that item changes are published and replayed to reconnecting streams"""
+        start = buffer.latest()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/inventory/{self.item1.id}/', {'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        events, complete = buffer.since(start)
+        self.assertTrue(complete)
+        self.assertEqual([event[1:] for event in events], [
+            ('quantity', {'id': self.item1.id, 'quantity': 3, 'change': -7}),
+            ('low_stock', {'id': self.item1.id, 'is_low_stock': True}),
+        ])
+
+        def read(response, count):
+            async def take():
+                content = response.streaming_content
+                return [await anext(content) for _ in range(count)]
+            return async_to_sync(take)()
+
+        def get(url, token=self.token, **headers):
+            if token:
+                headers['Authorization'] = f'Bearer {token}'
+            return async_to_sync(AsyncClient().get)(url, headers=headers)
+
+        response = get('/api/events/', **{'Last-Event-ID': buffer.format_id(start)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        retry, quantity, low_stock, keepalive = read(response, 4)
+        self.assertEqual(retry, b'retry: 10\n\n')
+        self.assertEqual(quantity, (
+            f'id: {buffer.format_id(start + 1)}\nevent: quantity\n'
+            f'data: {{"id":{self.item1.id},"quantity":3,"change":-7}}\n\n'
+        ).encode())
+        self.assertIn(b'event: low_stock', low_stock)
+        self.assertEqual(keepalive, b': keepalive\n\n')
+
+        # An id from before a restart, or from another worker, asks the client to reload
+        response = get('/api/events/?last_event_id=0-1')
+        self.assertEqual(read(response, 2)[1], f'id: {buffer.format_id(buffer.latest())}\nevent: reset\ndata: {{}}\n\n'.encode())
+        other_worker = EventBuffer(10)
+        self.assertNotEqual(other_worker.epoch, buffer.epoch)
+        response = get(f'/api/events/?last_event_id={other_worker.format_id(start + 1)}')
+        self.assertIn(b'event: reset', read(response, 2)[1])
+
+        # EventSource cannot send headers, so the token may be in the query string
+        self.assertEqual(get('/api/events/', token=None).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = get(f'/api/events/?access_token={self.token}', token=None)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Under WSGI the stream would be collected forever before sending anything
+        self.assertEqual(self.client.get('/api/events/').status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_populate_db_is_deterministic_for_a_seed(self):
+        """Test that populate_db replaces the data and repeats it for the same seed"""
+        def populate(seed):
+            call_command('populate_db', '--items', '40', '--shipments', '60', '--users', '2',
+                         '--seed', str(seed), '--batch-size', '25', stdout=StringIO())
+            return (
+                list(InventoryItem.objects.order_by('sku').values_list('sku', 'quantity', 'unit_price', 'location')),
+                list(Shipment.objects.order_by('tracking_number').values_list('tracking_number', 'status', 'type')),
+                list(ShipmentItem.objects.order_by('shipment__tracking_number', 'item__sku').values_list(
+                    'shipment__tracking_number', 'item__sku', 'quantity'
+                )),
+            )
+
+        first = populate(1)
+        self.assertEqual(first, populate(1))
+        self.assertNotEqual(first, populate(2))
+
+        self.assertEqual(InventoryItem.objects.count(), 40)
+        self.assertFalse(InventoryItem.objects.filter(sku__in=['SKU001', 'SKU002']).exists())
+        self.assertEqual(Shipment.objects.count(), 60)
+        self.assertEqual(StockMovement.objects.filter(type=StockMovementType.INITIAL.value).count(), 40)
+        self.assertEqual(sum(Category.objects.values_list('item_count', flat=True)), 40)
+        # Shipments due long ago have all been completed
+        old = Shipment.objects.filter(estimated_arrival__lt=timezone.now() - timedelta(days=1))
+        self.assertTrue(old.exists())
+        self.assertFalse(old.exclude(status__in=[ShipmentStatus.DELIVERED.value, ShipmentStatus.CANCELLED.value]).exists())
+
+    def test_populate_db_validates_options(self):
+        """Test that populate_db rejects counts and fractions it cannot generate from"""
+        for args in (['--lines-per-shipment', '0'], ['--batch-size', '0'], ['--items', '0'],
+                     ['--hot-share', '1.5'], ['--users', '-1']):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                call_command('populate_db', *args, stdout=StringIO())
+
+        # Every line going to the single hot item still fills multi-line shipments
+        out = StringIO()
+        call_command('populate_db', '--items', '20', '--shipments', '30', '--hot-share', '1.0',
+                     '--seed', '1', stdout=out)
+        self.assertEqual(Shipment.objects.count(), 30)
+        self.assertIn('- 30 shipments', out.getvalue())
+        self.assertTrue(ShipmentItem.objects.values('shipment').annotate(lines=Count('id')).filter(lines__gt=1).exists())
\ No newline at end of file
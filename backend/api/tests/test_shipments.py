@@ -1,14 +1,29 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+import threading
+import time
+from unittest import mock
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework import status
-from api.models import Shipment, ShipmentItem
+from api.models import Shipment, ShipmentItem, StockMovement
 from django.utils import timezone
 from datetime import timedelta
 from api.models.enums import ShipmentType, ShipmentStatus
 from api.models import InventoryItem
+from django.db import connection, transaction, OperationalError
+from django.db.models import Prefetch
+from api.delivery import apply_deliveries, InsufficientStock
+from api.views.shipment_views import ShipmentViewSet
+from api.events import buffer
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from api.serializers import ShipmentSerializer
+from api.serializers.fast import ShipmentReader
+from .helpers import QueryAssertionsMixin
 
-class ShipmentTests(TestCase):
+class ShipmentTests(QueryAssertionsMixin, TestCase):
     def setUp(self):
         self.client = APIClient()
         self.user = User.objects.create_user(
@@ -137,7 +152,7 @@ class ShipmentTests(TestCase):
 
         response = self.client.get('/api/shipments/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_filter_shipments(self):
         """Test filtering shipments by type and status"""
@@ -161,11 +176,650 @@ class ShipmentTests(TestCase):
         # Filter by type
         response = self.client.get('/api/shipments/?type=IN')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['type'], ShipmentType.INCOMING.value)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['type'], ShipmentType.INCOMING.value)
 
         # Filter by status
         response = self.client.get('/api/shipments/?status=DELIVERED')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], ShipmentStatus.DELIVERED.value) 
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], ShipmentStatus.DELIVERED.value)
+
+    def test_list_shipments_paginates_with_cursor(self):
+        """Test walking the shipment list newest first with keyset cursors"""
+        created_at = timezone.now()
+        for i in range(5):
+            shipment = Shipment.objects.create(
+                type=ShipmentType.INCOMING.value,
+                status=ShipmentStatus.PENDING.value,
+                tracking_number=f'PAGE{i:03d}',
+                carrier='FedEx',
+                estimated_arrival=timezone.now() + timedelta(days=5)
+            )
+            # Two shipments share a timestamp to exercise the id tie-breaker
+            Shipment.objects.filter(pk=shipment.pk).update(
+                created_at=created_at - timedelta(minutes=i // 2)
+            )
+
+        tracking_numbers = []
+        response = self.client.get('/api/shipments/?page_size=2')
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            tracking_numbers.extend(s['tracking_number'] for s in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(tracking_numbers, ['PAGE000', 'PAGE001', 'PAGE002', 'PAGE003', 'PAGE004'])
+
+    def test_cursor_pages_seek_the_index(self):
+        """Test that later shipment pages start reading the index at the cursor"""
+        self.create_shipments(5, start=0)
+        for ordering in ('-created_at', 'created_at'):
+            url = self.client.get(f'/api/shipments/?page_size=2&ordering={ordering}').data['next']
+            page_queries = [sql for sql in self.get_view_queries(url, 'api_shipment') if 'LIMIT' in sql]
+            with self.subTest(ordering=ordering):
+                # The ETag reads the page's keys with the same seek as the page itself
+                self.assertEqual(len(page_queries), 2)
+                for sql in page_queries:
+                    self.assert_seeks_index(sql, 'api_shipment')
+
+    def test_list_shipments_rejects_unindexed_ordering(self):
+        """Test that only whitelisted orderings are accepted"""
+        response = self.client.get('/api/shipments/?ordering=carrier')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def create_shipments(self, count, start):
+        """Create shipments carrying both inventory items"""
+        for i in range(start, start + count):
+            shipment = Shipment.objects.create(
+                type=ShipmentType.INCOMING.value,
+                status=ShipmentStatus.PENDING.value,
+                tracking_number=f'BULK{i:04d}',
+                carrier='FedEx',
+                estimated_arrival=timezone.now() + timedelta(days=5),
+                created_by=self.user,
+                updated_by=self.user
+            )
+            ShipmentItem.objects.bulk_create([
+                ShipmentItem(shipment=shipment, item=self.inventory1, quantity=1, unit_price=1),
+                ShipmentItem(shipment=shipment, item=self.inventory2, quantity=1, unit_price=1),
+            ])
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        """Test that shipment read paths load items and users in constant queries"""
+        urls = [
+            '/api/shipments/',
+            '/api/shipments/recent/',
+            f'/api/shipments/item_history/?item_id={self.inventory1.id}',
+        ]
+
+        self.create_shipments(3, start=0)
+        baseline = {url: self.count_queries(url) for url in urls}
+
+        self.create_shipments(10, start=3)
+        for url in urls:
+            self.assertEqual(self.count_queries(url), baseline[url], url)
+
+    def test_item_history_lists_each_shipment_once(self):
+        """Test that item history returns one entry per shipment"""
+        self.create_shipments(2, start=0)
+
+        response = self.client.get(f'/api/shipments/item_history/?item_id={self.inventory1.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data[0]['shipment_items']), 2)
+
+    def test_failed_delivery_rolls_back_inventory(self):
+        """Test that a delivery short on stock leaves inventory and ledger untouched"""
+        shipment = Shipment.objects.create(
+            type=ShipmentType.OUTGOING.value,
+            status=ShipmentStatus.PENDING.value,
+            tracking_number='SHORT001',
+            carrier='UPS',
+            estimated_arrival=timezone.now() + timedelta(days=3)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item=self.inventory1, quantity=5, unit_price=1)
+        ShipmentItem.objects.create(shipment=shipment, item=self.inventory2, quantity=50, unit_price=1)
+
+        response = self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.inventory1.refresh_from_db()
+        shipment.refresh_from_db()
+        self.assertEqual(self.inventory1.quantity, 10)
+        self.assertEqual(shipment.status, ShipmentStatus.PENDING.value)
+        self.assertFalse(StockMovement.objects.filter(shipment=shipment).exists())
+
+    def test_delivery_reports_every_short_item(self):
+        """Test that a short delivery lists all short items and changes nothing"""
+        shipment = Shipment.objects.create(
+            type=ShipmentType.OUTGOING.value,
+            status=ShipmentStatus.IN_TRANSIT.value,
+            tracking_number='SHORT002',
+            carrier='UPS',
+            estimated_arrival=timezone.now() + timedelta(days=3)
+        )
+        ShipmentItem.objects.create(shipment=shipment, item=self.inventory1, quantity=11, unit_price=1)
+        ShipmentItem.objects.create(shipment=shipment, item=self.inventory2, quantity=12, unit_price=1)
+
+        response = self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [(item['id'], item['available'], item['requested']) for item in response.data['short_items']],
+            [(self.inventory1.id, 10, 11), (self.inventory2.id, 10, 12)]
+        )
+
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.status, ShipmentStatus.IN_TRANSIT.value)
+        self.assertIsNone(shipment.actual_arrival)
+
+    def test_delivery_uses_constant_queries(self):
+        """Test that delivering a shipment does not issue queries per line"""
+        def deliver(line_count, tracking_number):
+            shipment = Shipment.objects.create(
+                type=ShipmentType.INCOMING.value,
+                status=ShipmentStatus.PENDING.value,
+                tracking_number=tracking_number,
+                carrier='FedEx',
+                estimated_arrival=timezone.now() + timedelta(days=5)
+            )
+            items = InventoryItem.objects.bulk_create([
+                InventoryItem(name=f'{tracking_number} {i}', sku=f'{tracking_number}-{i}', quantity=0,
+                              location='A1', category='Tools', minimum_stock=0)
+                for i in range(line_count)
+            ])
+            ShipmentItem.objects.bulk_create([
+                ShipmentItem(shipment=shipment, item=item, quantity=1, unit_price=1) for item in items
+            ])
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    f'/api/shipments/{shipment.id}/update_status/',
+                    {'status': ShipmentStatus.DELIVERED.value}
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        # Warm up the valuation rows so both runs take the same path
+        deliver(1, 'WARM')
+        self.assertEqual(deliver(3, 'SMALL'), deliver(30, 'LARGE'))
+
+
+    def create_shipment(self, tracking_number, shipment_type, shipment_status, lines):
+        shipment = Shipment.objects.create(
+            type=shipment_type,
+            status=shipment_status,
+            tracking_number=tracking_number,
+            carrier='FedEx',
+            estimated_arrival=timezone.now() + timedelta(days=5)
+        )
+        ShipmentItem.objects.bulk_create([
+            ShipmentItem(shipment=shipment, item=item, quantity=quantity, unit_price=1)
+            for item, quantity in lines
+        ])
+        return shipment
+
+    def test_bulk_update_status(self):
+        """Test applying many status transitions with per-shipment results"""
+        incoming = self.create_shipment('BULK-IN', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 5), (self.inventory2, 5)])
+        outgoing = self.create_shipment('BULK-OUT', ShipmentType.OUTGOING.value, ShipmentStatus.IN_TRANSIT.value,
+                                        [(self.inventory1, 8)])
+        too_big = self.create_shipment('BULK-BIG', ShipmentType.OUTGOING.value, ShipmentStatus.PENDING.value,
+                                       [(self.inventory2, 100)])
+        transit = self.create_shipment('BULK-TRANSIT', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                       [(self.inventory1, 1)])
+        delivered = self.create_shipment('BULK-DONE', ShipmentType.INCOMING.value, ShipmentStatus.DELIVERED.value,
+                                         [(self.inventory1, 1)])
+
+        response = self.client.post('/api/shipments/bulk_update_status/', {'updates': [
+            {'id': incoming.id, 'status': ShipmentStatus.DELIVERED.value},
+            {'tracking_number': 'BULK-OUT', 'status': ShipmentStatus.DELIVERED.value},
+            {'id': too_big.id, 'status': ShipmentStatus.DELIVERED.value},
+            {'tracking_number': 'BULK-TRANSIT', 'status': ShipmentStatus.IN_TRANSIT.value},
+            {'id': delivered.id, 'status': ShipmentStatus.CANCELLED.value},
+            {'id': transit.id, 'status': ShipmentStatus.CANCELLED.value},
+            {'tracking_number': 'MISSING', 'status': ShipmentStatus.DELIVERED.value},
+            {'id': incoming.id, 'status': 'LOST'},
+            {'id': 2 ** 64, 'status': ShipmentStatus.DELIVERED.value},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['failed'], 6)
+
+        results = response.data['results']
+        self.assertEqual([result['updated'] for result in results],
+                         [True, True, False, True, False, False, False, False, False])
+        self.assertEqual(results[1]['id'], outgoing.id)
+        self.assertEqual(results[2]['error'], 'Not enough inventory for item Test Item 2')
+        self.assertEqual(results[4]['error'], 'Cannot change status from DELIVERED')
+        self.assertEqual(results[5]['error'], 'Duplicate update for this shipment')
+        self.assertEqual(results[6]['error'], 'Shipment not found')
+        self.assertEqual(results[8]['error'], 'Shipment not found')
+        self.assertNotIn('shipment_items', results[0])
+
+        self.inventory1.refresh_from_db()
+        self.inventory2.refresh_from_db()
+        self.assertEqual(self.inventory1.quantity, 10 + 5 - 8)
+        self.assertEqual(self.inventory2.quantity, 10 + 5)
+
+        statuses = dict(Shipment.objects.values_list('tracking_number', 'status'))
+        self.assertEqual(statuses['BULK-IN'], ShipmentStatus.DELIVERED.value)
+        self.assertEqual(statuses['BULK-OUT'], ShipmentStatus.DELIVERED.value)
+        self.assertEqual(statuses['BULK-BIG'], ShipmentStatus.PENDING.value)
+        self.assertEqual(statuses['BULK-TRANSIT'], ShipmentStatus.IN_TRANSIT.value)
+
+    def test_bulk_update_status_rejects_bad_payload(self):
+        """Test that the bulk endpoint requires a list of updates"""
+        response = self.client.post('/api/shipments/bulk_update_status/', {'updates': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/shipments/bulk_update_status/', {'id': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Values that cannot be looked up are rejected before touching the database
+        for entry in ({'tracking_number': ['TRACK'], 'status': ShipmentStatus.DELIVERED.value},
+                      {'tracking_number': {'a': 1}, 'status': ShipmentStatus.DELIVERED.value},
+                      {'id': True, 'status': ShipmentStatus.DELIVERED.value}):
+            with self.subTest(entry=entry):
+                response = self.client.post('/api/shipments/bulk_update_status/', {'updates': [entry]}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.data['results'][0])
+
+    def test_bulk_update_status_conflicts_with_a_concurrent_update(self):
+        """Test that a shipment delivered by another request meanwhile is not delivered twice"""
+        shipment = self.create_shipment('RACE', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 5)])
+
+        def deliver_concurrently(shipments, user=None):
+            apply_deliveries(shipments, user=user)
+            # Another request finishes delivering the same shipment first
+            Shipment.objects.filter(pk=shipment.pk).update(status=ShipmentStatus.DELIVERED.value)
+
+        with mock.patch('api.views.shipment_views.apply_deliveries', deliver_concurrently):
+            response = self.client.post('/api/shipments/bulk_update_status/', [
+                {'id': shipment.id, 'status': ShipmentStatus.DELIVERED.value},
+            ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # Everything the request did was rolled back
+        self.inventory1.refresh_from_db()
+        self.assertEqual(self.inventory1.quantity, 10)
+        self.assertEqual(Shipment.objects.get(pk=shipment.pk).status, ShipmentStatus.PENDING.value)
+
+    def test_bulk_update_status_fails_deliveries_it_cannot_place(self):
+        """Test that deliveries are failed rather than retried forever when none can be dropped"""
+        shipment = self.create_shipment('STUCK', ShipmentType.OUTGOING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 50)])
+        with mock.patch.object(ShipmentViewSet, 'get_oversold_shipments', return_value=[]):
+            response = self.client.post('/api/shipments/bulk_update_status/', [
+                {'id': shipment.id, 'status': ShipmentStatus.DELIVERED.value},
+            ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['results'][0]['error'], 'Not enough inventory for item Test Item 1')
+
+    def test_bulk_update_status_uses_constant_queries(self):
+        """Test that bulk transitions do not issue queries per shipment"""
+        def run(count, prefix):
+            shipments = [
+                self.create_shipment(f'{prefix}{i}', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                     [(self.inventory1, 1)])
+                for i in range(count)
+            ]
+            payload = [{'id': shipment.id, 'status': ShipmentStatus.DELIVERED.value} for shipment in shipments]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/shipments/bulk_update_status/', payload, format='json')
+            self.assertEqual(response.data['updated'], count)
+            return len(context.captured_queries)
+
+        run(1, 'WARM')
+        self.assertEqual(run(2, 'SMALL'), run(20, 'LARGE'))
+
+    def test_update_shipment_items_writes_only_changes(self):
+        """Test that updating lines keeps unchanged ones and batches the writes"""
+        inventory3 = InventoryItem.objects.create(
+            name='Test Item 3', sku='SKU003', quantity=10, minimum_stock=5, location='C3', category='Tools'
+        )
+        shipment = self.create_shipment('LINES001', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 1), (self.inventory2, 2)])
+        kept = ShipmentItem.objects.get(shipment=shipment, item=self.inventory1)
+
+        data = {
+            'shipment_items': [
+                {'item': self.inventory1.id, 'quantity': 4, 'unit_price': 1},
+                {'item': inventory3.id, 'quantity': 6, 'unit_price': 2},
+            ]
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(f'/api/shipments/{shipment.id}/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        lines = {line.item_id: line for line in ShipmentItem.objects.filter(shipment=shipment)}
+        self.assertEqual(set(lines), {self.inventory1.id, inventory3.id})
+        self.assertEqual(lines[self.inventory1.id].pk, kept.pk)
+        self.assertEqual(lines[self.inventory1.id].quantity, 4)
+        self.assertEqual(lines[inventory3.id].quantity, 6)
+
+        writes = [
+            q['sql'] for q in context.captured_queries
+            if 'api_shipmentitem' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(writes), 3)
+
+    def test_create_shipment_inserts_lines_in_bulk(self):
+        """Test that creating a shipment inserts all of its lines at once"""
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Line Item {i}', sku=f'LINE{i:03d}', quantity=10, minimum_stock=0,
+                          location='L1', category='Tools')
+            for i in range(30)
+        ])
+        data = {
+            'type': ShipmentType.INCOMING.value,
+            'status': ShipmentStatus.PENDING.value,
+            'tracking_number': 'LINES002',
+            'carrier': 'FedEx',
+            'estimated_arrival': (timezone.now() + timedelta(days=5)).isoformat(),
+            'shipment_items': [{'item': item.id, 'quantity': 1, 'unit_price': 1} for item in items]
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/shipments/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ShipmentItem.objects.filter(shipment_id=response.data['id']).count(), 30)
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "api_shipmentitem"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_create_shipment_resolves_items_in_one_query(self):
+        """Test that validating lines loads every inventory item at once"""
+        def run(count, tracking_number):
+            items = InventoryItem.objects.bulk_create([
+                InventoryItem(name=f'{tracking_number} {i}', sku=f'{tracking_number}-{i:03d}', quantity=10,
+                              minimum_stock=0, location='L1', category='Tools')
+                for i in range(count)
+            ])
+            data = {
+                'type': ShipmentType.INCOMING.value,
+                'status': ShipmentStatus.PENDING.value,
+                'tracking_number': tracking_number,
+                'carrier': 'FedEx',
+                'estimated_arrival': (timezone.now() + timedelta(days=5)).isoformat(),
+                'shipment_items': [{'item': item.id, 'quantity': 1, 'unit_price': 1} for item in items]
+            }
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/shipments/', data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len([q for q in context.captured_queries if 'FROM "api_inventoryitem"' in q['sql']])
+
+        self.assertEqual(run(2, 'RESOLVE-SMALL'), 1)
+        self.assertEqual(run(40, 'RESOLVE-LARGE'), 1)
+
+    def test_create_shipment_reports_all_bad_lines(self):
+        """Test that every missing and repeated item is reported together"""
+        data = {
+            'type': ShipmentType.INCOMING.value,
+            'status': ShipmentStatus.PENDING.value,
+            'tracking_number': 'BADLINES',
+            'carrier': 'FedEx',
+            'estimated_arrival': (timezone.now() + timedelta(days=5)).isoformat(),
+            'shipment_items': [
+                {'item': self.inventory1.id, 'quantity': 1, 'unit_price': 1},
+                {'item': 99998, 'quantity': 1, 'unit_price': 1},
+                {'item': self.inventory1.id, 'quantity': 2, 'unit_price': 1},
+                {'item': 99999, 'quantity': 1, 'unit_price': 1},
+                {'item': 2 ** 64, 'quantity': 1, 'unit_price': 1},
+            ]
+        }
+        response = self.client.post('/api/shipments/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['shipment_items']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1]['item'][0].code, 'does_not_exist')
+        self.assertIn('more than once', str(errors[2]['item'][0]))
+        self.assertEqual(errors[3]['item'][0].code, 'does_not_exist')
+        self.assertEqual(errors[4]['item'][0].code, 'does_not_exist')
+        self.assertFalse(Shipment.objects.filter(tracking_number='BADLINES').exists())
+
+    def test_export_streams_filtered_shipments(self):
+        """Test exporting shipments as NDJSON and CSV with list filters applied"""
+        self.create_shipment('EXPORT-IN', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                             [(self.inventory1, 2), (self.inventory2, 3)])
+        self.create_shipment('EXPORT-OUT', ShipmentType.OUTGOING.value, ShipmentStatus.PENDING.value,
+                             [(self.inventory1, 1)])
+
+        response = self.client.get('/api/shipments/export/?file_type=ndjson&type=IN')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['tracking_number'] for row in rows], ['EXPORT-IN'])
+        self.assertEqual(rows[0]['item_count'], 2)
+        self.assertEqual(Decimal(rows[0]['total_value']), 5)
+
+        response = self.client.get('/api/shipments/export/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'type', 'status'])
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get('/api/shipments/export/?file_type=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queries_use_indexes(self):
+        """Test that the SQL sent by shipment list, paging and sync views is served by indexes"""
+        self.create_shipments(5, start=0)
+        next_page = self.client.get('/api/shipments/?page_size=2').data['next']
+        sync_cursor = self.client.get('/api/shipments/?updated_since=0&limit=2').data['cursor']
+
+        urls = [
+            '/api/shipments/',
+            f'/api/shipments/?status={ShipmentStatus.PENDING.value}',
+            f'/api/shipments/?type={ShipmentType.INCOMING.value}',
+            next_page,
+            f'/api/shipments/?updated_since={sync_cursor}&limit=2',
+            '/api/shipments/recent/',
+        ]
+        for url in urls:
+            for sql in self.get_view_queries(url, 'api_shipment'):
+                with self.subTest(url=url, sql=sql):
+                    self.assert_uses_index(sql)
+
+    def test_conditional_get_follows_status_changes(self):
+        """Test that shipment ETags change when a status update writes through a queryset"""
+        shipment = self.create_shipment('ETAG001', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 1)])
+        Shipment.objects.filter(pk=shipment.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        for url in ['/api/shipments/', f'/api/shipments/{shipment.id}/', '/api/shipments/recent/']:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+                self.client.post(f'/api/shipments/{shipment.id}/update_status/',
+                                 {'status': ShipmentStatus.IN_TRANSIT.value})
+                Shipment.objects.filter(pk=shipment.pk).update(status=ShipmentStatus.PENDING.value)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_delta_sync_reports_deleted_shipments(self):
+        """Test that deleted shipments come through delta sync as tombstones"""
+        shipment = self.create_shipment('SYNC001', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                        [(self.inventory1, 1)])
+        response = self.client.get('/api/shipments/?updated_since=0')
+        self.assertEqual([row['tracking_number'] for row in response.data['results']], ['SYNC001'])
+        self.assertEqual(len(response.data['results'][0]['shipment_items']), 1)
+
+        Shipment.objects.filter(pk=shipment.pk).delete()
+        response = self.client.get('/api/shipments/', {'updated_since': response.data['cursor']})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['deleted'], [shipment.id])
+
+    def test_sparse_fields_and_expand(self):
+        """Test ?fields= and ?expand= on shipments and the queries they need"""
+        self.create_shipment('FIELDS001', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                             [(self.inventory1, 1), (self.inventory2, 2)])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/shipments/?fields=id,tracking_number')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'tracking_number'})
+        self.assertFalse([q for q in context.captured_queries if 'api_shipmentitem' in q['sql']])
+
+        url = '/api/shipments/?fields=tracking_number,shipment_items.quantity,shipment_items.item.name' \
+              '&expand=shipment_items.item'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        lines = sorted(response.data['results'][0]['shipment_items'], key=lambda line: line['quantity'])
+        self.assertEqual(lines, [
+            {'quantity': 1, 'item': {'name': 'Test Item 1'}},
+            {'quantity': 2, 'item': {'name': 'Test Item 2'}},
+        ])
+        # Items are joined into the line item prefetch, not loaded per line
+        self.assertFalse([q for q in context.captured_queries if q['sql'].startswith('SELECT "api_inventoryitem"')])
+
+        response = self.client.get('/api/shipment-items/?expand=item&fields=id,item.sku')
+        self.assertEqual({line['item']['sku'] for line in response.data}, {'SKU001', 'SKU002'})
+
+    def test_fast_read_path_matches_serializer(self):
+        """Test that the values() read path renders the same bytes as the serializer"""
+        first = self.create_shipment('FAST001', ShipmentType.INCOMING.value, ShipmentStatus.PENDING.value,
+                                     [(self.inventory2, 2), (self.inventory1, 1)])
+        first.created_by = self.user
+        first.save()
+        second = self.create_shipment('FAST002', ShipmentType.OUTGOING.value, ShipmentStatus.DELIVERED.value,
+                                      [(self.inventory1, 3)])
+        second.actual_arrival = timezone.now()
+        second.save()
+        ShipmentItem.objects.filter(shipment=second).update(unit_price=Decimal('19.9'))
+        self.create_shipment('FAST003', ShipmentType.INCOMING.value, ShipmentStatus.CANCELLED.value, [])
+
+        queryset = Shipment.objects.select_related('created_by', 'updated_by').prefetch_related(
+            Prefetch('shipment_items', queryset=ShipmentItem.objects.order_by('id'))
+        ).order_by('id')
+        reader = ShipmentReader()
+        self.assertEqual(
+            JSONRenderer().render(reader.serialize(reader.rows(queryset))),
+            JSONRenderer().render(ShipmentSerializer(queryset, many=True).data)
+        )
+
+        # ?expand= with no value forces the serializer path; cursors must match too
+        fast = self.client.get('/api/shipments/?page_size=2')
+        regular = self.client.get('/api/shipments/?page_size=2&expand=')
+        self.assertEqual(fast.content, regular.content.replace(b'expand=&', b''))
+
+        fast = self.client.get('/api/shipments/?updated_since=0')
+        regular = self.client.get('/api/shipments/?updated_since=0&expand=')
+        self.assertEqual(fast.data['results'], regular.data['results'])
+
+    def test_status_changes_publish_events(self):
+        """Test that status transitions and delivered quantities are published on commit"""
+        shipment = self.create_shipment(
+            'EVENTS1', ShipmentType.OUTGOING.value, ShipmentStatus.PENDING.value, [(self.inventory1, 6)]
+        )
+        start = buffer.latest()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value})
+        self.assertEqual([event[1:] for event in buffer.since(start)[0]], [
+            ('status', {'id': shipment.id, 'status': ShipmentStatus.DELIVERED.value, 'previous': ShipmentStatus.PENDING.value}),
+            ('quantity', {'id': self.inventory1.id, 'quantity': 4, 'change': -6}),
+            ('low_stock', {'id': self.inventory1.id, 'is_low_stock': True}),
+        ])
+
+        # Nothing is published when the transaction rolls back
+        shipment = self.create_shipment(
+            'EVENTS2', ShipmentType.OUTGOING.value, ShipmentStatus.PENDING.value, [(self.inventory2, 50)]
+        )
+        start = buffer.latest()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/shipments/{shipment.id}/update_status/', {'status': ShipmentStatus.DELIVERED.value}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(buffer.since(start)[0], [])
+
+
+class ShipmentDeliveryConcurrencyTests(TransactionTestCase):
+    """Deliveries running in parallel threads against the same item"""
+
+    def run_in_parallel(self, shipments):
+        """Deliver each shipment in its own thread, retrying while the database is locked"""
+        barrier = threading.Barrier(len(shipments))
+        outcomes = []
+
+        def deliver(shipment):
+            barrier.wait()
+            try:
+                for _ in range(500):
+                    try:
+                        with transaction.atomic():
+                            apply_deliveries([shipment])
+                        outcomes.append('delivered')
+                        return
+                    except InsufficientStock:
+                        outcomes.append('short')
+                        return
+                    except OperationalError:
+                        # SQLite serializes writers; PostgreSQL waits on row locks instead
+                        time.sleep(0.005)
+                outcomes.append('gave up')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=deliver, args=(shipment,)) for shipment in shipments]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def create_shipments(self, item, count, shipment_type, quantity):
+        shipments = []
+        for i in range(count):
+            shipment = Shipment.objects.create(
+                type=shipment_type,
+                status=ShipmentStatus.IN_TRANSIT.value,
+                tracking_number=f'{shipment_type}{i:03d}',
+                carrier='FedEx',
+                estimated_arrival=timezone.now() + timedelta(days=1)
+            )
+            ShipmentItem.objects.create(shipment=shipment, item=item, quantity=quantity, unit_price=1)
+            shipments.append(shipment)
+        return shipments
+
+    def test_parallel_deliveries_do_not_lose_updates(self):
+        """Test that parallel incoming and outgoing deliveries all count"""
+        item = InventoryItem.objects.create(
+            name='Contended', sku='CONT001', quantity=100, location='A1',
+            category='Tools', minimum_stock=0
+        )
+        shipments = (
+            self.create_shipments(item, 6, ShipmentType.INCOMING.value, 5) +
+            self.create_shipments(item, 6, ShipmentType.OUTGOING.value, 3)
+        )
+
+        outcomes = self.run_in_parallel(shipments)
+
+        self.assertEqual(outcomes.count('delivered'), 12)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 100 + 6 * 5 - 6 * 3)
+        self.assertEqual(
+            StockMovement.objects.filter(item=item).order_by('-occurred_at', '-id').first().balance,
+            item.quantity
+        )
+
+    def test_parallel_deliveries_never_oversell(self):
+        """Test that competing outgoing deliveries cannot take stock below zero"""
+        item = InventoryItem.objects.create(
+            name='Scarce', sku='SCARCE001', quantity=10, location='A1',
+            category='Tools', minimum_stock=0
+        )
+        shipments = self.create_shipments(item, 8, ShipmentType.OUTGOING.value, 3)
+
+        outcomes = self.run_in_parallel(shipments)
+
+        self.assertEqual(outcomes.count('delivered'), 3)
+        self.assertEqual(outcomes.count('short'), 5)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 1)
+        self.assertEqual(
+            sorted(StockMovement.objects.filter(item=item).values_list('balance', flat=True)),
+            [1, 4, 7]
+        )
@@ -10,6 +10,11 @@ from .views import (
     InventoryItemViewSet,
     ShipmentViewSet,
     ShipmentItemViewSet,
+    dashboard_data_async,
+    system_stats_async,
+    low_stock_counts_async,
+    value_history_async,
+    events_stream,
 )
 
 router = DefaultRouter()
@@ -25,4 +30,11 @@ urlpatterns = [
     path('users/me/', CurrentUserView.as_view(), name='current-user'),
     path('users/', UserListView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserDeleteView.as_view(), name='user-delete'),
+
+    # Async variants, for deployments served through backend/asgi.py
+    path('async/dashboard/', dashboard_data_async, name='async-dashboard'),
+    path('async/stats/', system_stats_async, name='async-stats'),
+    path('async/low-stock-counts/', low_stock_counts_async, name='async-low-stock-counts'),
+    path('async/value-history/', value_history_async, name='async-value-history'),
+    path('events/', events_stream, name='events'),
 ]
\ No newline at end of file
@@ -6,6 +6,13 @@ from .user_views import CreateUserView, CurrentUserView, UserListView, UserDelet
 from .inventory_views import InventoryItemViewSet
 from .shipment_views import ShipmentViewSet
 from .shipment_item_views import ShipmentItemViewSet
+from .async_views import (
+    dashboard_data_async,
+    system_stats_async,
+    low_stock_counts_async,
+    value_history_async,
+    events_stream,
+)
 
 __all__ = [
     'CreateUserView',
@@ -15,4 +22,9 @@ __all__ = [
     'InventoryItemViewSet',
     'ShipmentViewSet',
     'ShipmentItemViewSet',
+    'dashboard_data_async',
+    'system_stats_async',
+    'low_stock_counts_async',
+    'value_history_async',
+    'events_stream',
 ] 
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Async variants of the read-only dashboard and reporting endpoints, and the
+stream of change events.
+
+These are plain Django async views rather than DRF views, since DRF runs
+views synchronously. Served through ``backend/asgi.py``, a request waiting
+on the database does not hold a worker, and independent queries run
+concurrently through run_concurrently(). Responses are rendered with the
+API's JSON renderer, so they match the synchronous endpoints byte for
+byte.
+"""
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from ..dashboard import aget_dashboard_data, aget_system_stats
+from ..events import buffer, format_event
+from ..models import InventoryItem, InventoryValuation
+from ..renderers import FastJSONRenderer
+from .inventory_views import InventoryItemViewSet
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+async def authenticate(request, allow_query_token=False):
+    """
+    Authenticate like the API's default authenticators, with a JWT bearer
+    token first and then the session. Returns the user or None.
+
+    With ``allow_query_token``, an ``access_token`` query parameter is
+    accepted in place of the header, for clients such as EventSource that
+    cannot set headers.
+    """
+    authenticator = JWTAuthentication()
+    try:
+        result = await sync_to_async(authenticator.authenticate)(request)
+        if result is None and allow_query_token and request.GET.get('access_token'):
+            token = authenticator.get_validated_token(request.GET['access_token'])
+            result = (await sync_to_async(authenticator.get_user)(token), token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if result is not None:
+        return result[0]
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def async_api_view(view=None, *, allow_query_token=False):
+    """Allow only authenticated GET requests, answering like DRF otherwise."""
+    if view is None:
+        return partial(async_api_view, allow_query_token=allow_query_token)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        user = await authenticate(request, allow_query_token)
+        if user is None:
+            response = json_response(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+            response['WWW-Authenticate'] = JWTAuthentication().authenticate_header(request)
+            return response
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@async_api_view
+async def dashboard_data_async(request):
+    """Async variant of ``/api/inventory/dashboard_data/``."""
+    try:
+        return json_response(await aget_dashboard_data())
+    except Exception:
+        return json_response(
+            {'error': 'Failed to process dashboard data'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def system_stats_async(request):
+    """The home page's system statistics, with both counts run concurrently."""
+    try:
+        return json_response(await aget_system_stats())
+    except Exception:
+        return json_response(
+            {'error': 'Failed to load system statistics'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def low_stock_counts_async(request):
+    """Async variant of ``/api/inventory/low_stock_counts/``."""
+    return json_response(await sync_to_async(InventoryItem.low_stock_counts)())
+
+
+@async_api_view
+async def value_history_async(request):
+    """Async variant of ``/api/inventory/value_history/``."""
+    windows = InventoryItemViewSet.VALUE_HISTORY_WINDOWS
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = None
+
+    if days not in windows:
+        return json_response(
+            {'error': f'days must be one of {", ".join(map(str, windows))}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    category = request.GET.get('category', None)
+    return json_response(await sync_to_async(InventoryValuation.history)(days, category))
+
+
+@async_api_view(allow_query_token=True)
+async def events_stream(request):
+    """
+    Server-sent events for inventory quantity changes (``quantity``),
+    low stock threshold crossings (``low_stock``) and shipment status
+    transitions (``status``).
+
+    A reconnecting client sends the last id it saw, in the
+    ``Last-Event-ID`` header or the ``last_event_id`` parameter, and
+    receives the events it missed. When those are no longer buffered, or
+    the id is from before a restart, a ``reset`` event tells it to reload
+    instead. Idle streams cost nothing but a keepalive comment every
+    ``EVENT_STREAM_HEARTBEAT`` seconds.
+
+    Needs an ASGI server such as uvicorn serving ``backend/asgi.py``. Under
+    WSGI, including ``runserver``, Django collects a streaming response's
+    whole async content before sending any of it, which an endless stream
+    never finishes, so a 501 is returned instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return json_response(
+            {'error': 'The event stream needs the app served over ASGI, e.g. by uvicorn'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    position = buffer.parse_id(last_event_id) if last_event_id else buffer.latest()
+
+    async def stream():
+        nonlocal position
+        # Clients reconnect after this many milliseconds when the stream drops
+        yield f'retry: {int(settings.EVENT_STREAM_HEARTBEAT * 1000)}\n\n'
+        while True:
+            events, complete = (buffer.since(position)
+                                if position is not None and position <= buffer.latest()
+                                else ([], False))
+            if not complete:
+                position = buffer.latest()
+                yield format_event(position, 'reset', {})
+                continue
+            for sequence, event_type, data in events:
+                yield format_event(sequence, event_type, data)
+                position = sequence
+            if not await buffer.wait(position, settings.EVENT_STREAM_HEARTBEAT):
+                yield ': keepalive\n\n'
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
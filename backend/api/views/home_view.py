@@ -3,9 +3,7 @@ from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
-from .inventory_views import InventoryItemViewSet
-from .shipment_views import ShipmentViewSet
-from ..models.enums import ShipmentStatus
+from ..dashboard import get_system_stats
 from rest_framework.response import Response
 from django.db.models import Count, Sum
 from api.models import Shipment, InventoryItem
@@ -50,21 +48,13 @@ class HomeView(APIView):
 
     def get_system_stats(self) -> dict:
         """Get system statistics for authenticated users"""
-        inventory_count = 0
-        outstanding_shipments = 0
-        
         try:
-            inventory_count = InventoryItemViewSet.queryset.count()
-            outstanding_shipments = ShipmentViewSet.queryset.exclude(
-                status=ShipmentStatus.DELIVERED.value
-            ).count()
+            return get_system_stats()
         except:
-            pass
-
-        return {
-            "total_inventory_items": inventory_count,
-            "outstanding_shipments": outstanding_shipments
-        }
+            return {
+                "total_inventory_items": 0,
+                "outstanding_shipments": 0
+            }
 
     def get(self, request):        
         # Start with basic context that's always included
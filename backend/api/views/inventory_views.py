@@ -1,15 +1,24 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F, Count
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
-from ..models import InventoryItem, Shipment, ShipmentItem
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+from ..models import Category, InventoryItem, InventoryValuation, StockMovement
 from ..models.inventory_item import InventoryCategory
 from ..serializers.inventory_item_serializer import InventoryItemSerializer
-from ..models.enums import ShipmentType, ShipmentStatus
+from ..serializers.fast import InventoryItemReader
+from ..models.enums import StockMovementType
+from ..pagination import InventoryItemPagination
+from ..search import search_inventory
+from .mixins import ConditionalGetMixin, DeltaSyncMixin, FastReadMixin, SparseFieldsMixin
+from ..dashboard import get_cache_stats, get_dashboard_data
+from ..exporter import FORMATS as EXPORT_FORMATS, export_response
+from ..importer import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_inventory
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+class InventoryItemViewSet(SparseFieldsMixin, DeltaSyncMixin, ConditionalGetMixin, FastReadMixin,
+                           viewsets.ModelViewSet):
     """
     API endpoint for managing inventory items.
     
@@ -21,126 +30,288 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     """
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
+    fast_reader = InventoryItemReader()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InventoryItemPagination
+
+    # Default and maximum number of ledger entries returned by history
+    HISTORY_DEFAULT_LIMIT = 500
+    HISTORY_MAX_LIMIT = 5000
+
+    # Windows, in days, served by value_history
+    VALUE_HISTORY_WINDOWS = (30, 90, 365)
+
+    # Columns written by export
+    EXPORT_COLUMNS = ['id', 'name', 'sku', 'description', 'quantity', 'location',
+                      'category', 'minimum_stock', 'unit_price', 'is_low_stock', 'created_at',
+                      'updated_at', 'created_by__username', 'last_updated_by__username']
+
+    def with_related(self, queryset):
+        """
+        Join the nested users the response includes up front, instead of
+        one query per row, and skip the ones left out by ?fields=.
+        """
+        related = [name for name in ('created_by', 'last_updated_by') if self.wants(name)]
+        return queryset.select_related(*related) if related else queryset
 
     def get_queryset(self):
-        queryset = InventoryItem.objects.all()
+        queryset = self.with_related(InventoryItem.objects.all())
         search = self.request.query_params.get('search', None)
         category = self.request.query_params.get('category', None)
         low_stock = self.request.query_params.get('low_stock', None)
 
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(sku__icontains=search) |
-                Q(description__icontains=search)
-            )
+            queryset = search_inventory(queryset, search)
         
         if category:
             queryset = queryset.filter(category=category)
         
         if low_stock == 'true':
-            queryset = queryset.filter(quantity__lte=F('minimum_stock'))
+            queryset = queryset.filter(is_low_stock=True)
         
         return queryset
 
+    def get_sync_queryset(self):
+        return self.with_related(InventoryItem.objects.all())
+
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user, last_updated_by=self.request.user)
+        with transaction.atomic():
+            item = serializer.save(created_by=self.request.user, last_updated_by=self.request.user)
+            StockMovement.record(item, item.quantity, StockMovementType.INITIAL, user=self.request.user)
 
     def perform_update(self, serializer):
-        serializer.save(last_updated_by=self.request.user)
+        with transaction.atomic():
+            previous_quantity = serializer.instance.quantity
+            item = serializer.save(last_updated_by=self.request.user)
+
+            # Manual quantity edits are recorded in the ledger as adjustments
+            if item.quantity != previous_quantity:
+                StockMovement.record(
+                    item,
+                    item.quantity - previous_quantity,
+                    StockMovementType.ADJUSTMENT,
+                    user=self.request.user
+                )
 
     @action(detail=False, methods=['get'])
     def categories(self, request):
         """
         Get a list of all unique categories in the inventory and suggested categories.
+        Categories are read from the category registry, not the inventory table.
+
+        Query parameters:
+        - counts: If true, return [{name, item_count}] instead of names
         """
-        # Get existing categories from inventory items
-        existing_categories = InventoryItem.objects.values_list('category', flat=True).distinct()
+        # Get categories in use from the registry
+        item_counts = dict(Category.objects.filter(item_count__gt=0).values_list('name', 'item_count'))
         
-        # Get suggested categories
-        suggested_categories = InventoryCategory.get_suggested_categories()
+        # Add suggested categories that have no items yet
+        for category in InventoryCategory.get_suggested_categories():
+            item_counts.setdefault(category, 0)
         
-        # Combine and deduplicate categories
-        all_categories = list(set(list(existing_categories) + suggested_categories))
-        return Response(sorted(all_categories))
+        if request.query_params.get('counts') == 'true':
+            return Response([
+                {'name': name, 'item_count': item_counts[name]} for name in sorted(item_counts)
+            ])
+        return Response(sorted(item_counts))
 
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """
         Get all items that are at or below their minimum stock level.
+
+        Query parameters:
+        - category: Only include this category
+        """
+        low_stock_items = self.with_related(InventoryItem.objects.filter(
+            is_low_stock=True
+        ))
+
+        category = request.query_params.get('category', None)
+        if category:
+            low_stock_items = low_stock_items.filter(category=category)
+
+        def render():
+            serializer = self.get_serializer(low_stock_items, many=True)
+            return Response(serializer.data)
+
+        return self.conditional_collection(request, low_stock_items, render)
+
+    @action(detail=False, methods=['get'])
+    def low_stock_counts(self, request):
+        """
+        Get the number of low stock items in each category, for badge counts.
+        Only the low stock rows are read, through a partial index.
+        """
+        low_stock_items = InventoryItem.objects.filter(is_low_stock=True)
+
+        def render():
+            return Response(InventoryItem.low_stock_counts())
+
+        return self.conditional_collection(request, low_stock_items, render)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_items(self, request):
         """
-        low_stock_items = InventoryItem.objects.filter(
-            quantity__lte=F('minimum_stock')
-        )
-        serializer = self.get_serializer(low_stock_items, many=True)
-        return Response(serializer.data)
+        Bulk import inventory items from an uploaded CSV or NDJSON file.
+        Items are created or updated by SKU; invalid rows are reported and skipped.
+
+        Form fields:
+        - file: The file to import
+
+        Query parameters:
+        - type: csv or ndjson (default: guessed from the file name)
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.query_params.get('type') or detect_format(upload.name, upload.content_type)
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f'type must be one of {", ".join(FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = import_inventory(upload.file, file_format, user=request.user, batch_size=DEFAULT_BATCH_SIZE)
+        return Response(result.as_dict())
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all items matching the list filters as CSV or NDJSON.
+
+        Query parameters:
+        - file_type: csv or ndjson (default csv)
+        - search, category, low_stock: Same filters as the list endpoint
+        """
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'file_type must be one of {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Not validated with an ETag: that would aggregate every matching row
+        # on each request, in addition to the export's own pass over them
+        items = self.filter_queryset(self.get_queryset()).order_by('id')
+        return export_response(items, self.EXPORT_COLUMNS, file_type, 'inventory')
 
     @action(detail=True, methods=['get'])
     def history(self, request, pk=None):
         """
         Get historical inventory data for an item.
-        Returns quantity changes over time based on shipment history.
+        Returns the item's quantity over time from the stock movement ledger.
+
+        Query parameters:
+        - start: Only include movements at or after this date/datetime
+        - end: Only include movements at or before this date/datetime
+        - limit: Maximum number of movements, most recent first kept (default 500)
         """
         try:
             item = self.get_object()
-            
-            # Get all shipments that include this item
-            shipments = item.shipmentitem_set.all().order_by('shipment__created_at')
-            
-            # Process history with default quantity calculation
-            history_data = self.process_shipment_history(
-                shipments,
-                current_value=item.quantity  # Add current quantity as final point
-            )
-            
-            # Rename 'value' to 'quantity' for this endpoint
-            for point in history_data:
-                point['quantity'] = point.pop('value')
-            
-            return Response(history_data)
-            
         except InventoryItem.DoesNotExist:
             return Response(
                 {'error': 'Item not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        try:
+            start = self.parse_history_bound(request.query_params.get('start'))
+            end = self.parse_history_bound(request.query_params.get('end'), end_of_day=True)
+            limit = int(request.query_params.get('limit', self.HISTORY_DEFAULT_LIMIT))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'Invalid start, end or limit parameter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(limit, self.HISTORY_MAX_LIMIT)
+
+        movements = StockMovement.objects.filter(item=item)
+        if start:
+            movements = movements.filter(occurred_at__gte=start)
+        if end:
+            movements = movements.filter(occurred_at__lte=end)
+
+        # Range read on the (item, occurred_at) index, newest entries first
+        movements = movements.order_by('-occurred_at', '-id').values(
+            'occurred_at', 'balance', 'quantity_change', 'type',
+            'shipment_id', 'shipment__type', 'shipment__status'
+        )[:limit]
+
+        history_data = [
+            {
+                'date': movement['occurred_at'],
+                'quantity': movement['balance'],
+                'change': movement['quantity_change'],
+                'reason': movement['type'],
+                'shipment_id': movement['shipment_id'],
+                'type': movement['shipment__type'],
+                'status': movement['shipment__status']
+            }
+            for movement in reversed(movements)
+        ]
+
+        # Add current state as final data point when the window is open-ended
+        if end is None:
+            history_data.append({
+                'date': timezone.now(),
+                'quantity': item.quantity,
+                'change': 0,
+                'reason': None,
+                'shipment_id': None,
+                'type': None,
+                'status': 'CURRENT'
+            })
+
+        return Response(history_data)
+
+    @staticmethod
+    def parse_history_bound(value, end_of_day=False):
+        """
+        Parse a date or datetime query parameter into an aware datetime.
+        Date-only end bounds cover the whole day.
+        Raises ValueError for values that cannot be parsed.
+        """
+        if not value:
+            return None
+
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f'Invalid date: {value}')
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
     @action(detail=False, methods=['get'])
     def value_history(self, request):
         """
         Get the total inventory value history over time.
-        Returns data points for the last 30 days.
+        Returns one data point per day from the daily valuation roll-up.
+
+        Query parameters:
+        - days: Size of the window, one of 30, 90 or 365 (default 30)
+        - category: Only include this category
         """
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        # Get all delivered shipments in the last 30 days
-        shipments = Shipment.objects.filter(
-            Q(status=ShipmentStatus.DELIVERED.value) &
-            Q(created_at__gte=thirty_days_ago)
-        ).order_by('created_at')
-
-        # Calculate current total value
-        current_value = sum(
-            item.quantity * float(item.unit_price)
-            for item in InventoryItem.objects.all()
-        )
-
-        # Define value calculator for this endpoint
-        def calculate_value(shipment_item, current_value):
-            if shipment_item.shipment.type == ShipmentType.INCOMING.value:
-                return current_value + (shipment_item.quantity * float(shipment_item.unit_price))
-            else:  # OUT
-                return current_value - (shipment_item.quantity * float(shipment_item.unit_price))
-
-        # Process history with value calculation
-        history_data = self.process_shipment_history(
-            ShipmentItem.objects.filter(shipment__in=shipments),
-            value_calculator=calculate_value,
-            current_value=current_value  # Add current total value as final point
-        )
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = None
 
-        return Response(history_data)
+        if days not in self.VALUE_HISTORY_WINDOWS:
+            return Response(
+                {'error': f'days must be one of {", ".join(map(str, self.VALUE_HISTORY_WINDOWS))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        category = request.query_params.get('category', None)
+        return Response(InventoryValuation.history(days, category))
 
     @action(detail=False, methods=['get'])
     def dashboard_data(self, request):
@@ -150,97 +321,20 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         - Recent shipment activity
         - Top items by quantity
         - Outstanding shipments count
+
+        The payload is cached and invalidated whenever inventory or shipments change.
         """
         try:
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-
-            # Get recent shipment activity
-            try:
-                recent_shipments = Shipment.objects.filter(
-                    created_at__gte=thirty_days_ago
-                )
-                shipment_activity = recent_shipments.values('type').annotate(
-                    count=Count('id')
-                )
-            except Exception as e:
-                shipment_activity = []
-
-            # Get top items by quantity
-            try:
-                top_items = InventoryItem.objects.order_by('-quantity')[:5].values(
-                    'name', 'quantity', 'minimum_stock'
-                )
-            except Exception as e:
-                top_items = []
-
-            # Get outstanding shipments count
-            try:
-                outstanding_shipments = Shipment.objects.exclude(
-                    status=ShipmentStatus.DELIVERED.value
-                ).count()
-            except Exception as e:
-                outstanding_shipments = 0
-
-            return Response({
-                'shipment_activity': list(shipment_activity),
-                'top_items': list(top_items),
-                'outstanding_shipments': outstanding_shipments
-            })
-
+            return Response(get_dashboard_data())
         except Exception as e:
             return Response(
                 {'error': 'Failed to process dashboard data'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
-    @staticmethod
-    def process_shipment_history(shipments, initial_value=0, value_calculator=None, current_value=None):
+
+    @action(detail=False, methods=['get'])
+    def dashboard_cache_stats(self, request):
         """
-        Process shipment history and calculate values over time.
-        
-        Args:
-            shipments: QuerySet of ShipmentItems
-            initial_value: Starting value (default 0)
-            value_calculator: Optional function to calculate value change for each shipment
-            current_value: Optional current value to add as final data point
-        
-        Returns:
-            List of data points with date and calculated value
+        Get hit and miss counts for the dashboard cache.
         """
-        
-        history_data = []
-        running_value = initial_value
-        
-        for shipment_item in shipments:
-            shipment = shipment_item.shipment
-            
-            # Only consider delivered shipments
-            if shipment.status == ShipmentStatus.DELIVERED.value:
-                if value_calculator:
-                    running_value = value_calculator(shipment_item, running_value)
-                else:
-                    # Default quantity calculation
-                    if shipment.type == ShipmentType.INCOMING.value:
-                        running_value += shipment_item.quantity
-                    else:  # OUT
-                        running_value -= shipment_item.quantity
-                
-                history_data.append({
-                    'date': shipment.created_at,
-                    'value': running_value,
-                    'shipment_id': shipment.id,
-                    'type': shipment.type,
-                    'status': shipment.status
-                })
-        
-        # Add current state as final data point if provided
-        if current_value is not None:
-            history_data.append({
-                'date': timezone.now(),
-                'value': current_value,
-                'shipment_id': None,
-                'type': None,
-                'status': 'CURRENT'
-            })
-        
-        return history_data
\ No newline at end of file
+        return Response(get_cache_stats())
@@ -0,0 +1,314 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from datetime import timedelta
+from hashlib import md5
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..models import Tombstone
+from ..serializers.mixins import parse_field_tree
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET support for viewsets of models with an ``updated_at`` field.
+
+    Validators are derived from the data before anything is serialized:
+    a single object uses its own ``updated_at``. A keyset page uses the
+    ids and ``updated_at`` of just the rows it returns, read through the
+    page's own index seek, so validating a page never touches the rest of
+    the collection. Other collections use the ``MAX(updated_at)`` and
+    ``COUNT(*)`` of the filtered queryset. Either way an edit, an insert
+    and a delete all change the ETag. When the client's ``If-None-Match``
+    still matches, a bodiless ``304 Not Modified`` is returned and the view
+    is never rendered.
+
+    Only single objects also send ``Last-Modified`` and honour
+    ``If-Modified-Since``: deleting a row from a collection leaves its
+    ``MAX(updated_at)`` unchanged, so a date alone would wrongly revalidate it.
+    """
+
+    def get_collection_validators(self, queryset):
+        """Return ``(count, last_modified)`` for a queryset in one aggregate query."""
+        aggregates = queryset.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        return aggregates['count'], aggregates['last_modified']
+
+    def conditional_response(self, request, render, last_modified, *parts, send_last_modified=False):
+        """
+        Return a 304 when the client's validators match, otherwise ``render()``.
+
+        The ETag covers the full path and the negotiated format, so each
+        filter combination, page and renderer gets its own validator.
+        ``last_modified`` is only sent as a date validator when
+        ``send_last_modified`` is set.
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+        key = '|'.join(str(part) for part in (
+            request.get_full_path(),
+            getattr(renderer, 'format', ''),
+            last_modified.isoformat() if last_modified else '',
+            *parts,
+        ))
+        etag = f'W/"{md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+        timestamp = int(last_modified.timestamp()) if last_modified and send_last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Let browsers keep the body but always revalidate it
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_page_validators(self, queryset):
+        """
+        Return ``(keys, last_modified)`` for the page the paginator would
+        fetch, where ``keys`` are its rows' ids and ``updated_at`` values.
+        """
+        rows = list(self.paginator.get_page_queryset(queryset, self.request).values_list('pk', 'updated_at'))
+        last_modified = max((updated_at for _, updated_at in rows), default=None)
+        keys = md5(repr(rows).encode(), usedforsecurity=False).hexdigest()
+        return keys, last_modified
+
+    def conditional_collection(self, request, queryset, render):
+        count, last_modified = self.get_collection_validators(queryset)
+        return self.conditional_response(request, render, last_modified, count)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def render():
+            return super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+
+        if not hasattr(self.paginator, 'get_page_queryset'):
+            return self.conditional_collection(request, queryset, render)
+
+        keys, last_modified = self.get_page_validators(queryset)
+        return self.conditional_response(request, render, last_modified, keys)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        def render():
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+
+        return self.conditional_response(
+            request, render, instance.updated_at, instance.pk, send_last_modified=True
+        )
+
+
+class DeltaSyncMixin:
+    """
+    Delta sync for viewsets of models with an ``updated_at`` field.
+
+    ``GET ?updated_since=<cursor>`` on the collection returns only the rows
+    changed after the cursor and the ids deleted after it, with a new
+    cursor to send next time. Use ``updated_since=0`` for the first sync.
+    List filters are ignored, so a local copy built from deltas always
+    matches the full collection.
+
+    Changed rows are read in ``(updated_at, id)`` order and deletes in
+    ``(deleted_at, id)`` order from the tombstone table. The cursor holds a
+    position in each. Once everything has been returned, the cursor is
+    pinned ``SYNC_SAFETY_WINDOW`` seconds in the past. Writes that commit
+    late with an older timestamp are then picked up by the next sync, at
+    the cost of resending the most recent rows.
+
+    Rows are read and rendered through FastReadMixin.
+    """
+    sync_query_param = 'updated_since'
+    SYNC_DEFAULT_LIMIT = 1000
+    SYNC_MAX_LIMIT = 5000
+
+    def get_sync_queryset(self):
+        return self.get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        if self.sync_query_param in request.query_params:
+            return self.sync(request)
+        return super().list(request, *args, **kwargs)
+
+    def sync(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.SYNC_DEFAULT_LIMIT))
+            if limit < 1:
+                raise ValueError
+            changed_after, deleted_after = self.decode_sync_cursor(request.query_params[self.sync_query_param])
+        except (TypeError, ValueError, KeyError, UnicodeError, BinasciiError):
+            return Response({'error': 'Invalid updated_since or limit parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.SYNC_MAX_LIMIT)
+
+        # Tombstones older than the retention period may be gone already
+        horizon = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if deleted_after is not None and deleted_after[0] < horizon:
+            return Response(
+                {'error': 'Cursor has expired, start again with updated_since=0'},
+                status=status.HTTP_410_GONE
+            )
+
+        queryset = self.get_sync_queryset().order_by('updated_at', 'id')
+        if changed_after is not None:
+            queryset = queryset.filter(self.after(changed_after, 'updated_at'))
+        rows = list(self.read_rows(queryset)[:limit + 1])
+
+        tombstones = Tombstone.objects.filter(model=queryset.model._meta.model_name).order_by('deleted_at', 'id')
+        if deleted_after is not None:
+            tombstones = tombstones.filter(self.after(deleted_after, 'deleted_at'))
+        deletes = list(tombstones.values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+
+        has_more = len(rows) > limit or len(deletes) > limit
+        rows = rows[:limit]
+        deletes = deletes[:limit]
+
+        if has_more:
+            if rows:
+                changed_after = (rows[-1].updated_at, rows[-1].id)
+            if deletes:
+                deleted_after = deletes[-1][:2]
+        else:
+            # Everything after both positions has been returned
+            safe_point = (timezone.now() - timedelta(seconds=settings.SYNC_SAFETY_WINDOW), 0)
+            changed_after = deleted_after = safe_point
+
+        return Response({
+            'results': self.render_rows(rows),
+            'deleted': [object_id for _, _, object_id in deletes],
+            'cursor': self.encode_sync_cursor(changed_after, deleted_after),
+            'has_more': has_more,
+        })
+
+    @staticmethod
+    def after(position, field):
+        """
+        Build the "comes after" predicate for a (timestamp, id) position.
+
+        The redundant ``>=`` bound lets the (timestamp, id) index be entered
+        at the position instead of walked from its first entry.
+        """
+        timestamp, pk = position
+        return Q(**{f'{field}__gte': timestamp}) & (
+            Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+        )
+
+    @staticmethod
+    def encode_sync_cursor(changed_after, deleted_after):
+        payload = {
+            key: [position[0].isoformat(), position[1]] if position else None
+            for key, position in (('u', changed_after), ('d', deleted_after))
+        }
+        return b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii')).decode('ascii')
+
+    @staticmethod
+    def decode_sync_cursor(encoded):
+        """Decode a cursor into (changed_after, deleted_after) positions."""
+        if encoded in ('', '0'):
+            return None, None
+
+        payload = json.loads(b64decode(encoded.encode('ascii'), validate=True).decode('ascii'))
+        positions = []
+        for key in ('u', 'd'):
+            position = payload[key]
+            if position is None:
+                positions.append(None)
+                continue
+            timestamp = parse_datetime(position[0])
+            if timestamp is None or timezone.is_naive(timestamp):
+                raise ValueError
+            positions.append((timestamp, int(position[1])))
+        return tuple(positions)
+
+
+class SparseFieldsMixin:
+    """
+    Passes ``?fields=`` and ``?expand=`` on GET requests to the serializer.
+
+    Querysets use wants() and expands() to skip the joins and prefetches
+    of relations the response leaves out, so trimming the payload also
+    trims the SQL.
+    """
+
+    def get_field_tree(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None
+        return parse_field_tree(request.query_params.get('fields'))
+
+    def get_expand_tree(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None
+        return parse_field_tree(request.query_params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_field_tree())
+        kwargs.setdefault('expand', self.get_expand_tree())
+        return super().get_serializer(*args, **kwargs)
+
+    def wants(self, *path):
+        """Whether the response includes the field at a dotted path."""
+        node = self.get_field_tree()
+        for part in path:
+            if node is None:
+                return True
+            if part not in node:
+                return False
+            node = node[part]
+        return True
+
+    def expands(self, *path):
+        """Whether the field at a dotted path was asked to be expanded."""
+        node = self.get_expand_tree()
+        for part in path:
+            if node is None or part not in node:
+                return False
+            node = node[part]
+        return self.wants(*path)
+
+
+class FastReadMixin:
+    """
+    Serves the default list representation through a ``ValuesReader``.
+
+    Lists and delta syncs read ``values_list()`` rows and convert them a
+    column at a time instead of running the serializer fields per object,
+    producing the same output. Requests with ``?fields=`` or ``?expand=``
+    (see SparseFieldsMixin) take the regular serializer path.
+    """
+    fast_reader = None
+
+    def use_fast_reader(self):
+        return (
+            self.fast_reader is not None
+            and self.get_field_tree() is None
+            and self.get_expand_tree() is None
+        )
+
+    def read_rows(self, queryset):
+        """Turn a queryset into the rows render_rows() takes."""
+        return self.fast_reader.rows(queryset) if self.use_fast_reader() else queryset
+
+    def render_rows(self, rows):
+        if self.use_fast_reader():
+            return self.fast_reader.serialize(rows)
+        return self.get_serializer(rows, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.read_rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.render_rows(page))
+        return Response(self.render_rows(queryset))
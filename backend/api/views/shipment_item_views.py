@@ -1,8 +1,10 @@
 from rest_framework import viewsets, permissions
-from ..models import ShipmentItem
+from django.utils import timezone
+from ..models import Shipment, ShipmentItem
 from ..serializers.shipment_item_serializer import ShipmentItemSerializer
+from .mixins import SparseFieldsMixin
 
-class ShipmentItemViewSet(viewsets.ModelViewSet):
+class ShipmentItemViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing shipment items.
     
@@ -17,9 +19,31 @@ class ShipmentItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = ShipmentItem.objects.all()
+        if self.expands('item'):
+            queryset = queryset.select_related('item', *[
+                f'item__{name}' for name in ('created_by', 'last_updated_by') if self.wants('item', name)
+            ])
         shipment_id = self.request.query_params.get('shipment', None)
         
         if shipment_id:
             queryset = queryset.filter(shipment_id=shipment_id)
         
-        return queryset 
\ No newline at end of file
+        return queryset
+
+    @staticmethod
+    def touch_shipment(shipment_id):
+        # Line edits change the shipment representation, so move its
+        # updated_at and with it the shipment's ETag
+        Shipment.objects.filter(pk=shipment_id).update(updated_at=timezone.now())
+
+    def perform_create(self, serializer):
+        line = serializer.save()
+        self.touch_shipment(line.shipment_id)
+
+    def perform_update(self, serializer):
+        line = serializer.save()
+        self.touch_shipment(line.shipment_id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        self.touch_shipment(instance.shipment_id)
\ No newline at end of file
@@ -1,14 +1,24 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Prefetch, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
-from ..models import Shipment, InventoryItem
+from ..models import Shipment, ShipmentItem
 from ..serializers.shipment_serializer import ShipmentSerializer
+from ..serializers.fast import ShipmentReader
 from ..models.enums import ShipmentType, ShipmentStatus
+from ..dashboard import invalidate_dashboard
+from ..db import pk_in_range
+from ..events import status_changed
+from ..delivery import apply_deliveries, InsufficientStock
+from ..pagination import ShipmentPagination
+from .mixins import ConditionalGetMixin, DeltaSyncMixin, FastReadMixin, SparseFieldsMixin
+from ..exporter import FORMATS as EXPORT_FORMATS, export_response
 
-class ShipmentViewSet(viewsets.ModelViewSet):
+class ShipmentViewSet(SparseFieldsMixin, DeltaSyncMixin, ConditionalGetMixin, FastReadMixin,
+                      viewsets.ModelViewSet):
     """
     API endpoint for managing shipments.
     
@@ -20,10 +30,44 @@ class ShipmentViewSet(viewsets.ModelViewSet):
     """
     queryset = Shipment.objects.all()
     serializer_class = ShipmentSerializer
+    fast_reader = ShipmentReader()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ShipmentPagination
+
+    FINAL_STATUSES = [ShipmentStatus.DELIVERED.value, ShipmentStatus.CANCELLED.value]
+
+    # Maximum number of transitions accepted by bulk_update_status
+    BULK_STATUS_MAX_UPDATES = 1000
+
+    # Columns written by export, one row per shipment
+    EXPORT_COLUMNS = ['id', 'type', 'status', 'tracking_number', 'carrier',
+                      'estimated_arrival', 'actual_arrival', 'created_at', 'updated_at',
+                      'created_by__username', 'updated_by__username', 'item_count', 'total_value']
+
+    def with_related(self, queryset):
+        """
+        Load everything ShipmentSerializer nests in a constant number of queries:
+        one join for the users and one prefetch for the line items. Relations
+        left out by ?fields= are not loaded, and ?expand=shipment_items.item
+        joins the items into the line item prefetch.
+        """
+        related = [name for name in ('created_by', 'updated_by') if self.wants(name)]
+        if related:
+            queryset = queryset.select_related(*related)
+
+        if self.wants('shipment_items'):
+            # Same line order as ShipmentReader
+            lines = ShipmentItem.objects.order_by('id')
+            if self.expands('shipment_items', 'item'):
+                lines = lines.select_related('item', *[
+                    f'item__{name}' for name in ('created_by', 'last_updated_by')
+                    if self.wants('shipment_items', 'item', name)
+                ])
+            queryset = queryset.prefetch_related(Prefetch('shipment_items', queryset=lines))
+        return queryset
 
     def get_queryset(self):
-        queryset = Shipment.objects.all()
+        queryset = self.with_related(Shipment.objects.all())
         search = self.request.query_params.get('search', None)
         status = self.request.query_params.get('status', None)
         type = self.request.query_params.get('type', None)
@@ -41,6 +85,9 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def get_sync_queryset(self):
+        return self.with_related(Shipment.objects.all())
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
@@ -61,55 +108,250 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         
         shipment = self.get_object()
         new_status = request.data.get('status')
-        
-        if new_status not in [s.value for s in ShipmentStatus]:
-            return Response(
-                {'error': 'Invalid status'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Prevent changing from final states
-        if shipment.status in [ShipmentStatus.DELIVERED.value, ShipmentStatus.CANCELLED.value]:
+
+        error = self.get_transition_error(shipment.status, new_status)
+        if error:
             return Response(
-                {'error': f'Cannot change status from {shipment.status}'},
+                {'error': error},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Handle inventory changes
+
+        now = timezone.now()
+        changes = {'status': new_status, 'updated_at': now}
         if new_status == ShipmentStatus.DELIVERED.value:
-            shipment.actual_arrival = timezone.now()
-
-            # Update inventory quantities
-            for item in shipment.shipment_items.all():
-                if shipment.type == ShipmentType.INCOMING.value:
-                    # Handle INCOMING Shipments
-
-                    # Add the quantity to the inventory
-                    item.item.quantity += item.quantity
-                else:  
-                    # Handle OUTGOING Shipments
-
-                    # Check if we have enough inventory
-                    if item.item.quantity < item.quantity:
-                        return Response(
-                            {'error': f'Not enough inventory for item {item.item.name}'},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                    
-                    # Subtract the quantity from the inventory
-                    item.item.quantity -= item.quantity
-                
-                # Save the inventory item
-                item.item.save()
-        
-        # Update the shipment status
-        shipment.status = new_status
-        shipment.save()
+            changes['actual_arrival'] = now
+
+        # Inventory, ledger and status changes are applied together or not at all
+        with transaction.atomic():
+            # The status guard makes concurrent requests for the same shipment
+            # race-free: only one of them can move it out of a non-final state
+            updated = Shipment.objects.filter(pk=shipment.pk).exclude(
+                status__in=self.FINAL_STATUSES
+            ).update(**changes)
+            if not updated:
+                return Response(
+                    {'error': 'Shipment status was changed by another request'},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # Queryset updates send no signals, so drop the dashboard cache
+            # and publish the transition here
+            invalidate_dashboard()
+            status_changed(shipment.pk, new_status, shipment.status)
+
+            # Handle inventory changes
+            if new_status == ShipmentStatus.DELIVERED.value:
+                try:
+                    apply_deliveries([shipment], user=request.user)
+                except InsufficientStock as e:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {'error': str(e), 'short_items': e.short_items},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+        for attr, value in changes.items():
+            setattr(shipment, attr, value)
 
         # Return the updated shipment
         serializer = self.get_serializer(shipment)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """
+        Update the status of many shipments in one request.
+
+        Expects a list of {"id" or "tracking_number", "status"} objects, either
+        as the request body or under an "updates" key. Each entry is checked
+        against the same rules as update_status. Valid entries are applied in a
+        single transaction, with inventory changes for all deliveries made by
+        set-based updates. Deliveries that would take an item below zero are
+        rejected while the rest still apply.
+
+        Returns one compact result per entry, in request order. A payload
+        with malformed entries is rejected as a whole with a 400, and a
+        409 means another request changed one of the shipments meanwhile.
+        """
+        updates = request.data.get('updates') if isinstance(request.data, dict) else request.data
+        if not isinstance(updates, list) or not updates:
+            return Response(
+                {'error': 'Expected a non-empty list of status updates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(updates) > self.BULK_STATUS_MAX_UPDATES:
+            return Response(
+                {'error': f'At most {self.BULK_STATUS_MAX_UPDATES} updates are accepted per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [self.parse_bulk_status_entry(entry) for entry in updates]
+        if any('error' in result for result in results):
+            return Response(
+                {'error': 'Malformed status updates', 'results': results},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Ids too large for the column cannot exist, so they are simply not found
+        ids = {result['id'] for result in results if result['id'] is not None and pk_in_range(Shipment, result['id'])}
+        tracking_numbers = {result['tracking_number'] for result in results if result['id'] is None}
+
+        with transaction.atomic():
+            # Lock the shipments so their current status cannot change underneath us
+            shipments = list(
+                Shipment.objects.select_for_update().filter(
+                    Q(pk__in=ids) | Q(tracking_number__in=tracking_numbers)
+                ).only('id', 'type', 'status', 'tracking_number').order_by('pk')
+            )
+            by_id = {shipment.pk: shipment for shipment in shipments}
+            by_tracking_number = {shipment.tracking_number: shipment for shipment in shipments}
+
+            pending = {}
+            for result in results:
+                if result['id'] is not None:
+                    shipment = by_id.get(result['id'])
+                else:
+                    shipment = by_tracking_number.get(result['tracking_number'])
+
+                if shipment is None:
+                    result['error'] = 'Shipment not found'
+                    continue
+                if shipment.pk in pending:
+                    result['error'] = 'Duplicate update for this shipment'
+                    continue
+
+                result['id'] = shipment.pk
+                result['tracking_number'] = shipment.tracking_number
+                result['error'] = self.get_transition_error(shipment.status, result['status'])
+                if result['error'] is None:
+                    del result['error']
+                    pending[shipment.pk] = (shipment, result)
+
+            # Apply every delivery at once, dropping shipments that would oversell
+            delivering = [
+                shipment for shipment, result in pending.values()
+                if result['status'] == ShipmentStatus.DELIVERED.value
+            ]
+            while delivering:
+                try:
+                    apply_deliveries(delivering, user=request.user)
+                    break
+                except InsufficientStock as e:
+                    oversold = self.get_oversold_shipments(delivering, e.short_items)
+                    if not oversold:
+                        # Nothing to drop would let the others through, so fail them all
+                        names = ', '.join(item['name'] for item in e.short_items)
+                        oversold = [(shipment.pk, names) for shipment in delivering]
+                    for shipment_id, item_name in oversold:
+                        _, result = pending.pop(shipment_id)
+                        result['error'] = f'Not enough inventory for item {item_name}'
+                    delivering = [shipment for shipment in delivering if shipment.pk in pending]
+
+            # One UPDATE per target status. As in update_status, the status
+            # guard keeps a concurrent request from moving the same shipment
+            # out of a non-final state too, since SQLite ignores the row locks.
+            now = timezone.now()
+            for new_status in {result['status'] for _, result in pending.values()}:
+                changes = {'status': new_status, 'updated_at': now, 'updated_by': request.user}
+                if new_status == ShipmentStatus.DELIVERED.value:
+                    changes['actual_arrival'] = now
+                shipment_ids = [
+                    shipment_id for shipment_id, (_, result) in pending.items()
+                    if result['status'] == new_status
+                ]
+                updated = Shipment.objects.filter(pk__in=shipment_ids).exclude(
+                    status__in=self.FINAL_STATUSES
+                ).update(**changes)
+                if updated != len(shipment_ids):
+                    transaction.set_rollback(True)
+                    return Response(
+                        {'error': 'Shipment status was changed by another request'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+            if pending:
+                invalidate_dashboard()
+            for shipment, result in pending.values():
+                status_changed(shipment.pk, result['status'], shipment.status)
+
+        for result in results:
+            result['updated'] = 'error' not in result
+
+        return Response({
+            'updated': len(pending),
+            'failed': len(results) - len(pending),
+            'results': results
+        })
+
+    @staticmethod
+    def get_oversold_shipments(delivering, short_items):
+        """
+        Pick the outgoing deliveries to drop so short items are no longer oversold.
+
+        Stock for each short item is what is on hand plus everything arriving
+        in this batch. Outgoing shipments then claim it in request order and
+        those that no longer fit are returned as (shipment_id, item_name) pairs.
+        """
+        short = {item['id']: item for item in short_items}
+        types = {shipment.pk: shipment.type for shipment in delivering}
+        lines = ShipmentItem.objects.filter(
+            shipment_id__in=types,
+            item_id__in=short
+        ).values_list('shipment_id', 'item_id', 'quantity')
+
+        budget = {item_id: item['available'] for item_id, item in short.items()}
+        outgoing = []
+        for shipment_id, item_id, quantity in lines:
+            if types[shipment_id] == ShipmentType.INCOMING.value:
+                budget[item_id] += quantity
+            else:
+                outgoing.append((shipment_id, item_id, quantity))
+
+        order = {shipment.pk: index for index, shipment in enumerate(delivering)}
+        oversold = {}
+        for shipment_id, item_id, quantity in sorted(outgoing, key=lambda line: order[line[0]]):
+            if budget[item_id] >= quantity:
+                budget[item_id] -= quantity
+            elif shipment_id not in oversold:
+                oversold[shipment_id] = short[item_id]['name']
+
+        # Stock moved since the failed attempt, so drop every consumer to make progress
+        if not oversold:
+            oversold = {shipment_id: short[item_id]['name'] for shipment_id, item_id, _ in outgoing}
+        return list(oversold.items())
+
+    @staticmethod
+    def parse_bulk_status_entry(entry):
+        """Normalize one bulk status entry into its result dict."""
+        if not isinstance(entry, dict):
+            return {'id': None, 'tracking_number': None, 'status': None, 'error': 'Expected an object'}
+
+        result = {
+            'id': entry.get('id'),
+            'tracking_number': entry.get('tracking_number'),
+            'status': entry.get('status')
+        }
+        if result['id'] is None and not result['tracking_number']:
+            result['error'] = 'Either id or tracking_number is required'
+        elif result['id'] is not None and (not isinstance(result['id'], int) or isinstance(result['id'], bool)):
+            result['error'] = 'id must be an integer'
+        elif result['id'] is None and not isinstance(result['tracking_number'], str):
+            result['error'] = 'tracking_number must be a string'
+        return result
+
+    @classmethod
+    def get_transition_error(cls, current_status, new_status):
+        """
+        Check a status transition against the shipment status rules.
+        Returns an error message, or None when the transition is allowed.
+        """
+        if new_status not in [s.value for s in ShipmentStatus]:
+            return 'Invalid status'
+
+        # Prevent changing from final states
+        if current_status in cls.FINAL_STATUSES:
+            return f'Cannot change status from {current_status}'
+
+        return None
+
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """
@@ -117,12 +359,15 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         """
 
         thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_shipments = Shipment.objects.filter(
+        recent_shipments = self.with_related(Shipment.objects.filter(
             created_at__gte=thirty_days_ago
-        ).order_by('-created_at')
-        
-        serializer = self.get_serializer(recent_shipments, many=True)
-        return Response(serializer.data)
+        )).order_by('-created_at')
+
+        def render():
+            serializer = self.get_serializer(recent_shipments, many=True)
+            return Response(serializer.data)
+
+        return self.conditional_collection(request, recent_shipments, render)
 
     @action(detail=False, methods=['get'])
     def item_history(self, request):
@@ -138,14 +383,49 @@ class ShipmentViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            shipments = Shipment.objects.filter(
-                shipment_items__item_id=item_id
-            ).order_by('-created_at')
-            
-            serializer = self.get_serializer(shipments, many=True)
-            return Response(serializer.data)
+            # Semi-join on the line items so a shipment is never repeated
+            # and no DISTINCT is needed over the joined rows
+            shipments = self.with_related(Shipment.objects.filter(
+                id__in=ShipmentItem.objects.filter(item_id=item_id).values('shipment_id')
+            )).order_by('-created_at')
+
+            def render():
+                serializer = self.get_serializer(shipments, many=True)
+                return Response(serializer.data)
+
+            return self.conditional_collection(request, shipments, render)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            ) 
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all shipments matching the list filters as CSV or NDJSON.
+        Each row carries the shipment's line item count and total value.
+
+        Query parameters:
+        - file_type: csv or ndjson (default csv)
+        - search, status, type: Same filters as the list endpoint
+        """
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'file_type must be one of {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        matching = self.filter_queryset(self.get_queryset())
+        shipments = matching.annotate(
+            item_count=Count('shipment_items'),
+            total_value=Sum(
+                F('shipment_items__quantity') * F('shipment_items__unit_price'),
+                output_field=DecimalField(max_digits=18, decimal_places=2)
+            )
+        ).order_by('-created_at', 'id')
+
+        # Not validated with an ETag: that would aggregate every matching row
+        # on each request, in addition to the export's own pass over them
+        return export_response(shipments, self.EXPORT_COLUMNS, file_type, 'shipments')
\ No newline at end of file
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+from urllib.parse import unquote, urlsplit
 from datetime import timedelta
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 import os
 import sys
 
@@ -41,6 +43,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -71,6 +77,7 @@ AUTHENTICATION_BACKENDS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -118,13 +125,69 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# SQLite by default. Set DATABASE_URL to a postgres:// URL to use PostgreSQL,
+# or to sqlite:///path/to/file.sqlite3 to move the SQLite database.
+DATABASE_URL = os.getenv('DATABASE_URL', '')
+
+# Seconds a connection is kept open for later requests; 0 closes it after
+# each request. Use 0 when serving through backend/asgi.py, where every
+# request may run on a different thread and would open its own connection.
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+
+if DATABASE_URL.startswith(('postgres://', 'postgresql://')):
+    database_url = urlsplit(DATABASE_URL)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': unquote(database_url.path.lstrip('/')),
+            'USER': unquote(database_url.username or ''),
+            'PASSWORD': unquote(database_url.password or ''),
+            'HOST': database_url.hostname or '',
+            'PORT': str(database_url.port or ''),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            # Check a reused connection before each request instead of failing it
+            'CONN_HEALTH_CHECKS': True,
+            # .iterator() streams rows through server-side cursors. These need a
+            # session of their own, so turn them off behind PgBouncer in
+            # transaction pooling mode.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DATABASE_DISABLE_SERVER_SIDE_CURSORS', '') == '1',
+            'OPTIONS': {
+                'connect_timeout': 10,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': DATABASE_URL.removeprefix('sqlite:///') or BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Take the write lock when a transaction begins. A transaction
+                # that only asks for it at its first write cannot wait for it
+                # and fails with "database is locked" instead.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Pragmas run on every new SQLite connection (see api.db). WAL lets reads
+# proceed while a write is in progress, and with synchronous=NORMAL a commit
+# no longer waits for fsync; a power loss can drop the last commits but not
+# corrupt the database. Writers wait up to busy_timeout milliseconds for the
+# write lock. cache_size is in KiB when negative. Set SQLITE_PRAGMAS=0 for
+# SQLite's defaults.
+if os.getenv('SQLITE_PRAGMAS', '1') == '0':
+    SQLITE_PRAGMAS = {}
+else:
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'memory',
     }
-}
 
 # Test database configuration
 if 'test' in sys.argv:
@@ -134,6 +197,58 @@ if 'test' in sys.argv:
     }
 
 
+# Cache
+# Local memory by default. Set CACHE_URL to a redis:// URL to share the cache
+# across processes, or to file:///some/dir to use a file-based cache.
+CACHE_URL = os.getenv('CACHE_URL', '')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Dashboard payload cache. Writes invalidate it; the timeout (seconds) bounds
+# staleness if an invalidation is ever missed.
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60))
+
+# Delta sync. Cursors are kept this many seconds behind the newest write so
+# transactions that commit late are not skipped, and tombstones of deleted
+# rows are kept this many days; older cursors must start a full sync.
+SYNC_SAFETY_WINDOW = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Response compression. Bodies of these types are compressed with brotli
+# (when installed) or gzip, as negotiated, once they reach the minimum size
+# in bytes. Streaming bodies are always compressed.
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+RESPONSE_COMPRESSION_TYPES = ('application/json', 'text/csv', 'application/x-ndjson')
+
+# Threads, each with its own database connection, that async views use to
+# run independent queries concurrently
+ASYNC_QUERY_WORKERS = int(os.getenv('ASYNC_QUERY_WORKERS', 8))
+
+# Change events kept for clients of the event stream to resume from, per
+# process, and seconds between keepalive comments on an idle stream
+EVENT_BUFFER_SIZE = int(os.getenv('EVENT_BUFFER_SIZE', 1000))
+EVENT_STREAM_HEARTBEAT = int(os.getenv('EVENT_STREAM_HEARTBEAT', 15))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -178,6 +293,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWS_CREDENTIALS = True
 
+# Conditional GET: let browsers send validators and read them back
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['etag', 'last-modified']
+
 # Login URL configuration
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -39,6 +39,9 @@ def update_requirements():
     for package in test_packages:
         subprocess.run(['pip', 'install', '--upgrade', package], check=True)
     
+    # Optional speedups are kept in requirements-optional.txt
+    optional_packages = ['brotli', 'orjson']
+
     # Generate new requirements.txt
     print("\nGenerating new requirements.txt...")
     with open('requirements.txt', 'w') as f:
@@ -49,7 +52,7 @@ def update_requirements():
         # Write main packages
         f.write("# Main dependencies\n")
         for package in packages:
-            if not any(p in package.lower() for p in ['pytest', 'coverage']):
+            if not any(p in package.lower() for p in ['pytest', 'coverage'] + optional_packages):
                 f.write(f"{package}\n")
         
         # Write test packages
@@ -58,7 +61,14 @@ def update_requirements():
             if any(p in package.lower() for p in ['pytest', 'coverage']):
                 f.write(f"{package}\n")
     
-    print("\nDone! Updated requirements.txt with latest versions.")
+    print("\nGenerating new requirements-optional.txt...")
+    with open('requirements-optional.txt', 'w') as f:
+        f.write("# Optional speedups, used when installed\n")
+        for package in packages:
+            if package.split('==')[0].lower() in optional_packages:
+                f.write(f"{package}\n")
+    
+    print("\nDone! Updated requirements.txt and requirements-optional.txt with latest versions.")
 
 if __name__ == "__main__":
     update_requirements() 
\ No newline at end of file
@@ -18,4 +18,35 @@ api.interceptors.request.use(
     }
 )
 
+// Collect every page of a cursor-paginated list endpoint
+export const fetchAllPages = async (url, params = {}) => {
+    let response = await api.get(url, { params: { page_size: 500, ...params } });
+    const results = [...response.data.results];
+
+    while (response.data.next) {
+        response = await api.get(response.data.next);
+        results.push(...response.data.results);
+    }
+
+    return results;
+};
+
+// Collect every change to a collection since a delta sync cursor.
+// Pass '0' for the first sync, then the returned cursor each time after.
+export const fetchChanges = async (url, cursor = '0') => {
+    const changed = [];
+    const deleted = [];
+    let data;
+
+    do {
+        const response = await api.get(url, { params: { updated_since: cursor } });
+        data = response.data;
+        changed.push(...data.results);
+        deleted.push(...data.deleted);
+        cursor = data.cursor;
+    } while (data.has_more);
+
+    return { changed, deleted, cursor };
+};
+
 export default api;
\ No newline at end of file
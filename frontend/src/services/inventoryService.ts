@@ -1,12 +1,16 @@
-import api from './api';
+import api, { fetchAllPages, fetchChanges } from './api';
 
 const INVENTORY_URL = 'api/inventory';
 
 export const inventoryService = {
     // Get all inventory items
     getAll: async () => {
-        const response = await api.get(`${INVENTORY_URL}/`);
-        return response.data;
+        return fetchAllPages(`${INVENTORY_URL}/`);
+    },
+
+    // Get inventory items changed or deleted since a sync cursor
+    getChanges: async (cursor = '0') => {
+        return fetchChanges(`${INVENTORY_URL}/`, cursor);
     },
 
     // Get a single inventory item by ID
@@ -58,18 +62,12 @@ export const inventoryService = {
 
     // Search inventory items
     search: async (query) => {
-        const response = await api.get(`${INVENTORY_URL}/`, {
-            params: { search: query }
-        });
-        return response.data;
+        return fetchAllPages(`${INVENTORY_URL}/`, { search: query });
     },
 
     // Filter inventory items by category
     filterByCategory: async (category) => {
-        const response = await api.get(`${INVENTORY_URL}/`, {
-            params: { category }
-        });
-        return response.data;
+        return fetchAllPages(`${INVENTORY_URL}/`, { category });
     },
 
     // Get inventory history for an item
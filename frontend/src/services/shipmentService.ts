@@ -1,11 +1,15 @@
-import api from './api';
+import api, { fetchAllPages, fetchChanges } from './api';
 
 const SHIPMENT_URL = 'api/shipments';
 export const shipmentService = {
     // Get all shipments
     getAll: async () => {
-        const response = await api.get(`${SHIPMENT_URL}/`);
-        return response.data;
+        return fetchAllPages(`${SHIPMENT_URL}/`);
+    },
+
+    // Get shipments changed or deleted since a sync cursor
+    getChanges: async (cursor = '0') => {
+        return fetchChanges(`${SHIPMENT_URL}/`, cursor);
     },
 
     // Get recent shipments (last 30 days)
@@ -51,26 +55,17 @@ export const shipmentService = {
 
     // Filter shipments by type
     filterByType: async (type) => {
-        const response = await api.get(`${SHIPMENT_URL}/`, {
-            params: { type }
-        });
-        return response.data;
+        return fetchAllPages(`${SHIPMENT_URL}/`, { type });
     },
 
     // Filter shipments by status
     filterByStatus: async (status) => {
-        const response = await api.get(`${SHIPMENT_URL}/`, {
-            params: { status }
-        });
-        return response.data;
+        return fetchAllPages(`${SHIPMENT_URL}/`, { status });
     },
 
     // Search shipments
     search: async (query) => {
-        const response = await api.get(`${SHIPMENT_URL}/`, {
-            params: { search: query }
-        });
-        return response.data;
+        return fetchAllPages(`${SHIPMENT_URL}/`, { search: query });
     },
 
     // Get shipment history for an item